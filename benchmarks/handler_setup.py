@@ -0,0 +1,74 @@
+"""
+Request handler setup benchmark.
+
+Measures the cost of creating a HttpRequestHandler for a new connection,
+without handling any request, and compares it with the work the handler
+used to do on every connection before the application was compiled once
+in PyTerrier.run: building the RouteResolver, compiling the static files
+regular expression and calling mimetypes.init().
+
+Usage:
+
+    python benchmarks/handler_setup.py
+"""
+import mimetypes
+import re
+import socket
+import timeit
+
+from pyterrier.core.application import Application
+from pyterrier.core.route_resolver import RouteResolver
+from pyterrier.http.http_handler import HttpRequestHandler
+
+
+ROUTES = 200
+NUMBER = 2000
+
+
+def action():
+    pass
+
+
+class CompiledHandler(HttpRequestHandler):
+
+    def handle(self):
+        pass
+
+
+class PerRequestHandler(CompiledHandler):
+
+    def __init__(self, route_table, app, *args):
+        RouteResolver(route_table)
+        re.compile(r'[/\w\-\.\_]+(?P<ext>\.\w{,4})$',
+                   re.IGNORECASE | re.DOTALL)
+        mimetypes.init()
+
+        super().__init__(app, *args)
+
+
+def main():
+    route_table = {'GET': [(f'/api/resource{i}/{{id:int}}', action)
+                           for i in range(ROUTES)]}
+    app = Application(route_table, {'staticfiles': 'static'}, None)
+
+    server_sock, client_sock = socket.socketpair()
+    address = ('127.0.0.1', 0)
+
+    compiled = timeit.timeit(
+        lambda: CompiledHandler(app, server_sock, address, None),
+        number=NUMBER)
+    per_request = timeit.timeit(
+        lambda: PerRequestHandler(route_table, app,
+                                  server_sock, address, None),
+        number=NUMBER)
+
+    server_sock.close()
+    client_sock.close()
+
+    print(f'routes: {ROUTES}')
+    print(f'per request setup:  {per_request / NUMBER * 1e6:10.2f} us')
+    print(f'compiled app setup: {compiled / NUMBER * 1e6:10.2f} us')
+
+
+if __name__ == '__main__':
+    main()
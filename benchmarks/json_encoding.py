@@ -0,0 +1,103 @@
+"""
+JSON serialization benchmark.
+
+Serializes lists of 10k objects, plain, `__slots__` and dataclass objects,
+with every JSON backend installed and prints the time per list. The
+`baseline` row converts every key of every object with the regular
+expression, as the encoder did before the keys were converted once per
+class.
+
+Usage:
+
+    python benchmarks/json_encoding.py
+"""
+import dataclasses
+import json
+import timeit
+
+from pyterrier.encoders.default_json_encoder import camelcase_key
+from pyterrier.encoders.json_backends import json_dumps_function
+
+
+OBJECTS = 10000
+REPEAT = 5
+
+
+class Product:
+    def __init__(self, i):
+        self.product_id = i
+        self.product_name = f'product {i}'
+        self.unit_price = i * 1.5
+        self.in_stock = i % 2 == 0
+        self.category_name = 'books'
+        self.tag_list = ['a', 'b']
+
+
+class SlotsProduct:
+    __slots__ = ('product_id', 'product_name', 'unit_price', 'in_stock',
+                 'category_name', 'tag_list')
+
+    def __init__(self, i):
+        self.product_id = i
+        self.product_name = f'product {i}'
+        self.unit_price = i * 1.5
+        self.in_stock = i % 2 == 0
+        self.category_name = 'books'
+        self.tag_list = ['a', 'b']
+
+
+@dataclasses.dataclass
+class DataProduct:
+    product_id: int
+    product_name: str
+    unit_price: float
+    in_stock: bool
+    category_name: str
+    tag_list: list
+
+
+class BaselineEncoder(json.JSONEncoder):
+
+    def default(self, obj):
+        return {camelcase_key(key): value
+                for key, value in obj.__dict__.items()}
+
+
+def main():
+    lists = {
+        'plain': [Product(i) for i in range(OBJECTS)],
+        '__slots__': [SlotsProduct(i) for i in range(OBJECTS)],
+        'dataclass': [DataProduct(i, f'product {i}', i * 1.5, i % 2 == 0,
+                                  'books', ['a', 'b'])
+                      for i in range(OBJECTS)],
+    }
+
+    backends = {'baseline': BaselineEncoder().encode}
+
+    for name in ('json', 'orjson', 'ujson'):
+        try:
+            backends[name] = json_dumps_function(name)
+        except ImportError:
+            pass
+
+    print(f'{"ms per list":>12}' +
+          ''.join(f'{name:>12}' for name in lists))
+
+    for backend, dumps in backends.items():
+        row = f'{backend:>12}'
+
+        for kind, objects in lists.items():
+            if backend == 'baseline' and kind == '__slots__':
+                row += f'{"-":>12}'
+                continue
+
+            elapsed = min(timeit.repeat(lambda: dumps(objects),
+                                        number=1,
+                                        repeat=REPEAT))
+            row += f'{elapsed * 1000:>12.1f}'
+
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Keep-alive benchmark.
+
+Sends the same number of sequential GET requests to a local server opening
+a new connection per request (HTTP/1.0) and reusing a single persistent
+connection (HTTP/1.1 keep-alive), and prints the requests per second.
+
+Usage:
+
+    python benchmarks/keep_alive.py
+"""
+import http.client
+import threading
+import time
+
+from pyterrier import PyTerrier
+from pyterrier.core.threaded_server import ThreadedServer
+from pyterrier.http import Ok
+from pyterrier.http.http_handler import HttpRequestHandler
+
+
+REQUESTS = 2000
+
+
+class QuietHandler(HttpRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def get_user(self, id):
+    return Ok({'id': id, 'name': 'daniel'})
+
+
+def start_server(**options):
+    pyterrier = PyTerrier()
+    pyterrier.get('/api/user/{id:int}')(get_user)
+    app = pyterrier._compile(**options)
+
+    def _handler(*args):
+        return QuietHandler(app, *args)
+
+    server = ThreadedServer(('127.0.0.1', 0), _handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def new_connection_per_request(host, port):
+    for i in range(REQUESTS):
+        conn = http.client.HTTPConnection(host, port)
+        conn.request('GET', f'/api/user/{i}')
+        conn.getresponse().read()
+        conn.close()
+
+
+def persistent_connection(host, port):
+    conn = http.client.HTTPConnection(host, port)
+
+    for i in range(REQUESTS):
+        conn.request('GET', f'/api/user/{i}')
+        conn.getresponse().read()
+
+    conn.close()
+
+
+def measure(func, server):
+    start = time.perf_counter()
+    func(*server.server_address)
+    elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    server.server_close()
+
+    return REQUESTS / elapsed
+
+
+def main():
+    closing = measure(new_connection_per_request, start_server())
+    keep_alive = measure(persistent_connection,
+                         start_server(keep_alive=True,
+                                      keep_alive_timeout=5,
+                                      max_keep_alive_requests=None))
+
+    print(f'requests: {REQUESTS}')
+    print(f'connection per request: {closing:10.0f} req/s')
+    print(f'keep-alive:             {keep_alive:10.0f} req/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,396 @@
+"""
+Load test of the full request pipeline.
+
+Starts a sample application in a separate process and sends it requests
+from a built-in load generator, a thread per connection with keep-alive
+connections, for each workload and concurrency level:
+
+- routing: requests spread over 200 routes with typed parameters.
+- json: an action returning a list of 100 objects serialized to JSON.
+- template: a Jinja2 template rendering a table of 100 rows.
+- static: a 16 KB static file.
+
+Every run sends the same requests in the same order, after a warm up, and
+reports the requests per second and the 50th, 95th and 99th latency
+percentiles. The results can be written to a JSON file and two result files
+compared, flagging the throughput drops and latency increases over a
+threshold, the exit status is 1 when there are regressions.
+
+The load generator runs in the benchmark process, so with many connections
+it competes with the server for the CPU, compare runs made on the same
+machine.
+
+Usage:
+
+    python benchmarks/load_test.py run --output before.json
+    python benchmarks/load_test.py run --engine asyncio -c 1 -c 32
+    python benchmarks/load_test.py compare before.json after.json
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+from pyterrier import PyTerrier
+from pyterrier.core.async_server import AsyncServer
+from pyterrier.core.pooled_server import PooledServer
+from pyterrier.core.threaded_server import ThreadedServer
+from pyterrier.http import Ok
+from pyterrier.http import ViewResult
+from pyterrier.http.http_handler import HttpRequestHandler
+
+
+FORMAT_VERSION = 1
+
+WORKLOADS = ('routing', 'json', 'template', 'static')
+
+ENGINES = ('threaded', 'pooled', 'asyncio')
+
+CONCURRENCY = (1, 8, 32)
+
+ROUTES = 200
+
+ROWS = 100
+
+TEMPLATE = '''<html><body><table>
+{% for row in rows %}
+  <tr class="{{ loop.cycle('odd', 'even') }}">
+    <td>{{ row.id }}</td><td>{{ row.name | title }}</td>
+    <td>{{ '%.2f' | format(row.price) }}</td>
+  </tr>
+{% endfor %}
+</table></body></html>
+'''
+
+
+class QuietHandler(HttpRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def get_item(self, id, name):
+    return Ok({'id': id, 'name': name})
+
+
+def get_items(self):
+    return Ok([{'id': i, 'name': f'item {i}', 'price': i * 1.5,
+                'tags': ['a', 'b'], 'available': i % 2 == 0}
+               for i in range(ROWS)])
+
+
+def get_page(self):
+    return ViewResult('table.html', {
+        'rows': [{'id': i, 'name': f'item {i}', 'price': i * 1.5}
+                 for i in range(ROWS)]})
+
+
+def create_files(directory):
+    """ Write the template and the static file of the sample app. """
+
+    template_dir = os.path.join(directory, 'templates')
+    static_dir = os.path.join(directory, 'static')
+    os.mkdir(template_dir)
+    os.mkdir(static_dir)
+
+    with open(os.path.join(template_dir, 'table.html'), 'w') as f:
+        f.write(TEMPLATE)
+
+    with open(os.path.join(static_dir, 'style.css'), 'wb') as f:
+        f.write(b'body { margin: 0; }\n' * 820)
+
+    return template_dir, static_dir
+
+
+def serve(engine, workers, template_dir, static_dir, address_pipe):
+    """ Run the sample app, in the server process. """
+
+    # The asyncio handler has no log hook, its access log would slow the
+    # server down, the load generator counts the errors.
+    sys.stderr = open(os.devnull, 'w')
+
+    pyterrier = PyTerrier(template_dir=template_dir, static_files=static_dir)
+
+    for i in range(ROUTES):
+        pyterrier.get(f'/api/v1/resource{i}/{{id:int}}/{{name:str}}')(
+            get_item)
+
+    pyterrier.get('/api/items')(get_items)
+    pyterrier.get('/page')(get_page)
+
+    app = pyterrier._compile(keep_alive=True,
+                             keep_alive_timeout=30,
+                             max_keep_alive_requests=None)
+
+    def _handler(*args):
+        return QuietHandler(app, *args)
+
+    address = ('127.0.0.1', 0)
+
+    if engine == 'pooled':
+        server = PooledServer(address, _handler, workers, workers * 4)
+    elif engine == 'asyncio':
+        server = AsyncServer(address, app, workers)
+    else:
+        server = ThreadedServer(address, _handler)
+
+    address_pipe.send(server.server_address)
+    address_pipe.close()
+    server.serve_forever()
+
+
+def workload_paths(workload):
+    """ The request paths of a workload, sent in a loop. """
+
+    if workload == 'routing':
+        # Resolving the last routes means trying all the routes before.
+        return [f'/api/v1/resource{i}/{i * 7}/name{i}'
+                for i in range(0, ROUTES, 7)]
+    elif workload == 'json':
+        return ['/api/items']
+    elif workload == 'template':
+        return ['/page']
+    elif workload == 'static':
+        return ['/style.css']
+
+    raise ValueError(f'Unknown workload `{workload}`.')
+
+
+def generate_load(address, paths, concurrency, requests):
+    """
+    Send `requests` requests over `concurrency` keep-alive connections.
+    Returns the elapsed time, the latency of every request and the number
+    of errors.
+    """
+
+    per_connection = [requests // concurrency] * concurrency
+
+    for i in range(requests % concurrency):
+        per_connection[i] += 1
+
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    barrier = threading.Barrier(concurrency + 1)
+
+    def client(index):
+        conn = http.client.HTTPConnection(*address, timeout=30)
+        results = latencies[index]
+        offset = index * 31
+
+        barrier.wait()
+
+        for i in range(per_connection[index]):
+            path = paths[(offset + i) % len(paths)]
+            start = time.perf_counter()
+
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+
+                if response.status != 200:
+                    errors[index] += 1
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(*address, timeout=30)
+
+            results.append(time.perf_counter() - start)
+
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,))
+               for i in range(concurrency)]
+
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - start
+
+    return elapsed, [x for results in latencies for x in results], sum(errors)
+
+
+def percentile(sorted_values, percent):
+    """ The nearest-rank percentile of a sorted list. """
+
+    if not sorted_values:
+        return 0.0
+
+    rank = max(int(len(sorted_values) * percent / 100 + 0.5), 1)
+
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run(args):
+    context = multiprocessing.get_context('spawn')
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template_dir, static_dir = create_files(tmp)
+        receiver, sender = context.Pipe(duplex=False)
+        server = context.Process(target=serve,
+                                 args=(args.engine, args.workers,
+                                       template_dir, static_dir, sender),
+                                 daemon=True)
+        server.start()
+        address = receiver.recv()
+
+        print(f'{"workload":>10} {"conns":>6} {"req/s":>10} '
+              f'{"p50 (ms)":>9} {"p95 (ms)":>9} {"p99 (ms)":>9} '
+              f'{"errors":>7}')
+
+        try:
+            for workload in args.workloads:
+                paths = workload_paths(workload)
+
+                for concurrency in args.concurrency:
+                    generate_load(address, paths, concurrency, args.warmup)
+                    elapsed, latencies, errors = generate_load(
+                        address, paths, concurrency, args.requests)
+                    latencies.sort()
+
+                    result = {
+                        'workload': workload,
+                        'concurrency': concurrency,
+                        'requests': len(latencies),
+                        'errors': errors,
+                        'rps': len(latencies) / elapsed,
+                        'p50_ms': percentile(latencies, 50) * 1000,
+                        'p95_ms': percentile(latencies, 95) * 1000,
+                        'p99_ms': percentile(latencies, 99) * 1000,
+                    }
+                    results.append(result)
+
+                    print(f'{workload:>10} {concurrency:>6} '
+                          f'{result["rps"]:>10.0f} {result["p50_ms"]:>9.2f} '
+                          f'{result["p95_ms"]:>9.2f} '
+                          f'{result["p99_ms"]:>9.2f} {errors:>7}')
+        finally:
+            server.terminate()
+            server.join()
+
+    if args.output:
+        report = {
+            'version': FORMAT_VERSION,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'engine': args.engine,
+            'workers': args.workers,
+            'requests': args.requests,
+            'results': results,
+        }
+
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    return 0
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    with open(args.current) as f:
+        current = json.load(f)
+
+    for name, report in (('baseline', baseline), ('current', current)):
+        if report.get('version') != FORMAT_VERSION:
+            print(f'The {name} file is not a load test result.')
+            return 2
+
+    if (baseline['engine'], baseline['python']) != \
+            (current['engine'], current['python']):
+        print('Warning: the runs used a different engine or Python version.')
+
+    previous = {(r['workload'], r['concurrency']): r
+                for r in baseline['results']}
+    threshold = args.threshold
+    regressions = 0
+
+    print(f'{"workload":>10} {"conns":>6} {"req/s":>10} {"change":>8} '
+          f'{"p99 (ms)":>9} {"change":>8}')
+
+    for result in current['results']:
+        before = previous.get((result['workload'], result['concurrency']))
+
+        if before is None:
+            continue
+
+        rps_change = _change(before['rps'], result['rps'])
+        p99_change = _change(before['p99_ms'], result['p99_ms'])
+        regression = (rps_change < -threshold or p99_change > threshold or
+                      result['errors'] > before['errors'])
+        regressions += regression
+
+        print(f'{result["workload"]:>10} {result["concurrency"]:>6} '
+              f'{result["rps"]:>10.0f} {rps_change:>+7.1f}% '
+              f'{result["p99_ms"]:>9.2f} {p99_change:>+7.1f}%'
+              f'{"  REGRESSION" if regression else ""}')
+
+    print(f'\n{regressions} regression(s) over {threshold}%.')
+
+    return 1 if regressions else 0
+
+
+def _change(before, after):
+    return (after - before) / before * 100 if before else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the request '
+                                     'pipeline of a sample application.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the load test')
+    run_parser.add_argument('--engine', choices=ENGINES, default='threaded')
+    run_parser.add_argument('--workers', type=int, default=16,
+                            help='worker threads of the pooled and asyncio '
+                            'engines')
+    run_parser.add_argument('-w', '--workload', dest='workloads',
+                            action='append', choices=WORKLOADS,
+                            help='workload to run, all by default')
+    run_parser.add_argument('-c', '--concurrency', type=int, action='append',
+                            help='number of connections, by default '
+                            f'{", ".join(map(str, CONCURRENCY))}')
+    run_parser.add_argument('-n', '--requests', type=int, default=5000,
+                            help='requests per workload and concurrency')
+    run_parser.add_argument('--warmup', type=int, default=500,
+                            help='requests sent before measuring')
+    run_parser.add_argument('-o', '--output', help='write the results to '
+                            'this JSON file')
+
+    compare_parser = commands.add_parser('compare', help='compare two '
+                                         'result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10.0,
+                                help='percent of throughput drop or p99 '
+                                'increase flagged as a regression')
+
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        return compare(args)
+
+    args.workloads = args.workloads or list(WORKLOADS)
+    args.concurrency = args.concurrency or list(CONCURRENCY)
+
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
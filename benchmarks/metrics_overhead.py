@@ -0,0 +1,92 @@
+"""
+Metrics overhead benchmark.
+
+Measures the time added to every request by the route metrics: looking up
+the route's metrics, recording the start and recording the status and
+latency. Then it sends the same number of keep-alive requests to a local
+server with the metrics disabled and enabled, and prints the time per
+request for both.
+
+Usage:
+
+    python benchmarks/metrics_overhead.py
+"""
+import http.client
+import threading
+import time
+import timeit
+
+from pyterrier import PyTerrier
+from pyterrier.core.metrics import Metrics
+from pyterrier.core.threaded_server import ThreadedServer
+from pyterrier.http import Ok
+from pyterrier.http.http_handler import HttpRequestHandler
+
+
+REQUESTS = 5000
+
+
+class QuietHandler(HttpRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def get_user(self, id):
+    return Ok({'id': id})
+
+
+def record_overhead():
+    routes = [(f'/api/route{i}/{{id:int}}', object()) for i in range(100)]
+    metrics = Metrics({'GET': routes})
+    action = routes[50][1]
+
+    def record():
+        route_metrics = metrics.for_action('GET', action)
+        route_metrics.finish(route_metrics.start(), 200)
+
+    number = 200000
+    elapsed = min(timeit.repeat(record, number=number, repeat=5))
+
+    return elapsed / number * 1e6
+
+
+def request_time(**options):
+    pyterrier = PyTerrier()
+    pyterrier.get('/api/user/{id:int}')(get_user)
+    app = pyterrier._compile(keep_alive=True, **options)
+
+    def _handler(*args):
+        return QuietHandler(app, *args)
+
+    server = ThreadedServer(('127.0.0.1', 0), _handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    conn = http.client.HTTPConnection(*server.server_address)
+    start = time.perf_counter()
+
+    for i in range(REQUESTS):
+        conn.request('GET', f'/api/user/{i}')
+        conn.getresponse().read()
+
+    elapsed = time.perf_counter() - start
+
+    conn.close()
+    server.shutdown()
+    server.server_close()
+
+    return elapsed / REQUESTS * 1e6
+
+
+def main():
+    print(f'metrics recording: {record_overhead():.2f} us/request')
+
+    disabled = request_time()
+    enabled = request_time(metrics_path='/metrics')
+
+    print(f'requests, metrics disabled: {disabled:.1f} us/request')
+    print(f'requests, metrics enabled: {enabled:.1f} us/request')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Pre-fork scaling benchmark.
+
+Starts a sample application with a CPU-bound JSON endpoint using 1 and then
+N worker processes, loads it with one client process per CPU core and
+prints the requests per second for each run.
+
+Usage:
+
+    python benchmarks/prefork.py [max_processes]
+"""
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+
+
+DURATION = 5
+
+APP = textwrap.dedent('''
+    import sys
+
+    from pyterrier import PyTerrier
+    from pyterrier.http import Ok
+
+    app = PyTerrier(port=int(sys.argv[1]))
+
+    @app.get('/api/primes')
+    def primes(self):
+        found = [n for n in range(2, 3000)
+                 if all(n % d for d in range(2, int(n ** 0.5) + 1))]
+        return Ok({'count': len(found), 'primes': found[-10:]})
+
+    app.run(processes=int(sys.argv[2]), keep_alive=True,
+            max_keep_alive_requests=None)
+''')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+def client(port, deadline, results):
+    conn = http.client.HTTPConnection('localhost', port)
+    count = 0
+
+    while time.time() < deadline:
+        conn.request('GET', '/api/primes')
+        conn.getresponse().read()
+        count += 1
+
+    results.put(count)
+
+
+def wait_until_ready(port):
+    while True:
+        try:
+            socket.create_connection(('localhost', port)).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+
+
+def measure(processes, clients):
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    server = subprocess.Popen(
+        [sys.executable, '-c', APP, str(port), str(processes)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL)
+
+    try:
+        wait_until_ready(port)
+
+        results = multiprocessing.Queue()
+        deadline = time.time() + DURATION
+        workers = [multiprocessing.Process(target=client,
+                                           args=(port, deadline, results))
+                   for _ in range(clients)]
+
+        for worker in workers:
+            worker.start()
+
+        total = sum(results.get() for _ in workers)
+
+        for worker in workers:
+            worker.join()
+
+        return total / DURATION
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+def main():
+    cores = os.cpu_count() or 1
+    max_processes = int(sys.argv[1]) if len(sys.argv) > 1 else cores
+
+    print(f'{"processes":>10} {"req/s":>10}')
+
+    for processes in sorted({1, max(1, max_processes // 2), max_processes}):
+        print(f'{processes:>10} {measure(processes, cores):>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Request allocation benchmark.
+
+Creates Request objects for a typical browser request and prints the
+memory allocated per request, measured with tracemalloc, and the time per
+request. The lazy Request is compared with the previous implementation,
+which parsed everything when the request was created, both for an action
+that only reads the path and method and for one that reads every property.
+
+Usage:
+
+    python benchmarks/request_allocations.py
+"""
+import http.client
+import io
+import time
+import tracemalloc
+from http import cookies
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+from pyterrier.core.request import Request
+
+
+REQUESTS = 10000
+
+HEADERS = (b'Host: localhost:8000\r\n'
+           b'User-Agent: Mozilla/5.0 (X11; Linux x86_64; rv:109.0)\r\n'
+           b'Accept: text/html,application/xhtml+xml,*/*;q=0.8\r\n'
+           b'Accept-Language: en-US,en;q=0.5\r\n'
+           b'Accept-Encoding: gzip, deflate, br\r\n'
+           b'Connection: keep-alive\r\n'
+           b'Cookie: session=8f2a7c; theme=dark\r\n\r\n')
+
+
+class EagerRequest:
+    """ The Request before it computed its properties lazily. """
+
+    def __init__(self, request):
+        self.path = urlparse(request.path).path
+        self.requestline = request.requestline
+        self.headers = {k: v for (k, v) in request.headers.items()}
+        self.params = parse_qs(urlparse(request.path).query)
+        self.cookies = cookies.SimpleCookie()
+        self.method = request.requestline.split(' ')[0]
+
+        try:
+            self.cookies.load(self.headers['Cookie'])
+        except KeyError:
+            self.cookies = None
+
+
+class Handler:
+    def __init__(self):
+        self.path = '/api/users/42'
+        self.requestline = f'GET {self.path} HTTP/1.1'
+        self.headers = http.client.parse_headers(io.BytesIO(HEADERS))
+
+
+def touch_route(request):
+    return request.path, request.method
+
+
+def touch_all(request):
+    return (request.path, request.method, request.headers, request.params,
+            request.cookies)
+
+
+def measure(cls, touch, handler):
+    tracemalloc.start()
+    requests = []
+
+    for _ in range(REQUESTS):
+        request = cls(handler)
+        touch(request)
+        requests.append(request)
+
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+
+    for _ in range(REQUESTS):
+        touch(cls(handler))
+
+    elapsed = time.perf_counter() - start
+
+    return allocated / REQUESTS, elapsed / REQUESTS * 1e6
+
+
+def main():
+    handler = Handler()
+
+    print(f'{"":>24} {"bytes/request":>14} {"us/request":>11}')
+
+    for touch in (touch_route, touch_all):
+        for cls in (EagerRequest, Request):
+            size, elapsed = measure(cls, touch, handler)
+            name = f'{cls.__name__} {touch.__name__[6:]}'
+            print(f'{name:>24} {size:>14.0f} {elapsed:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Route resolution benchmark.
+
+Measures the time to resolve the last registered route while the number of
+routes in the route table grows, comparing the RouteResolver with a linear
+scan over the compiled regular expressions.
+
+Usage:
+
+    python benchmarks/route_resolution.py
+"""
+import re
+import timeit
+
+from pyterrier.core.route_converter import RouteConverter
+from pyterrier.core.route_resolver import RouteResolver
+
+
+ROUTE_COUNTS = (10, 100, 1000, 10000)
+NUMBER = 20000
+
+
+def action():
+    pass
+
+
+def build_route_table(count):
+    return {'GET': [(f'/api/resource{i}/{{id:int}}/items/{{name:str}}',
+                     action)
+                    for i in range(count)]}
+
+
+def linear_scan(compiled, uri):
+    for regex, func in compiled:
+        values = re.match(regex, uri)
+
+        if values is not None:
+            return (func, values.groups())
+
+
+def main():
+    converter = RouteConverter()
+
+    print(f'{"routes":>8} {"tree (us)":>12} {"linear (us)":>12}')
+
+    for count in ROUTE_COUNTS:
+        route_table = build_route_table(count)
+        resolver = RouteResolver(route_table)
+        compiled = [(re.compile(converter.convert(route)), func)
+                    for route, func in route_table['GET']]
+
+        uri = f'/api/resource{count - 1}/10/items/book'
+
+        tree = timeit.timeit(lambda: resolver.resolve(uri, 'GET'),
+                             number=NUMBER)
+        linear = timeit.timeit(lambda: linear_scan(compiled, uri),
+                               number=NUMBER // 100 or 1)
+
+        print(f'{count:>8} '
+              f'{tree / NUMBER * 1e6:>12.2f} '
+              f'{linear / (NUMBER // 100 or 1) * 1e6:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Static files benchmark.
+
+Serves static files of growing sizes from a local server and prints the
+throughput and the peak memory allocated by the server while the file is
+being downloaded, measured with tracemalloc. Then compares the requests per
+second for a small file served from disk, from the static file cache and
+answered with 304 Not Modified.
+
+Usage:
+
+    python benchmarks/static_files.py
+"""
+import http.client
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from pyterrier import PyTerrier
+from pyterrier.core.threaded_server import ThreadedServer
+from pyterrier.http.http_handler import HttpRequestHandler
+
+
+SIZES_MB = (1, 16, 128)
+SMALL_FILE_REQUESTS = 2000
+
+
+class QuietHandler(HttpRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    with tempfile.TemporaryDirectory() as static_dir:
+        for size in SIZES_MB:
+            with open(os.path.join(static_dir, f'{size}.bin'), 'wb') as f:
+                f.write(os.urandom(1024 * 1024) * size)
+
+        app = PyTerrier(static_files=static_dir)._compile()
+
+        def _handler(*args):
+            return QuietHandler(app, *args)
+
+        server = ThreadedServer(('127.0.0.1', 0), _handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        print(f'{"size (MB)":>10} {"MB/s":>10} {"peak memory (KB)":>18}')
+
+        for size in SIZES_MB:
+            conn = http.client.HTTPConnection(*server.server_address)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+
+            conn.request('GET', f'/{size}.bin')
+            response = conn.getresponse()
+
+            while response.read(64 * 1024):
+                pass
+
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            conn.close()
+
+            print(f'{size:>10} {size / elapsed:>10.0f} {peak / 1024:>18.0f}')
+
+        server.shutdown()
+        server.server_close()
+
+        with open(os.path.join(static_dir, 'small.css'), 'wb') as f:
+            f.write(os.urandom(16 * 1024))
+
+        print(f'\n{"16 KB file":>24} {"req/s":>10}')
+
+        for name, cache_size, conditional in (('disk', None, False),
+                                              ('cache', 1024 * 1024, False),
+                                              ('304', None, True)):
+            rate = small_file_rate(static_dir, cache_size, conditional)
+            print(f'{name:>24} {rate:>10.0f}')
+
+
+def small_file_rate(static_dir, cache_size, conditional):
+    app = PyTerrier(static_files=static_dir,
+                    static_cache_size=cache_size)._compile(keep_alive=True)
+
+    def _handler(*args):
+        return QuietHandler(app, *args)
+
+    server = ThreadedServer(('127.0.0.1', 0), _handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    conn = http.client.HTTPConnection(*server.server_address)
+    conn.request('GET', '/small.css')
+    response = conn.getresponse()
+    response.read()
+
+    headers = {'If-None-Match': response.getheader('ETag')} \
+        if conditional else {}
+
+    start = time.perf_counter()
+
+    for _ in range(SMALL_FILE_REQUESTS):
+        conn.request('GET', '/small.css', headers=headers)
+        conn.getresponse().read()
+
+    elapsed = time.perf_counter() - start
+
+    conn.close()
+    server.shutdown()
+    server.server_close()
+
+    return SMALL_FILE_REQUESTS / elapsed
+
+
+if __name__ == '__main__':
+    main()
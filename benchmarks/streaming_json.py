@@ -0,0 +1,95 @@
+"""
+Streaming JSON benchmark.
+
+Exports a large number of rows with an HttpResult and with a
+StreamingHttpResult, as a JSON array and as newline delimited JSON, and
+prints the time to first byte, the total time and the peak memory
+allocated while serving the response, measured with tracemalloc.
+
+Usage:
+
+    python benchmarks/streaming_json.py
+"""
+import http.client
+import threading
+import time
+import tracemalloc
+
+from pyterrier import PyTerrier
+from pyterrier.core.threaded_server import ThreadedServer
+from pyterrier.http import Ok
+from pyterrier.http import StreamingHttpResult
+from pyterrier.http.http_handler import HttpRequestHandler
+
+
+ROWS = 200000
+
+
+class QuietHandler(HttpRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def rows():
+    for i in range(ROWS):
+        yield {'id': i, 'name': f'row {i}', 'total': i * 2}
+
+
+def get_list(self):
+    return Ok(list(rows()))
+
+
+def get_streaming(self):
+    return StreamingHttpResult(rows(), buffer_size=16 * 1024)
+
+
+def get_ndjson(self):
+    return StreamingHttpResult(rows(), ndjson=True, buffer_size=16 * 1024)
+
+
+def main():
+    pyterrier = PyTerrier()
+    pyterrier.get('/list')(get_list)
+    pyterrier.get('/streaming')(get_streaming)
+    pyterrier.get('/ndjson')(get_ndjson)
+    app = pyterrier._compile(keep_alive=True)
+
+    def _handler(*args):
+        return QuietHandler(app, *args)
+
+    server = ThreadedServer(('127.0.0.1', 0), _handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f'{"":>12} {"TTFB (ms)":>10} {"total (ms)":>11} '
+          f'{"peak memory (KB)":>17}')
+
+    for path in ('/list', '/streaming', '/ndjson'):
+        conn = http.client.HTTPConnection(*server.server_address)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+
+        conn.request('GET', path)
+        response = conn.getresponse()
+        response.read(1)
+        ttfb = time.perf_counter() - start
+
+        while response.read(64 * 1024):
+            pass
+
+        total = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        conn.close()
+
+        print(f'{path:>12} {ttfb * 1000:>10.1f} {total * 1000:>11.1f} '
+              f'{peak / 1024:>17.0f}')
+
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Streaming view benchmark.
+
+Renders a large listing page with a ViewResult and with a
+StreamingViewResult and prints the time to first byte, the total time and
+the peak memory allocated while serving the page, measured with
+tracemalloc.
+
+Usage:
+
+    python benchmarks/streaming_view.py
+"""
+import http.client
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from pyterrier import PyTerrier
+from pyterrier.core.threaded_server import ThreadedServer
+from pyterrier.http import StreamingViewResult
+from pyterrier.http import ViewResult
+from pyterrier.http.http_handler import HttpRequestHandler
+
+
+ROWS = 200000
+
+TEMPLATE = '''<table>
+{% for i in range(rows) %}
+  <tr><td>{{ i }}</td><td>row {{ i }}</td><td>{{ i * 2 }}</td></tr>
+{% endfor %}
+</table>'''
+
+
+class QuietHandler(HttpRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def get_page(self):
+    return ViewResult('list.html', {'rows': ROWS})
+
+
+def get_streaming_page(self):
+    return StreamingViewResult('list.html', {'rows': ROWS}, 16 * 1024)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as template_dir:
+        with open(f'{template_dir}/list.html', 'w') as f:
+            f.write(TEMPLATE)
+
+        pyterrier = PyTerrier(template_dir=template_dir)
+        pyterrier.get('/page')(get_page)
+        pyterrier.get('/streaming')(get_streaming_page)
+        app = pyterrier._compile(keep_alive=True)
+
+        def _handler(*args):
+            return QuietHandler(app, *args)
+
+        server = ThreadedServer(('127.0.0.1', 0), _handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        print(f'{"":>12} {"TTFB (ms)":>10} {"total (ms)":>11} '
+              f'{"peak memory (KB)":>17}')
+
+        for path in ('/page', '/streaming'):
+            conn = http.client.HTTPConnection(*server.server_address)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read(1)
+            ttfb = time.perf_counter() - start
+
+            while response.read(64 * 1024):
+                pass
+
+            total = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            conn.close()
+
+            print(f'{path:>12} {ttfb * 1000:>10.1f} {total * 1000:>11.1f} '
+                  f'{peak / 1024:>17.0f}')
+
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
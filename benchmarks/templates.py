@@ -0,0 +1,74 @@
+"""
+Template startup benchmark.
+
+Generates a few hundred templates and compares the time to get every
+template ready to render:
+
+- development: the templates are compiled on their first render.
+- production, cold: all templates are compiled in parallel at startup and
+  their bytecode is written to an empty cache.
+- production, warm: a restart, the templates are loaded from the bytecode
+  cache.
+
+Usage:
+
+    python benchmarks/templates.py
+"""
+import os
+import tempfile
+import time
+
+from pyterrier.renderers.jinja2_renderer import Jinja2Renderer
+
+
+TEMPLATES = 300
+
+BODY = '''
+  {% for item in items %}
+    <div class="{{ loop.cycle('odd', 'even') }}">
+      {% if item.visible %}{{ item.name | title }}{% else %}-{% endif %}
+      {% for tag in item.tags %}<span>{{ tag | e }}</span>{% endfor %}
+    </div>
+  {% endfor %}
+'''
+
+TEMPLATE = ('{% extends "base.html" %}{% block content %}' + BODY * 5 +
+            '{% endblock %}')
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        template_dir = os.path.join(tmp, 'templates')
+        cache_dir = os.path.join(tmp, 'cache')
+        os.mkdir(template_dir)
+
+        with open(os.path.join(template_dir, 'base.html'), 'w') as f:
+            f.write('<html>{% block content %}{% endblock %}</html>')
+
+        for i in range(TEMPLATES):
+            with open(os.path.join(template_dir, f'{i}.html'), 'w') as f:
+                f.write(TEMPLATE)
+
+        start = time.perf_counter()
+        renderer = Jinja2Renderer(template_dir)
+
+        for i in range(TEMPLATES):
+            renderer.render(f'{i}.html', {'items': []})
+
+        report('development', start)
+
+        for name in ('production, cold', 'production, warm'):
+            start = time.perf_counter()
+            Jinja2Renderer(template_dir,
+                           production=True,
+                           bytecode_cache_dir=cache_dir)
+            report(name, start)
+
+
+def report(name, start):
+    elapsed = time.perf_counter() - start
+    print(f'{name:>20}: {elapsed * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
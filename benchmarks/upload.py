@@ -0,0 +1,93 @@
+"""
+Upload benchmark.
+
+Uploads a large file in a multipart/form-data request to a local server,
+the client generates the body on the fly, and prints the upload speed and
+how much the peak memory of the process grew while the file was parsed.
+The memory stays flat as the body is parsed in chunks and the file is
+spooled to disk.
+
+Usage:
+
+    python benchmarks/upload.py [SIZE_MB]
+
+The default size is 2048 MB, it needs that much free space in the
+temporary directory.
+"""
+import http.client
+import resource
+import sys
+import threading
+import time
+
+from pyterrier import PyTerrier
+from pyterrier.core.threaded_server import ThreadedServer
+from pyterrier.http import Ok
+from pyterrier.http.http_handler import HttpRequestHandler
+
+
+BOUNDARY = 'benchmark-boundary'
+
+CHUNK = b'x' * 1024 * 1024
+
+
+class QuietHandler(HttpRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def post_upload(self, form):
+    return Ok({'size': form['file'].size})
+
+
+def body(size_mb):
+    yield (f'--{BOUNDARY}\r\n'
+           'Content-Disposition: form-data; name="file"; '
+           'filename="large.bin"\r\n'
+           'Content-Type: application/octet-stream\r\n\r\n').encode()
+
+    for _ in range(size_mb):
+        yield CHUNK
+
+    yield f'\r\n--{BOUNDARY}--\r\n'.encode()
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    length = sum(map(len, body(0))) + size_mb * len(CHUNK)
+
+    pyterrier = PyTerrier()
+    pyterrier.post('/upload')(post_upload)
+    app = pyterrier._compile()
+
+    def _handler(*args):
+        return QuietHandler(app, *args)
+
+    server = ThreadedServer(('127.0.0.1', 0), _handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    conn = http.client.HTTPConnection(*server.server_address)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+
+    conn.request('POST', '/upload', body=body(size_mb), headers={
+        'Content-Type': f'multipart/form-data; boundary={BOUNDARY}',
+        'Content-Length': str(length)})
+    response = conn.getresponse()
+    result = response.read()
+
+    elapsed = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    conn.close()
+    server.shutdown()
+    server.server_close()
+
+    print(f'uploaded: {size_mb} MB in {elapsed:.1f} s '
+          f'({size_mb / elapsed:.0f} MB/s), response {result.decode()}')
+    print(f'peak memory growth: {(after - before) / 1024:.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
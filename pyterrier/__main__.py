@@ -1,7 +1,8 @@
 from argparse import ArgumentParser
 import sys
 
-from .cli.commands import create_app, create_ctrl
+from .cli.commands import create_app, create_ctrl, precompress
+from .cli.commands import collapse_stacks
 
 parser = ArgumentParser(prog='pyterrier', description='PyTerrier CLI')
 
@@ -28,11 +29,30 @@ parser.add_argument('--newcontroller',
                     dest='ctrlname',
                     help='creates a new controller')
 
+parser.add_argument('--precompress',
+                    type=str,
+                    nargs='?',
+                    const='static',
+                    metavar='DIR',
+                    dest='static_dir',
+                    help=('creates gzip compressed copies of the static '
+                          'files, defaults to the `static` folder'))
+
+parser.add_argument('--collapse-stacks',
+                    type=str,
+                    metavar='PATH',
+                    dest='profile_path',
+                    help=('prints the request profiles in PATH, a .pstats '
+                          'file or a folder, as collapsed stacks for flame '
+                          'graph tools'))
+
 args = vars(parser.parse_args())
 
 appname = args.get('appname')
 ctrlname = args.get('ctrlname')
 create_on_curdir = args.get('create_on_curdir')
+static_dir = args.get('static_dir')
+profile_path = args.get('profile_path')
 
 if appname is not None and ctrlname is not None:
     print(('pyterrier: error: --newapp and --newcontroller are not meant'
@@ -43,3 +63,7 @@ if appname is not None:
     create_app(appname, create_on_curdir)
 elif ctrlname is not None:
     create_ctrl(ctrlname)
+elif static_dir is not None:
+    precompress(static_dir)
+elif profile_path is not None:
+    collapse_stacks(profile_path)
@@ -1,8 +1,14 @@
+import mimetypes
 import os
+import pstats
 import shutil
 import sys
 import re
 
+from pyterrier.core.profiler import collapsed_stacks
+from pyterrier.http.compression import GzipStream
+from pyterrier.http.compression import is_compressible
+
 
 def create_app(app_name, create_on_curdir=False):
 
@@ -81,6 +87,87 @@ def create_ctrl(ctrl_name):
            'has been successfully created\n'))
 
 
+def precompress(static_dir='static', level=9):
+    """
+    Create a gzip compressed `.gz` copy of the compressible files in the
+    static files directory, the server sends them to the clients that
+    accept gzip. Copies that are up to date are left alone and files that
+    do not get smaller are not compressed.
+    """
+
+    if not os.path.isdir(static_dir):
+        print(f'error: the folder `{static_dir}` does not exist',
+              file=sys.stderr)
+        sys.exit()
+
+    print(f'\nCompressing the static files in: {static_dir}')
+
+    compressed = 0
+
+    for root, _, filenames in os.walk(static_dir):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            content_type, _ = mimetypes.guess_type(path)
+
+            if path.endswith('.gz') or not is_compressible(content_type):
+                continue
+
+            gz_path = f'{path}.gz'
+
+            if (os.path.exists(gz_path) and
+                    os.path.getmtime(gz_path) >= os.path.getmtime(path)):
+                continue
+
+            if _compress_file(path, gz_path, level):
+                compressed += 1
+
+    print(f'{compressed} file(s) compressed\n')
+
+
+def collapse_stacks(path, output=sys.stdout):
+    """
+    Print the stats of a `.pstats` file, or of all the `.pstats` files in
+    a folder, in the collapsed stacks format of flame graph tools.
+    """
+
+    if os.path.isdir(path):
+        files = [os.path.join(root, filename)
+                 for root, _, filenames in os.walk(path)
+                 for filename in filenames if filename.endswith('.pstats')]
+    else:
+        files = [path] if os.path.exists(path) else []
+
+    if not files:
+        print(f'error: no profile stats found in `{path}`', file=sys.stderr)
+        sys.exit()
+
+    for line in collapsed_stacks(pstats.Stats(*files)):
+        print(line, file=output)
+
+
+def _compress_file(path, gz_path, level):
+    tmp_path = f'{gz_path}.tmp'
+    stream = GzipStream(level)
+
+    with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+        for chunk in iter(lambda: src.read(64 * 1024), b''):
+            dst.write(stream.compress(chunk))
+
+        dst.write(stream.flush())
+
+    if os.path.getsize(tmp_path) >= os.path.getsize(path):
+        os.remove(tmp_path)
+
+        if os.path.exists(gz_path):
+            os.remove(gz_path)
+
+        return False
+
+    os.replace(tmp_path, gz_path)
+
+    return True
+
+
 def _get_ctrl_name(ctrl_name):
     if re.search(r'(\-|\_)', ctrl_name):
         return None
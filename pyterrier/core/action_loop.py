@@ -0,0 +1,102 @@
+import asyncio
+import os
+import threading
+from typing import Any
+from typing import Awaitable
+from typing import Optional
+
+
+class ActionLoop:
+    """
+    An event loop running in a background thread, shared by the request
+    threads of the threaded servers to run the actions defined with
+    `async def`.
+
+    The request thread waits on a future until its action has finished, it
+    is taken for the whole request as with a blocking action. The loop lets
+    the actions share async clients and await several calls at once, only
+    the AsyncServer runs them without taking a thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    def run(self, coroutine: Awaitable) -> Any:
+        """
+        Run `coroutine` in the event loop, starting it on first use, and
+        wait for its result. It must not be called from the loop itself.
+
+        The coroutine runs in a copy of the caller's context, so it sees
+        the request handled by the calling thread.
+        """
+
+        loop = self._loop or self._start()
+
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def stop(self) -> None:
+        """
+        Stop the event loop and wait for its thread to exit, the pending
+        tasks are cancelled. `PyTerrier.run` calls it once the server has
+        been closed and its requests have finished, the loop starts again
+        on next use.
+        """
+
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+
+        if loop is None:
+            return
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=_run_forever,
+                                                args=(loop,),
+                                                name='pyterrier-actions',
+                                                daemon=True)
+                self._thread.start()
+                self._loop = loop
+
+            return self._loop
+
+    def _after_fork(self) -> None:
+        # The thread running the loop does not exist in a forked child, the
+        # child starts its own loop on first use.
+        self._lock = threading.Lock()
+        self._loop = self._thread = None
+
+
+def _run_forever(loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.set_event_loop(loop)
+
+    try:
+        loop.run_forever()
+    finally:
+        tasks = asyncio.all_tasks(loop)
+
+        for task in tasks:
+            task.cancel()
+
+        loop.run_until_complete(asyncio.gather(*tasks,
+                                               return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+# The loop shared by all the request threads of the process.
+action_loop = ActionLoop()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=action_loop._after_fork)
@@ -0,0 +1,195 @@
+import mimetypes
+import re
+from types import MappingProxyType
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from pyterrier.encoders.json_backends import json_dumps_function
+from pyterrier.http.cache import Cache
+from pyterrier.http.static_file_cache import StaticFileCache
+from pyterrier.http.static_files import StaticFiles
+from .metrics import Metrics
+from .profiler import Profiler
+from .route_cache import RouteCache
+from .route_resolver import RouteResolver
+
+
+class Application:
+    """
+    The compiled application, everything the request handlers need to
+    dispatch a request.
+
+    It is built once by `PyTerrier.run` and shared, read-only, by all the
+    requests, so creating a request handler costs close to nothing. When the
+    controllers are reloaded a new application replaces it, see `replace`.
+    """
+
+    __slots__ = ('_route_table', '_resolver', '_config', '_renderer',
+                 '_static_regex', '_mime_types', '_static_files',
+                 '_json_dumps', '_metrics', '_profiler', '_action_routes',
+                 '_response_caches', '_replacement')
+
+    def __init__(self,
+                 route_table: Dict[str, List[Tuple[str, Callable]]],
+                 config: Dict[str, Any],
+                 renderer: Any,
+                 route_cache: Optional[RouteCache]=None,
+                 static_file_cache: Optional[StaticFileCache]=None,
+                 response_caches: Optional[Mapping[Callable, Cache]]=None,
+                 previous: Optional['Application']=None) -> None:
+        """
+        Create a new compiled application.
+
+        :Parameters:
+        - `route_table`: the application's route table, it is copied so
+        routes registered later do not affect the compiled application.
+        - `config`: the application's options, e.g. the templates and
+        static files directories.
+        - `renderer`: the template renderer instance.
+        - `route_cache`: optional cache of resolved request paths.
+        - `static_file_cache`: optional cache of static files contents.
+        - `response_caches`: the response cache of the cached actions.
+        - `previous`: the application this one replaces, the metrics of the
+        actions in both are kept and the profiler is shared.
+        """
+
+        self._route_table = MappingProxyType(
+            {verb: tuple(routes) for verb, routes in route_table.items()}
+        )
+        self._resolver = RouteResolver(self._route_table, route_cache)
+        self._config = MappingProxyType(dict(config))
+        self._renderer = renderer
+        self._json_dumps = json_dumps_function(
+            self._config.get('json_backend', 'json'))
+        self._metrics = (Metrics(self._route_table,
+                                 previous=previous and previous.metrics)
+                         if self._config.get('metrics_path') else None)
+
+        profile_dir = self._config.get('profile_dir')
+
+        if previous is not None and previous.profiler is not None:
+            self._profiler = previous.profiler
+        elif profile_dir:
+            self._profiler = Profiler(profile_dir,
+                                      self._config.get('profile_every'),
+                                      self._config.get('profile_secret'))
+        else:
+            self._profiler = None
+
+        self._replacement: Optional[Application] = None
+
+        self._action_routes: Dict[Tuple[str, Callable], str] = {}
+
+        for verb, routes in self._route_table.items():
+            for route, action in routes:
+                self._action_routes.setdefault((verb, action), route)
+
+        response_caches = response_caches or {}
+        self._response_caches = MappingProxyType(
+            {action: response_caches[action]
+             for _, action in self._action_routes
+             if action in response_caches}
+        )
+
+        self._static_regex = re.compile(r'[/\w\-\.\_]+(?P<ext>\.\w{,4})$',
+                                        re.IGNORECASE | re.DOTALL)
+
+        if not mimetypes.inited:
+            mimetypes.init()
+
+        self._mime_types = MappingProxyType(dict(mimetypes.types_map))
+        self._static_files = StaticFiles(self._config['staticfiles'],
+                                         self._mime_types,
+                                         static_file_cache)
+
+    @property
+    def current(self) -> 'Application':
+        """
+        The application replacing this one, or this one if it has not been
+        replaced. The handlers switch to it before every request, so the
+        requests being handled finish with the application they started
+        with.
+        """
+
+        app = self
+        replacement = app._replacement
+
+        while replacement is not None:
+            app = replacement
+            replacement = app._replacement
+
+        return app
+
+    def replace(self, app: 'Application') -> None:
+        """ Make `app` handle the next requests instead of this one. """
+
+        self._replacement = app
+
+    @property
+    def route_table(self) -> Mapping[str, Tuple[Tuple[str, Callable], ...]]:
+        return self._route_table
+
+    @property
+    def resolver(self) -> RouteResolver:
+        return self._resolver
+
+    @property
+    def config(self) -> Mapping[str, Any]:
+        return self._config
+
+    @property
+    def renderer(self) -> Any:
+        return self._renderer
+
+    @property
+    def metrics(self) -> Optional[Metrics]:
+        """ The request metrics, None unless `metrics_path` is set. """
+
+        return self._metrics
+
+    @property
+    def profiler(self) -> Optional[Profiler]:
+        """ The request profiler, None unless `profile_dir` is set. """
+
+        return self._profiler
+
+    def route_template(self, verb: str, action: Callable) -> str:
+        """
+        Returns the route an action was registered with, e.g.
+        `/user/{id:int}`, for the resolved verb and action.
+        """
+
+        return self._action_routes[(verb, action)]
+
+    def response_cache(self, action: Callable) -> Optional[Cache]:
+        """ Returns the response cache of an action, None if it has none. """
+
+        return self._response_caches.get(action)
+
+    @property
+    def json_dumps(self) -> Callable[[Any], Union[str, bytes]]:
+        """ Serialize the actions' results to JSON. """
+
+        return self._json_dumps
+
+    @property
+    def static_regex(self):
+        """ Matches request paths pointing to a static file. """
+
+        return self._static_regex
+
+    @property
+    def mime_types(self) -> Mapping[str, str]:
+        """ Map of file extensions to mime types. """
+
+        return self._mime_types
+
+    @property
+    def static_files(self) -> StaticFiles:
+        return self._static_files
@@ -0,0 +1,148 @@
+import asyncio
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from typing import Tuple
+
+from pyterrier.http.async_http_handler import AsyncHttpRequestHandler
+from .application import Application
+from .connections import ConnectionTracker
+
+
+class AsyncServer:
+    """
+    asyncio based server, an alternative to the ThreadedServer.
+
+    Connections are handled by coroutines instead of one OS thread per
+    connection, so idle connections are cheap. Actions that are not
+    coroutines run in a bounded thread pool.
+
+    ..Note:: It exposes the same interface as the socketserver servers:
+    `serve_forever`, `shutdown` and `server_close`.
+    """
+
+    request_queue_size = 1024
+
+    def __init__(self,
+                 server_address: Tuple[str, int],
+                 app: Application,
+                 workers: Optional[int]=None,
+                 sock: Optional[socket.socket]=None) -> None:
+        """
+        Create a new server, the socket is bound and listening when the
+        constructor returns.
+
+        :Parameters:
+        - `server_address`: a (hostname, port) tuple.
+        - `app`: the compiled application.
+        - `workers`: max number of threads running the actions that are not
+        coroutines, defaults to the ThreadPoolExecutor default.
+        - `sock`: a listening socket, e.g. inherited from the process this
+        one replaces, used instead of binding `server_address`.
+        """
+
+        self._app = app
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='pyterrier')
+
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(server_address)
+            sock.listen(self.request_queue_size)
+
+        self.socket = sock
+        self.server_address = self.socket.getsockname()
+        self.connections = ConnectionTracker()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._shutdown_request = False
+        self._drain_timeout: Optional[float] = None
+        self._is_shut_down = threading.Event()
+        self._is_shut_down.set()
+
+    def serve_forever(self, poll_interval: Optional[float]=None) -> None:
+        """
+        Run the event loop until `shutdown` is called. `poll_interval` is
+        only accepted for compatibility with the socketserver servers.
+        """
+
+        self._is_shut_down.clear()
+
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self._is_shut_down.set()
+
+    def shutdown(self, drain_timeout: Optional[float]=None) -> None:
+        """
+        Stop the serve_forever loop and wait until it exits. It must be
+        called from another thread, otherwise it will deadlock. With
+        `drain_timeout`, the loop first closes the idle connections and
+        waits up to this number of seconds for the requests in flight.
+        """
+
+        self._drain_timeout = drain_timeout
+        self._shutdown_request = True
+
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._stop.set)
+            except RuntimeError:
+                # The event loop has already been closed.
+                pass
+
+        self._is_shut_down.wait()
+
+    def server_close(self) -> None:
+        """ Close the listening socket and the executor. """
+
+        self.socket.close()
+        self._executor.shutdown(wait=False)
+
+    async def _serve(self) -> None:
+        self._stop = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+
+        if self._shutdown_request:
+            return
+
+        server = await asyncio.start_server(self._handle_connection,
+                                            sock=self.socket)
+
+        try:
+            await self._stop.wait()
+        finally:
+            server.close()
+
+        if self._drain_timeout is not None:
+            # The tracker waits on a lock, the requests in flight keep
+            # running in the loop meanwhile.
+            await self._loop.run_in_executor(None,
+                                             self.connections.drain,
+                                             self._drain_timeout)
+
+    async def _handle_connection(self,
+                                 reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        # asyncio only disables Nagle on sockets created with IPPROTO_TCP,
+        # not on the ones accepted from the server's socket. Headers and
+        # body are written separately, without TCP_NODELAY the second write
+        # waits for the client's delayed ACK.
+        sock = writer.get_extra_info('socket')
+
+        if sock is not None and sock.family in (socket.AF_INET,
+                                                socket.AF_INET6):
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError:
+                pass
+
+        handler = AsyncHttpRequestHandler(self._app,
+                                          reader,
+                                          writer,
+                                          self._executor,
+                                          self.connections)
+        await handler.handle()
@@ -0,0 +1,151 @@
+import socket
+import threading
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+
+
+# Seconds the unread request data is discarded for before closing.
+LINGER_TIMEOUT = 1.0
+
+
+class ConnectionTracker:
+    """
+    The open connections of a server, each one is either idle, waiting for
+    its next request, or busy handling a request.
+
+    The handlers report every change, so the server can be drained: the
+    idle connections are closed right away and the busy ones once their
+    response has been sent.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._idle: Dict[Any, Callable[[], None]] = {}
+        self._busy: Dict[Any, Callable[[], None]] = {}
+        self._draining = False
+
+    @property
+    def draining(self) -> bool:
+        return self._draining
+
+    @property
+    def busy(self) -> int:
+        """ Number of connections handling a request. """
+
+        return len(self._busy)
+
+    @property
+    def idle(self) -> int:
+        """ Number of connections waiting for a request. """
+
+        return len(self._idle)
+
+    def set_busy(self, key: Any, close: Callable[[], None]) -> bool:
+        """
+        Mark the connection as handling a request. Returns False when the
+        server is draining, the connection must then be closed after the
+        response.
+
+        :Parameters:
+        - `key`: identifies the connection, e.g. its handler.
+        - `close`: closes the connection, it is called from another thread
+        when the connection is still open at the drain deadline.
+        """
+
+        with self._lock:
+            self._idle.pop(key, None)
+            self._busy[key] = close
+
+            return not self._draining
+
+    def set_idle(self, key: Any, close: Callable[[], None]) -> bool:
+        """
+        Mark the connection as waiting for its next request. Returns False
+        when the server is draining, the connection must then be closed
+        instead of reading another request.
+        """
+
+        with self._lock:
+            self._busy.pop(key, None)
+
+            if self._draining:
+                self._changed.notify_all()
+                return False
+
+            self._idle[key] = close
+
+            return True
+
+    def remove(self, key: Any) -> None:
+        """ Forget a closed connection. """
+
+        with self._lock:
+            self._idle.pop(key, None)
+            self._busy.pop(key, None)
+            self._changed.notify_all()
+
+    def drain(self, timeout: float) -> int:
+        """
+        Close the idle connections and wait up to `timeout` seconds for the
+        busy ones to finish their request, the connections still busy then
+        are closed. Returns the number of connections closed in the middle
+        of a request.
+        """
+
+        with self._lock:
+            self._draining = True
+            idle = list(self._idle.values())
+            self._idle.clear()
+
+        for close in idle:
+            close()
+
+        deadline = time.monotonic() + timeout
+
+        with self._lock:
+            while self._busy:
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    break
+
+                self._changed.wait(remaining)
+
+            busy = list(self._busy.values())
+
+        for close in busy:
+            close()
+
+        return len(busy)
+
+
+def lingering_close(sock: socket.socket,
+                    timeout: float=LINGER_TIMEOUT) -> None:
+    """
+    Close a connection whose request was not read in full. Closing a socket
+    with unread data resets the connection, and the client may lose the
+    response. The write side is shut down first, then the data the client
+    still sends is discarded until it closes or `timeout` seconds pass.
+    """
+
+    try:
+        sock.shutdown(socket.SHUT_WR)
+        deadline = time.monotonic() + timeout
+
+        while True:
+            remaining = deadline - time.monotonic()
+
+            if remaining <= 0:
+                break
+
+            sock.settimeout(remaining)
+
+            if not sock.recv(65536):
+                break
+    except OSError:
+        pass
+    finally:
+        sock.close()
@@ -0,0 +1,84 @@
+import threading
+import traceback
+from typing import Callable
+from typing import List
+from typing import Optional
+
+from .route_discovery import RouteDiscovery
+
+
+class ControllerWatcher:
+    """
+    Polls the controllers folder and calls `on_change` with the file names
+    of the controllers added, modified or removed since the last check.
+
+    The controllers are compared by modification time and size, checking
+    them costs a `stat` call per controller.
+    """
+
+    def __init__(self,
+                 discovery: RouteDiscovery,
+                 on_change: Callable[[List[str]], None],
+                 interval: Optional[float]=1.0) -> None:
+        """
+        Create a new watcher, the controllers are compared with their state
+        when it is created.
+
+        :Parameters:
+        - `discovery`: the route discovery that registered the controllers.
+        - `on_change`: called with the names of the changed controllers.
+        - `interval`: seconds between two checks.
+        """
+
+        if interval <= 0:
+            raise ValueError('The argument `interval` must be positive.')
+
+        self._discovery = discovery
+        self._on_change = on_change
+        self._interval = interval
+        self._sources = discovery.sources()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> List[str]:
+        """
+        Compare the controllers with the last check and call `on_change`
+        if some have changed. Returns the changed file names.
+        """
+
+        sources = self._discovery.sources()
+        changed = sorted(filename
+                         for filename in set(sources) | set(self._sources)
+                         if sources.get(filename) !=
+                         self._sources.get(filename))
+        self._sources = sources
+
+        if changed:
+            self._on_change(changed)
+
+        return changed
+
+    def start(self) -> None:
+        """ Check the controllers every `interval` seconds in a thread. """
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='pyterrier-reloader',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.check()
+            except Exception:
+                # The watcher keeps running, the error is reported and the
+                # controller is checked again after its next change.
+                traceback.print_exc()
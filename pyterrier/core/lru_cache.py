@@ -0,0 +1,192 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any
+from typing import Callable
+from typing import Hashable
+from typing import Optional
+from typing import Set
+
+
+class _Counters:
+    """ The hits and misses counted by a thread. """
+
+    __slots__ = ('hits', 'misses')
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+
+class _ThreadExit:
+    """ Stored in a thread local, collected when the thread exits. """
+
+
+class LruCache:
+    """
+    Bounded LRU cache whose entries are tagged with a generation, the base
+    of the route and response caches.
+
+    A value is computed after reading `generation` and stored with `put`,
+    which drops it if the cache has been invalidated in between, so a value
+    computed from stale data is never cached.
+
+    ..Note:: Lookups do not take any lock, only inserts and invalidation
+    do. The hit and miss counters are kept per thread for the same reason,
+    the counters of a thread are added to the totals when it exits.
+    """
+
+    def __init__(self, maxsize: Optional[int]=1024) -> None:
+        """
+        Create a new cache.
+
+        :Parameters:
+        - `maxsize`: max number of entries kept in the cache, when it is
+        full the least recently used entry is evicted.
+        """
+
+        if not isinstance(maxsize, int) or maxsize <= 0:
+            raise ValueError('The argument `maxsize` must be a positive int.')
+
+        self._maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self._local = threading.local()
+        self._threads: Set[_Counters] = set()
+        self._hits = 0
+        self._misses = 0
+        # Reentrant, the counters of an exiting thread can be added up by
+        # the garbage collector while the lock is held.
+        self._counters_lock = threading.RLock()
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @property
+    def generation(self) -> int:
+        """
+        Changes every time the cache is invalidated. Read it before computing
+        a value and pass it to `put`, so a value computed before the
+        invalidation is discarded.
+        """
+
+        return self._generation
+
+    @property
+    def hits(self) -> int:
+        with self._counters_lock:
+            return self._hits + sum(counters.hits
+                                    for counters in list(self._threads))
+
+    @property
+    def misses(self) -> int:
+        with self._counters_lock:
+            return self._misses + sum(counters.misses
+                                      for counters in list(self._threads))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value for `key` or None if it is not in the cache
+        or it has expired.
+        """
+
+        entries = self._entries
+
+        try:
+            value = entries[key]
+        except KeyError:
+            self._counters().misses += 1
+            return None
+
+        if self._expired(value):
+            with self._lock:
+                if entries.get(key) is value:
+                    del entries[key]
+
+            self._counters().misses += 1
+            return None
+
+        try:
+            entries.move_to_end(key)
+        except KeyError:
+            # Evicted by another thread in the meantime.
+            pass
+
+        self._counters().hits += 1
+
+        return value
+
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        """
+        Add a new entry to the cache evicting the least recently used entries
+        if the cache is full.
+
+        :Parameters:
+        - `key`: the cache key.
+        - `value`: the value to cache.
+        - `generation`: the cache generation read before the value was
+        computed.
+        """
+
+        with self._lock:
+            if generation != self._generation:
+                return
+
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """ Remove all the entries from the cache. """
+
+        with self._lock:
+            self._generation += 1
+            self._entries = OrderedDict()
+
+    def _invalidate_keys(self, match: Callable[[Hashable], bool]) -> None:
+        """ Remove the entries whose key matches from the cache. """
+
+        with self._lock:
+            self._generation += 1
+
+            # Lookups move entries without the lock, copy the keys at once
+            # instead of iterating over the entries.
+            for key in list(self._entries):
+                if match(key):
+                    self._entries.pop(key, None)
+
+    def _expired(self, value: Any) -> bool:
+        """ Whether a cached value must not be served anymore. """
+
+        return False
+
+    def _counters(self) -> _Counters:
+        try:
+            return self._local.counters
+        except AttributeError:
+            pass
+
+        counters = self._local.counters = _Counters()
+        self._local.exit = _ThreadExit()
+        weakref.finalize(self._local.exit, self._add_up, counters)
+
+        with self._counters_lock:
+            self._threads.add(counters)
+
+        return counters
+
+    def _add_up(self, counters: _Counters) -> None:
+        """ Add the counters of a thread that exited to the totals. """
+
+        with self._counters_lock:
+            self._threads.discard(counters)
+            self._hits += counters.hits
+            self._misses += counters.misses
@@ -0,0 +1,266 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+
+# The Prometheus client's default buckets, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Shard:
+    """ The counters of a route updated by a single thread. """
+
+    __slots__ = ('statuses', 'buckets', 'total', 'in_flight')
+
+    def __init__(self, buckets: int) -> None:
+        self.statuses: Dict[int, int] = {}
+        self.buckets = [0] * (buckets + 1)
+        self.total = 0.0
+        self.in_flight = 0
+
+
+class RouteMetrics:
+    """
+    Request counts by status, in flight requests and latency histogram of
+    a route and HTTP verb.
+
+    Every thread updates its own counters, so recording a request takes no
+    lock, the counters of all the threads are added up when they are read.
+    `start` and `finish` must be called by the same thread.
+    """
+
+    __slots__ = ('_route', '_verb', '_bounds', '_shards', '_lock')
+
+    def __init__(self, route: str, verb: str, bounds: Tuple[float, ...]):
+        self._route = route
+        self._verb = verb
+        self._bounds = bounds
+        self._shards: Dict[int, _Shard] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def route(self) -> str:
+        return self._route
+
+    @property
+    def verb(self) -> str:
+        return self._verb
+
+    def start(self) -> float:
+        """ Record a request has started, returns its start time. """
+
+        self._shard().in_flight += 1
+
+        return time.perf_counter()
+
+    def finish(self, start: float, status: int) -> None:
+        """ Record a request started at `start` has finished. """
+
+        elapsed = time.perf_counter() - start
+        shard = self._shard()
+
+        shard.in_flight -= 1
+        shard.statuses[status] = shard.statuses.get(status, 0) + 1
+        shard.buckets[bisect_left(self._bounds, elapsed)] += 1
+        shard.total += elapsed
+
+    def snapshot(self) -> Tuple[Dict[int, int], List[int], float, int]:
+        """
+        Returns the counts by status, the count of each histogram bucket,
+        not cumulative, the sum of the latencies and the in flight requests.
+        """
+
+        statuses: Dict[int, int] = {}
+        buckets = [0] * (len(self._bounds) + 1)
+        total = 0.0
+        in_flight = 0
+
+        for shard in list(self._shards.values()):
+            for status, count in shard.statuses.copy().items():
+                statuses[status] = statuses.get(status, 0) + count
+
+            for i, count in enumerate(shard.buckets):
+                buckets[i] += count
+
+            total += shard.total
+            in_flight += shard.in_flight
+
+        return statuses, buckets, total, in_flight
+
+    def _shard(self) -> _Shard:
+        # Thread ids are reused, so there are never more shards than
+        # threads running at the same time.
+        ident = threading.get_ident()
+
+        try:
+            return self._shards[ident]
+        except KeyError:
+            with self._lock:
+                shard = self._shards[ident] = _Shard(len(self._bounds))
+
+            return shard
+
+
+class Metrics:
+    """
+    The request metrics of every route of the compiled application, by
+    route template, e.g. `/user/{id:int}`, not by request path.
+    """
+
+    def __init__(self,
+                 route_table: Mapping[str, Iterable[Tuple[str, Callable]]],
+                 buckets: Optional[Iterable[float]]=DEFAULT_BUCKETS,
+                 previous: Optional['Metrics']=None) -> None:
+        """
+        Create the metrics of the routes.
+
+        :Parameters:
+        - `route_table`: the compiled route table.
+        - `buckets`: upper bounds, in seconds, of the latency histogram
+        buckets.
+        - `previous`: the metrics of a previous route table, the counters of
+        the actions registered with the same route are kept.
+        """
+
+        bounds = tuple(sorted(buckets))
+
+        if not bounds:
+            raise ValueError('The argument `buckets` must not be empty.')
+
+        self._bounds = bounds
+        self._routes: List[RouteMetrics] = []
+        self._actions: Dict[Tuple[str, Callable], RouteMetrics] = {}
+
+        # The values registered with `register`, read when rendering.
+        self._values: List[Tuple[str, str, str, Callable[[], float]]] = (
+            list(previous._values) if previous is not None else [])
+
+        for verb, routes in route_table.items():
+            for route, action in routes:
+                key = (verb, action)
+
+                # An action registered twice for the same verb is reported
+                # under its first route.
+                if key not in self._actions:
+                    metrics = (previous._reuse(key, route, bounds)
+                               if previous is not None else None)
+                    metrics = metrics or RouteMetrics(route, verb, bounds)
+                    self._routes.append(metrics)
+                    self._actions[key] = metrics
+
+    @property
+    def buckets(self) -> Tuple[float, ...]:
+        return self._bounds
+
+    @property
+    def routes(self) -> List[RouteMetrics]:
+        return list(self._routes)
+
+    def for_action(self, verb: str, action: Callable) -> RouteMetrics:
+        """ Returns the metrics of the route resolved to the action. """
+
+        return self._actions[(verb, action)]
+
+    def register(self,
+                 name: str,
+                 kind: str,
+                 description: str,
+                 read: Callable[[], float]) -> None:
+        """
+        Add a value that is not recorded by route, e.g. a server gauge, it is
+        kept by the metrics built from these ones when the routes change.
+
+        :Parameters:
+        - `name`: the metric name, e.g. `pyterrier_pool_queue_depth`.
+        - `kind`: `gauge` or `counter`.
+        - `description`: the metric help text.
+        - `read`: returns the current value, called on every render.
+        """
+
+        if kind not in ('gauge', 'counter'):
+            raise ValueError('The argument `kind` must be `gauge` or '
+                             '`counter`.')
+
+        self._values.append((name, kind, description, read))
+
+    def _reuse(self,
+               key: Tuple[str, Callable],
+               route: str,
+               bounds: Tuple[float, ...]) -> Optional[RouteMetrics]:
+        metrics = self._actions.get(key)
+
+        if (metrics is None or metrics.route != route or
+                self._bounds != bounds):
+            return None
+
+        return metrics
+
+    def render(self) -> str:
+        """ Returns the metrics in the Prometheus text format. """
+
+        requests = ['# HELP pyterrier_requests_total Requests handled by '
+                    'route, method and status.',
+                    '# TYPE pyterrier_requests_total counter']
+        in_flight = ['# HELP pyterrier_requests_in_flight Requests being '
+                     'handled by route and method.',
+                     '# TYPE pyterrier_requests_in_flight gauge']
+        latency = ['# HELP pyterrier_request_duration_seconds Request '
+                   'latency by route and method.',
+                   '# TYPE pyterrier_request_duration_seconds histogram']
+
+        bounds = [_format_float(bound) for bound in self._bounds] + ['+Inf']
+
+        for metrics in self._routes:
+            statuses, buckets, total, current = metrics.snapshot()
+            labels = (f'route="{_escape(metrics.route)}",'
+                      f'method="{metrics.verb}"')
+
+            for status, count in sorted(statuses.items()):
+                requests.append(f'pyterrier_requests_total{{{labels},'
+                                f'status="{status}"}} {count}')
+
+            in_flight.append(f'pyterrier_requests_in_flight{{{labels}}} '
+                             f'{current}')
+
+            cumulative = 0
+
+            for bound, count in zip(bounds, buckets):
+                cumulative += count
+                latency.append(f'pyterrier_request_duration_seconds_bucket'
+                               f'{{{labels},le="{bound}"}} {cumulative}')
+
+            latency.append(f'pyterrier_request_duration_seconds_sum'
+                           f'{{{labels}}} {_format_float(total)}')
+            latency.append(f'pyterrier_request_duration_seconds_count'
+                           f'{{{labels}}} {cumulative}')
+
+        values = []
+
+        for name, kind, description, read in self._values:
+            values.append(f'# HELP {name} {description}')
+            values.append(f'# TYPE {name} {kind}')
+            value = read()
+            values.append(f'{name} {value}' if isinstance(value, int) else
+                          f'{name} {_format_float(value)}')
+
+        return '\n'.join(requests + in_flight + latency + values) + '\n'
+
+
+def _escape(value: str) -> str:
+    return (value.replace('\\', '\\\\')
+            .replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
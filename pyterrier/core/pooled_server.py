@@ -0,0 +1,258 @@
+import queue
+import socket
+import threading
+import time
+from http import HTTPStatus
+from http.server import HTTPServer
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from .connections import LINGER_TIMEOUT
+from .connections import ConnectionTracker
+from .metrics import Metrics
+from .threaded_server import use_socket
+
+
+class PooledServer(HTTPServer):
+    """
+    HTTP server handling the connections with a fixed number of worker
+    threads.
+
+    Accepted connections wait in a bounded queue for a free worker, when the
+    queue is full the connection is answered right away with a
+    503 Service Unavailable instead of starting more threads. While
+    connections are queued, the workers close their idle keep-alive
+    connections to pick them up, see `reclaim_idle`.
+    """
+
+    request_queue_size = 1024
+
+    # Max number of rejected connections closed lingering at once, past
+    # this they are closed right away.
+    max_lingering = 256
+
+    def __init__(self,
+                 server_address: Tuple[str, int],
+                 handler: Callable,
+                 workers: int,
+                 queue_size: int,
+                 sock: Optional[socket.socket]=None) -> None:
+        """
+        Create a new server, the worker threads are started by
+        `serve_forever`.
+
+        :Parameters:
+        - `server_address`: a (hostname, port) tuple.
+        - `handler`: the request handler factory.
+        - `workers`: the number of worker threads.
+        - `queue_size`: max number of accepted connections waiting for a
+        free worker.
+        - `sock`: a listening socket, e.g. inherited from the process this
+        one replaces, used instead of binding `server_address`.
+        """
+
+        if workers <= 0 or queue_size <= 0:
+            raise ValueError('The arguments `workers` and `queue_size` must '
+                             'be positive.')
+
+        HTTPServer.__init__(self, server_address, handler,
+                            bind_and_activate=sock is None)
+
+        if sock is not None:
+            use_socket(self, sock)
+
+        self.connections = ConnectionTracker()
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._active_workers = 0
+        self._rejected = 0
+
+        self._size = workers
+        self._workers: List[threading.Thread] = []
+
+        # Rejected connections with their deadline, their request is read
+        # and discarded by the serve_forever loop until the client closes.
+        self._lingering: List[Tuple[float, socket.socket]] = []
+
+    @property
+    def workers(self) -> int:
+        return self._size
+
+    @property
+    def queue_depth(self) -> int:
+        """ Number of connections waiting for a free worker. """
+
+        return self._queue.qsize()
+
+    @property
+    def active_workers(self) -> int:
+        """ Number of workers currently handling a connection. """
+
+        return self._active_workers
+
+    @property
+    def rejected(self) -> int:
+        """ Number of connections rejected because the queue was full. """
+
+        return self._rejected
+
+    def register_metrics(self, metrics: Metrics) -> None:
+        """ Report the pool gauges with the request metrics. """
+
+        metrics.register('pyterrier_pool_queue_depth', 'gauge',
+                         'Connections waiting for a free worker.',
+                         lambda: self.queue_depth)
+        metrics.register('pyterrier_pool_active_workers', 'gauge',
+                         'Workers handling a connection.',
+                         lambda: self.active_workers)
+        metrics.register('pyterrier_pool_rejected_total', 'counter',
+                         'Connections rejected because the queue was full.',
+                         lambda: self.rejected)
+
+    def reclaim_idle(self) -> bool:
+        """
+        Whether the workers should close their idle keep-alive connections,
+        True while connections are waiting for a free worker.
+        """
+
+        return not self._queue.empty()
+
+    def serve_forever(self, poll_interval: float=0.5) -> None:
+        """
+        Start the workers and handle the connections until `shutdown` is
+        called. The threads are only started here so the server can be
+        created before forking worker processes.
+        """
+
+        for number in range(self._size - len(self._workers)):
+            worker = threading.Thread(target=self._work,
+                                      name=f'pyterrier-worker-{number}',
+                                      daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+        HTTPServer.serve_forever(self, poll_interval)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        """ Queue the connection to be handled by a worker. """
+
+        try:
+            self._queue.put_nowait((request, client_address))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+
+            self._reject(request)
+
+    def service_actions(self) -> None:
+        """
+        Called by the serve_forever loop, discard the data sent on the
+        rejected connections and close them once the client has closed or
+        their deadline has passed.
+        """
+
+        if not self._lingering:
+            return
+
+        now = time.monotonic()
+        lingering = []
+
+        for deadline, request in self._lingering:
+            try:
+                while request.recv(65536):
+                    pass
+            except BlockingIOError:
+                if now < deadline:
+                    lingering.append((deadline, request))
+                    continue
+            except OSError:
+                pass
+
+            request.close()
+
+        self._lingering = lingering
+
+    def shutdown(self, drain_timeout: Optional[float]=None) -> None:
+        """
+        Stop the serve_forever loop and wait until it exits. With
+        `drain_timeout`, also close the idle connections and wait up to this
+        number of seconds for the requests in flight. The connections
+        waiting for a worker get their first request answered.
+        """
+
+        HTTPServer.shutdown(self)
+
+        if drain_timeout is not None:
+            self.connections.drain(drain_timeout)
+
+    def server_close(self) -> None:
+        """ Close the listening socket and stop the workers. """
+
+        HTTPServer.server_close(self)
+
+        for _, request in self._lingering:
+            request.close()
+
+        self._lingering = []
+
+        for _ in self._workers:
+            self._queue.put(None)
+
+        for worker in self._workers:
+            worker.join()
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+
+            if item is None:
+                break
+
+            request, client_address = item
+
+            with self._lock:
+                self._active_workers += 1
+
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+                with self._lock:
+                    self._active_workers -= 1
+
+    def _reject(self, request: Any) -> None:
+        """
+        Answer with a 503 without blocking the serve_forever loop. Closing
+        the socket with the request unread would reset the connection and
+        the client could miss the response, so it is closed lingering.
+        """
+
+        status = HTTPStatus.SERVICE_UNAVAILABLE
+        body = status.phrase.encode()
+
+        response = (f'HTTP/1.0 {status.value} {status.phrase}\r\n'
+                    'Content-type: text/html\r\n'
+                    f'Content-Length: {len(body)}\r\n'
+                    'Retry-After: 1\r\n'
+                    'Connection: close\r\n\r\n').encode() + body
+
+        try:
+            request.setblocking(False)
+            request.send(response)
+            request.shutdown(socket.SHUT_WR)
+        except OSError:
+            request.close()
+            return
+
+        if len(self._lingering) >= self.max_lingering:
+            request.close()
+            return
+
+        self._lingering.append((time.monotonic() + LINGER_TIMEOUT, request))
@@ -0,0 +1,171 @@
+import functools
+import gc
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+from .action_loop import action_loop
+from .reexec import REPLACE_SIGNALS
+
+
+class PreforkSupervisor:
+    """
+    Run a server in multiple worker processes.
+
+    The server, and with it the listening socket and the compiled
+    application, is created once in the supervisor process and the workers
+    are forked from it, so they share the routes copy-on-write and the
+    kernel distributes the connections between them. Crashed workers are
+    restarted and SIGTERM/SIGINT are forwarded to the workers for a
+    graceful shutdown.
+
+    ..Note:: Only available on platforms that support `os.fork`.
+    """
+
+    # Wait before restarting workers that crash right after being started.
+    restart_delay = 1
+
+    def __init__(self,
+                 server: Any,
+                 processes: int,
+                 drain_timeout: Optional[float]=None) -> None:
+        """
+        Create a new supervisor.
+
+        :Parameters:
+        - `server`: the server, already bound to the listening socket.
+        - `processes`: the number of worker processes.
+        - `drain_timeout`: on SIGTERM the workers close their idle
+        connections and wait up to this number of seconds for the requests
+        in flight, see the server's `shutdown`.
+        """
+
+        if not hasattr(os, 'fork'):
+            raise RuntimeError('Multiple processes are not supported on '
+                               'this platform.')
+
+        if processes <= 0:
+            raise ValueError('The argument `processes` must be positive.')
+
+        self._server = server
+        self._processes = processes
+        self._drain_timeout = drain_timeout
+        self._children: Dict[int, float] = {}
+        self._stopping = False
+
+    @property
+    def server(self) -> Any:
+        return self._server
+
+    @property
+    def socket(self) -> Any:
+        """ The listening socket shared by the workers. """
+
+        return self._server.socket
+
+    @property
+    def children(self):
+        """ The pids of the running worker processes. """
+
+        return list(self._children)
+
+    def serve_forever(self) -> None:
+        """
+        Fork the workers and supervise them until the supervisor receives
+        SIGTERM or SIGINT and all the workers have exited.
+        """
+
+        self._install_signal_handlers(self._stop)
+
+        # Objects created so far are never collected in the workers, so the
+        # garbage collector does not touch, and copy, the shared pages.
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
+        for _ in range(self._processes):
+            self._spawn()
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+
+            started = self._children.pop(pid, None)
+
+            if started is None or self._stopping:
+                continue
+
+            print(f'Worker {pid} exited with status {status}, restarting.',
+                  file=sys.stderr)
+
+            if time.monotonic() - started < self.restart_delay:
+                time.sleep(self.restart_delay)
+
+            if not self._stopping:
+                self._spawn()
+
+    def shutdown(self, drain_timeout: Optional[float]=None) -> None:
+        """
+        Ask all the workers to finish. They drain their connections for the
+        `drain_timeout` the supervisor was created with, the argument is
+        only accepted for compatibility with the servers.
+        """
+
+        self._stop(signal.SIGTERM, None)
+
+    def server_close(self) -> None:
+        self._server.server_close()
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+
+        if pid:
+            self._children[pid] = time.monotonic()
+            return
+
+        status = 0
+
+        try:
+            self._install_signal_handlers(self._stop_worker)
+
+            # Only the supervisor replaces itself.
+            for signum in REPLACE_SIGNALS:
+                signal.signal(signum, signal.SIG_IGN)
+
+            self._server.serve_forever()
+            self._server.server_close()
+            action_loop.stop()
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def _stop(self, signum: int, frame: Any) -> None:
+        self._stopping = True
+
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _stop_worker(self, signum: int, frame: Any) -> None:
+        # shutdown() waits for serve_forever to return, it cannot be called
+        # from the thread running it.
+        threading.Thread(target=functools.partial(self._server.shutdown,
+                                                  self._drain_timeout),
+                         daemon=True).start()
+
+    def _install_signal_handlers(self, handler: Any) -> None:
+        signal.signal(signal.SIGTERM, handler)
+        signal.signal(signal.SIGINT, handler)
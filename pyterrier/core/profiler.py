@@ -0,0 +1,199 @@
+import cProfile
+import hmac
+import itertools
+import os
+import pstats
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+
+DEFAULT_HEADER = 'X-PyTerrier-Profile'
+
+# Stacks deeper than this are cut in the collapsed stacks export.
+_MAX_DEPTH = 128
+
+_UNSAFE_CHARS = re.compile(r'[^\w.-]+')
+
+
+class ProfileSession:
+    """
+    The profile of a single request, the functions passed to `run` are
+    profiled with cProfile until `save` is called.
+    """
+
+    __slots__ = ('_profiler', '_path', '_profile')
+
+    def __init__(self, profiler: 'Profiler', path: str) -> None:
+        self._profiler = profiler
+        self._path = path
+        self._profile = cProfile.Profile()
+
+    @property
+    def path(self) -> str:
+        """ The file the stats are written to. """
+
+        return self._path
+
+    def run(self, func: Callable, *args: Any) -> Any:
+        self._profile.enable()
+
+        try:
+            return func(*args)
+        finally:
+            self._profile.disable()
+
+    def save(self) -> None:
+        """ Write the stats and let the profiler sample other requests. """
+
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            self._profile.dump_stats(self._path)
+        finally:
+            self._profiler._release()
+
+
+class Profiler:
+    """
+    Profiles a sample of the requests with cProfile.
+
+    One every `every` requests is profiled, as well as the requests with
+    the `header` header set to `secret`. The stats of each profiled request
+    are written to a `.pstats` file in a folder per route in `directory`.
+
+    ..Note:: A single request is profiled at a time, requests sampled while
+    another request is profiled are not profiled. Requests that are not
+    sampled only pay for a counter increment.
+    """
+
+    def __init__(self,
+                 directory: str,
+                 every: Optional[int]=None,
+                 secret: Optional[str]=None,
+                 header: Optional[str]=DEFAULT_HEADER) -> None:
+        """
+        Create a new profiler.
+
+        :Parameters:
+        - `directory`: the folder the `.pstats` files are written to.
+        - `every`: profile one every this number of requests.
+        - `secret`: profile the requests sending this value in `header`.
+        - `header`: the request header with the secret.
+        """
+
+        if every is None and secret is None:
+            raise ValueError('Either `every` or `secret` must be set.')
+
+        if every is not None and every <= 0:
+            raise ValueError('The argument `every` must be positive.')
+
+        self._directory = directory
+        self._every = every
+        self._secret = secret.encode() if secret is not None else None
+        self._header = header
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def start(self,
+              headers: Mapping[str, str],
+              verb: str,
+              route: str) -> Optional[ProfileSession]:
+        """
+        Returns the session profiling the request if it is sampled,
+        otherwise None. The session must be saved.
+        """
+
+        every = self._every
+        sampled = every is not None and next(self._counter) % every == 0
+
+        if not sampled and self._secret is not None:
+            value = headers.get(self._header)
+            sampled = value is not None and hmac.compare_digest(
+                value.encode(), self._secret)
+
+        if not sampled or not self._lock.acquire(blocking=False):
+            return None
+
+        folder = f'{verb}_{_UNSAFE_CHARS.sub("_", route).strip("_")}'
+        timestamp = time.strftime('%Y%m%d-%H%M%S')
+        name = f'{timestamp}-{time.time_ns() % 10**9:09d}-{os.getpid()}'
+
+        return ProfileSession(
+            self, os.path.join(self._directory, folder, f'{name}.pstats'))
+
+    def _release(self) -> None:
+        self._lock.release()
+
+
+def collapsed_stacks(stats: pstats.Stats) -> List[str]:
+    """
+    Convert profile stats to the collapsed stacks format of flame graph
+    tools, a `frame;frame;frame microseconds` line per stack.
+
+    cProfile only records the callers of each function, not whole stacks,
+    so the time of a function called from several places is split among
+    its callers in proportion to the time spent in each call.
+    """
+
+    entries = stats.stats  # type: ignore
+    callees: Dict[Tuple, List[Tuple[Tuple, float, float]]] = defaultdict(list)
+
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, (_, _, own_time, total_time) in callers.items():
+            callees[caller].append((func, own_time, total_time))
+
+    totals: Dict[Tuple[str, ...], float] = defaultdict(float)
+
+    def walk(func: Tuple,
+             stack: Tuple[str, ...],
+             funcs: Tuple[Tuple, ...],
+             own_time: float,
+             total_time: float) -> None:
+        stack = stack + (_frame_name(func),)
+        funcs = funcs + (func,)
+        totals[stack] += own_time
+
+        func_total = entries[func][3]
+
+        if len(stack) >= _MAX_DEPTH or not func_total:
+            return
+
+        scale = min(total_time / func_total, 1.0)
+
+        for callee, callee_own, callee_total in callees.get(func, ()):
+            if callee not in funcs and callee_total * scale > 1e-7:
+                walk(callee, stack, funcs, callee_own * scale,
+                     callee_total * scale)
+
+    # The functions profiled from the start, or only called recursively.
+    for func, (_, _, own_time, total_time, callers) in entries.items():
+        if not set(callers) - {func}:
+            walk(func, (), (), own_time, total_time)
+
+    return [f'{";".join(stack)} {round(seconds * 1e6)}'
+            for stack, seconds in totals.items()
+            if round(seconds * 1e6) > 0]
+
+
+def _frame_name(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+
+    if filename == '~':
+        # Built-in functions.
+        frame = name
+    else:
+        frame = f'{name} ({os.path.basename(filename)}:{line})'
+
+    return frame.replace(';', ',')
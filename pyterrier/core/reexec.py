@@ -0,0 +1,110 @@
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+from typing import List
+from typing import Optional
+
+
+# Environment variables with the file descriptors passed to the new process.
+LISTEN_FD = 'PYTERRIER_LISTEN_FD'
+READY_FD = 'PYTERRIER_READY_FD'
+
+# Seconds the new process gets to start accepting connections.
+READY_TIMEOUT = 60
+
+# Signals asking the server to replace itself with a new process.
+REPLACE_SIGNALS = tuple(getattr(signal, name) for name in ('SIGHUP', 'SIGUSR2')
+                        if hasattr(signal, name))
+
+
+def inherited_socket() -> Optional[socket.socket]:
+    """
+    Returns the listening socket inherited from the process this one
+    replaces, None if the process was not started by `spawn_replacement`.
+    """
+
+    fd = os.environ.pop(LISTEN_FD, None)
+
+    if fd is None:
+        return None
+
+    sock = socket.socket(fileno=int(fd))
+    sock.set_inheritable(False)
+
+    return sock
+
+
+def notify_ready() -> None:
+    """
+    Tell the process this one replaces that it is accepting connections,
+    nothing happens if the process was not started by `spawn_replacement`.
+    """
+
+    fd = os.environ.pop(READY_FD, None)
+
+    if fd is None:
+        return
+
+    try:
+        os.write(int(fd), b'1')
+    except OSError:
+        pass
+    finally:
+        os.close(int(fd))
+
+
+def spawn_replacement(sock: socket.socket,
+                      timeout: Optional[float]=READY_TIMEOUT
+                      ) -> Optional[subprocess.Popen]:
+    """
+    Start a new process running the same command, accepting connections on
+    `sock`, and wait until it calls `notify_ready`. Returns the process, or
+    None if it exited or was not ready within `timeout` seconds, it is then
+    killed.
+
+    Both processes accept connections on the same socket until this one
+    stops, so no connection is refused in between.
+    """
+
+    read_fd, write_fd = os.pipe()
+
+    env = dict(os.environ)
+    env[LISTEN_FD] = str(sock.fileno())
+    env[READY_FD] = str(write_fd)
+
+    try:
+        process = subprocess.Popen(_command(),
+                                   env=env,
+                                   pass_fds=(sock.fileno(), write_fd))
+    except OSError:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+
+    try:
+        # The pipe is closed without a byte when the process exits first.
+        readable, _, _ = select.select([read_fd], [], [], timeout)
+        ready = bool(readable) and os.read(read_fd, 1) == b'1'
+    finally:
+        os.close(read_fd)
+
+    if not ready:
+        process.kill()
+        process.wait()
+        return None
+
+    return process
+
+
+def _command() -> List[str]:
+    # sys.orig_argv keeps the interpreter options, e.g. `-m module`.
+    argv = getattr(sys, 'orig_argv', None)
+
+    if argv:
+        return [sys.executable] + argv[1:]
+
+    return [sys.executable] + sys.argv
@@ -1,26 +1,141 @@
+from contextvars import ContextVar
 from http import cookies
 from urllib.parse import urlparse
 from urllib.parse import parse_qs
 
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+
+# Marks the properties that have not been computed yet.
+_UNSET: Any = object()
+
+# The request handled by the current thread or asyncio task.
+_current_request: ContextVar[Optional['Request']] = ContextVar(
+    'pyterrier_request', default=None)
+
+
+def current_request() -> Optional['Request']:
+    """
+    Returns the request being handled by the current thread or asyncio
+    task, or None outside of a request.
+    """
+
+    return _current_request.get()
+
+
+class ActionContext:
+    """
+    The `self` argument of the actions.
+
+    `request` is the request being handled by the current thread or task,
+    so an action can handle concurrent requests without locks, the other
+    attributes are the action function's.
+    """
+
+    __slots__ = ('_func',)
+
+    def __init__(self, func: Callable) -> None:
+        object.__setattr__(self, '_func', func)
+
+    @property
+    def request(self) -> Optional['Request']:
+        return _current_request.get()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._func, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._func, name, value)
+
 
 class Request:
     """
     Class representing a HTTP request.
+
+    Only the request line and headers are kept when the request is created,
+    the properties are computed the first time they are read and cached, so
+    the ones an action never reads cost nothing.
     """
 
-    def __init__(self, request):
-        self.path = urlparse(request.path).path
+    __slots__ = ('requestline', '_target', '_raw_headers', '_path',
+                 '_query', '_headers', '_params', '_cookies', '_method')
+
+    def __init__(self, request: Any) -> None:
         self.requestline = request.requestline
-        self.headers = {k: v for (k, v) in request.headers.items()}
-        self.params = self._parse_params(request)
-        self.cookies = cookies.SimpleCookie()
-        self.method = request.requestline.split(' ')[0]
-
-        try:
-            self.cookies.load(self.headers['Cookie'])
-        except KeyError:
-            self.cookies = None
-
-    def _parse_params(self, request):
-        query = urlparse(request.path).query
-        return parse_qs(query)
+        self._target = request.path
+        self._raw_headers = request.headers
+        self._path = _UNSET
+        self._query = _UNSET
+        self._headers = _UNSET
+        self._params = _UNSET
+        self._cookies = _UNSET
+        self._method = _UNSET
+
+    @property
+    def path(self) -> str:
+        """ The request path without the query string. """
+
+        if self._path is _UNSET:
+            self._parse_target()
+
+        return self._path
+
+    @property
+    def method(self) -> str:
+        if self._method is _UNSET:
+            self._method = self.requestline.split(' ')[0]
+
+        return self._method
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        if self._headers is _UNSET:
+            self._headers = {k: v for (k, v) in self._raw_headers.items()}
+
+        return self._headers
+
+    @property
+    def params(self) -> Dict[str, List[str]]:
+        """ The query string parameters. """
+
+        if self._params is _UNSET:
+            if self._query is _UNSET:
+                self._parse_target()
+
+            self._params = parse_qs(self._query)
+
+        return self._params
+
+    @property
+    def cookies(self) -> Optional[cookies.SimpleCookie]:
+        """ The request cookies, None if the request has no cookies. """
+
+        if self._cookies is _UNSET:
+            header = self._raw_headers.get('Cookie')
+
+            if header is None:
+                self._cookies = None
+            else:
+                self._cookies = cookies.SimpleCookie()
+                self._cookies.load(header)
+
+        return self._cookies
+
+    def _parse_target(self) -> None:
+        target = self._target
+
+        # Most request targets are plain paths, which urlparse returns as
+        # they are.
+        if (target[:1] == '/' and target[:2] != '//' and '?' not in target
+                and '#' not in target and ';' not in target):
+            self._path = target
+            self._query = ''
+            return
+
+        url = urlparse(target)
+        self._path = url.path
+        self._query = url.query
@@ -0,0 +1,11 @@
+from .lru_cache import LruCache
+
+
+class RouteCache(LruCache):
+    """
+    Bounded LRU cache for resolved request paths.
+
+    The RouteResolver stores the result of resolving a `(verb, path)` pair,
+    that is the action and the parameter values extracted from the URI, so
+    requests to the same URI skip the route lookup.
+    """
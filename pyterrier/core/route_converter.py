@@ -18,9 +18,9 @@ class RouteConverter():
 
         self._trailing_regex = r'/{0,1}$'
 
-    def convert(self, route: str) -> str:
+    def normalize(self, route: str) -> str:
         """
-        Convert the action URI to a regular expression.
+        Validate the action URI and make sure it starts with a slash.
 
         :Parameters:
         - `route`: the action URI
@@ -33,13 +33,40 @@ class RouteConverter():
             if not route.startswith('/'):
                 route = f'/{route}'
 
-            for key in self._rules:
-                (m, n) = self._rules[key]
-                route = m.sub(n, route)
-
-            return f'{route}{self._trailing_regex}'
+            return route
 
         except (TypeError, AttributeError):
             message = ('The argument `route` is not a `str` or it does'
                        'not contain any value.')
             raise TypeError(message)
+
+    def convert(self, route: str) -> str:
+        """
+        Convert the action URI to a regular expression.
+
+        :Parameters:
+        - `route`: the action URI
+        """
+
+        route = self._apply_rules(self.normalize(route))
+
+        return f'{route}{self._trailing_regex}'
+
+    def convert_segment(self, segment: str) -> str:
+        """
+        Convert a single segment of the action URI, e.g. `{id:int}`, to a
+        regular expression. Used by the RouteTree for segments containing
+        placeholders.
+
+        :Parameters:
+        - `segment`: a part of the action URI without any slashes.
+        """
+
+        return self._apply_rules(segment)
+
+    def _apply_rules(self, value: str) -> str:
+        for key in self._rules:
+            (m, n) = self._rules[key]
+            value = m.sub(n, value)
+
+        return value
@@ -1,5 +1,16 @@
+import importlib
+import importlib.util
+import inspect
+import json
 import os
 import re
+import sys
+import threading
+
+
+# Version of the route manifest format, manifests of other versions are
+# rebuilt.
+MANIFEST_VERSION = 1
 
 
 class RouteDiscovery:
@@ -10,6 +21,8 @@ class RouteDiscovery:
 
     def __init__(self):
         self._actions = []
+        self._controller_actions = {}
+        self._prefix = False
         self.controllers = []
         self._controller_folder = 'controllers'
         self._recontroller = re.compile(r'[\w\-]+(Controller)$')
@@ -18,18 +31,31 @@ class RouteDiscovery:
     def actions(self):
         """
         Returns a list of all registered routes.
-        The routes are tuples with 3 values (route:str, verb:str, action:func)
+        The routes are tuples (route, verb, func, additional_methods, cache)
         """
 
         return self._actions
 
-    def register_actions(self, prefix_routes):
+    @property
+    def controller_actions(self):
+        """
+        Returns the registered routes by controller module name, e.g.
+        `controllers.userController`.
+        """
+
+        return self._controller_actions
+
+    def register_actions(self, prefix_routes, manifest=None):
         """
         Register actions in the controller in the controller directory.
 
         :Parameters:
         - `prefix_routes`: Tell the framework to prefix the route with the
         name of the controller.
+        - `manifest`: path of the route manifest. When it is up to date the
+        routes are registered from it and each controller is imported on the
+        first request to one of its actions, otherwise the controllers are
+        imported and the manifest is written.
 
         .. Notes:: `controllers` are defined in the controllers directory in
         the application's root directory. For instance, if the application has
@@ -37,6 +63,41 @@ class RouteDiscovery:
         a action defined with the route /get/{id:int}, if `init_route` is
         called with the parameter `prefix_route` set to `True`, the action will
         be registered as /user/get/{id:int}
+
+        .. Note:: The manifest is rebuilt when a controller is added, removed
+        or modified, by its modification time and size. The changes to the
+        modules imported by the controllers are not detected.
+        """
+
+        self._prefix = prefix_routes
+
+        if manifest is not None:
+            sources = self.sources()
+            routes = self._read_manifest(manifest, prefix_routes, sources)
+
+            if routes is not None:
+                for entry, action in zip(routes, _lazy_actions(routes)):
+                    self._add_action(entry['module'], action)
+
+                return
+
+        routes = self._import_actions(prefix_routes)
+
+        if not routes:
+            print('Any controller has been registered.')
+            return
+
+        for action, module, _ in routes:
+            self._add_action(module, action)
+
+        if manifest is not None:
+            self._write_manifest(manifest, prefix_routes, sources, routes)
+
+    def _import_actions(self, prefix_routes):
+        """
+        Import the controllers and returns a (action, module, attribute)
+        tuple per action, `action` is the tuple returned by the http verbs
+        decorators.
         """
 
         modules = self._import_modules()
@@ -44,24 +105,76 @@ class RouteDiscovery:
         controllers = [getattr(modules, ctrl) for ctrl in dir(modules)
                        if re.match(self._recontroller, ctrl)]
 
-        if len(controllers) <= 0:
-            print('Any controller has been registered.')
-            return
+        routes = []
 
         for controller in controllers:
-            # First all dunder functions and properties are excluded
-            controller_functions = [getattr(controller, func)
-                                    for func in dir(controller)
-                                    if not func.startswith('__')]
+            routes.extend(self._controller_routes(controller, prefix_routes))
+
+        return routes
+
+    def reload_controller(self, filename):
+        """
+        Import a controller again, or for the first time if it is new, and
+        returns its actions. A controller that has been removed has no
+        actions.
+
+        :Parameters:
+        - `filename`: the controller file name, e.g. `userController.py`.
+        """
+
+        module_name = f'{self._controller_folder}.{filename[:-3]}'
+        path = os.path.join(self._controller_folder, filename)
+        removed = {id(action) for action in
+                   self._controller_actions.pop(module_name, [])}
+        self._actions = [action for action in self._actions
+                         if id(action) not in removed]
+
+        if not os.path.exists(path):
+            sys.modules.pop(module_name, None)
+            return []
 
-            # Get only tuples (actions defined in the controllers)
-            actions = [action for action in controller_functions
-                       if isinstance(action, tuple)]
+        # The cached bytecode is only checked against the source's mtime in
+        # seconds and size, so an edit made within a second of the previous
+        # import could load the old code.
+        try:
+            os.remove(importlib.util.cache_from_source(path))
+        except OSError:
+            pass
 
-            if prefix_routes:
-                actions = self._prefix_routes(controller, actions)
+        importlib.invalidate_caches()
+        module = sys.modules.get(module_name)
 
-            self._actions.extend(actions)
+        if module is not None:
+            module = importlib.reload(module)
+        else:
+            module = importlib.import_module(module_name)
+
+        routes = self._controller_routes(module, self._prefix)
+        actions = [action for action, _, _ in routes]
+
+        for action in actions:
+            self._add_action(module_name, action)
+
+        return actions
+
+    def _controller_routes(self, controller, prefix_routes):
+        # First all dunder functions and properties are excluded, then only
+        # the tuples (actions defined in the controllers) are kept.
+        names = [name for name in dir(controller)
+                 if not name.startswith('__') and
+                 isinstance(getattr(controller, name), tuple)]
+
+        actions = [getattr(controller, name) for name in names]
+
+        if prefix_routes:
+            actions = self._prefix_routes(controller, actions)
+
+        return [(action, controller.__name__, name)
+                for action, name in zip(actions, names)]
+
+    def _add_action(self, module, action):
+        self._actions.append(action)
+        self._controller_actions.setdefault(module, []).append(action)
 
     def _prefix_routes(self, controller, actions):
         """
@@ -72,7 +185,8 @@ class RouteDiscovery:
         - `controller`: the controller object
         - `actions`: the actions that have been registered in the `controller`
 
-        .. Note:: `actions` is a tuple (route, verb, func) where:
+        .. Note:: `actions` is a tuple (route, verb, func, additional_methods,
+                  cache) where:
                   - `route`: the URI to the action
                   - `verb`: which HTTP verb the action will respond to
                   - `func`: the action function
@@ -80,7 +194,7 @@ class RouteDiscovery:
 
         prefixed = []
 
-        for route, verb, func, additional_methods in actions:
+        for route, verb, func, additional_methods, cache in actions:
             module, name = controller.__name__.split('.')
             name = name.replace('Controller', '')
 
@@ -88,7 +202,7 @@ class RouteDiscovery:
                 route = f'/{route}'
 
             prefixed.append(
-                (f'/{name}{route}', verb, func, additional_methods)
+                (f'/{name}{route}', verb, func, additional_methods, cache)
             )
 
         return prefixed
@@ -113,3 +227,150 @@ class RouteDiscovery:
         return [filename.replace('.py', '')
                 for filename in os.listdir('controllers')
                 if filename.endswith('Controller.py')]
+
+    def sources(self):
+        """ Returns the modification time and size of each controller. """
+
+        sources = {}
+
+        for filename in sorted(os.listdir(self._controller_folder)):
+            if filename.endswith('Controller.py'):
+                stat = os.stat(os.path.join(self._controller_folder,
+                                            filename))
+                sources[filename] = [stat.st_mtime_ns, stat.st_size]
+
+        return sources
+
+    def _read_manifest(self, path, prefix_routes, sources):
+        """
+        Returns the routes of the manifest, None if there is no manifest or
+        it is out of date.
+        """
+
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if (not isinstance(manifest, dict) or
+                manifest.get('version') != MANIFEST_VERSION or
+                manifest.get('prefix_routes') != bool(prefix_routes) or
+                manifest.get('sources') != sources):
+            return None
+
+        return manifest.get('routes')
+
+    def _write_manifest(self, path, prefix_routes, sources, routes):
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'prefix_routes': bool(prefix_routes),
+            'sources': sources,
+            'routes': [{
+                'route': route,
+                'verbs': [verb] + list(additional_methods),
+                'module': module,
+                'attribute': attribute,
+                'coroutine': inspect.iscoroutinefunction(func),
+                'cached': cache is not None,
+            } for (route, verb, func, additional_methods, cache), module,
+                attribute in routes],
+        }
+
+        # Written to a temporary file first, so a server starting at the
+        # same time never reads half a manifest.
+        temp_path = f'{path}.{os.getpid()}.tmp'
+
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(manifest, f, indent=2)
+
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f'The route manifest could not be written: {e}')
+
+
+class _ActionLoader:
+    """ Imports the controller of an action the first time it is needed. """
+
+    __slots__ = ('_module', '_attribute', '_action', '_lock')
+
+    def __init__(self, module, attribute):
+        self._module = module
+        self._attribute = attribute
+        self._action = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """ Returns the action function. """
+
+        return self._load()[2]
+
+    def load_cache(self):
+        """ Returns the response cache of the action. """
+
+        return self._load()[4]
+
+    def _load(self):
+        action = self._action
+
+        if action is None:
+            with self._lock:
+                if self._action is None:
+                    module = importlib.import_module(self._module)
+                    action = getattr(module, self._attribute, None)
+
+                    if not isinstance(action, tuple):
+                        raise ValueError(f'The controller `{self._module}` '
+                                         'has no action '
+                                         f'`{self._attribute}`, the route '
+                                         'manifest is out of date.')
+
+                    self._action = action
+
+                action = self._action
+
+        return action
+
+
+class _LazyCache:
+    """ The response cache of a lazy action, read from the action. """
+
+    __slots__ = ('_loader',)
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader.load_cache(), name)
+
+
+def _lazy_actions(routes):
+    """
+    Returns a (route, verb, func, additional_methods, cache) tuple per
+    manifest route, `func` imports the controller and calls the action.
+    """
+
+    actions = []
+
+    for entry in routes:
+        loader = _ActionLoader(entry['module'], entry['attribute'])
+
+        # The handlers check if the action is a coroutine function before
+        # calling it, so the placeholder must be one too.
+        if entry['coroutine']:
+            async def action(self, *args, _loader=loader):
+                return await _loader.load()(self, *args)
+        else:
+            def action(self, *args, _loader=loader):
+                return _loader.load()(self, *args)
+
+        action.__name__ = action.__qualname__ = entry['attribute']
+        action.__module__ = entry['module']
+        cache = _LazyCache(loader) if entry['cached'] else None
+
+        verb, *additional_methods = entry['verbs']
+        actions.append((entry['route'], verb, action, additional_methods,
+                        cache))
+
+    return actions
@@ -1,17 +1,30 @@
-import re
-from typing import Tuple
-from typing import Dict
-from typing import Any
 from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from .route_cache import RouteCache
+from .route_tree import RouteTree
 
 
 class RouteResolver:
     """
     Lookup the request route in the route table.
+
+    The route table is compiled into one RouteTree per HTTP verb when the
+    resolver is created, so the resolver has to be created again if new
+    routes are registered. Resolved paths can optionally be kept in a
+    RouteCache.
     """
 
-    def __init__(self, route_table: Dict[str, Tuple[str, Any]]) -> None:
+    def __init__(self,
+                 route_table: Dict[str, List[Tuple[str, Callable]]],
+                 cache: Optional[RouteCache]=None) -> None:
         self._route_table = route_table
+        self._cache = cache
+        self._trees = {verb: RouteTree.from_routes(routes)
+                       for verb, routes in route_table.items()}
 
     def resolve(self, uri: str, http_verb: str) -> Tuple[str, Callable, Tuple]:
         """
@@ -22,13 +35,28 @@ class RouteResolver:
 
         ..Note:: If found it will return a tuple containing the HTTP verb, the
         action to be executed and also a list of parameter values sent as part
-        of the route URL.
+        of the route URL. Raises KeyError when there are no routes registered
+        for the HTTP verb.
         """
-        routes = self._route_table[http_verb]
+        cache = self._cache
+
+        if cache is not None:
+            key = (http_verb, uri)
+            cached = cache.get(key)
+
+            if cached is not None:
+                return cached
+
+            generation = cache.generation
+
+        tree = self._trees[http_verb]
+        match = tree.lookup(uri)
+
+        if match is not None:
+            _, route_def_func, values = match
+            action_info = (http_verb, route_def_func, values)
 
-        for route_definition in routes:
-            route_def_uri, route_def_func = route_definition
-            values = re.match(route_def_uri, uri)
+            if cache is not None:
+                cache.put(key, action_info, generation)
 
-            if values is not None:
-                return (http_verb, route_def_func, values.groups())
+            return action_info
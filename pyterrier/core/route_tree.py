@@ -0,0 +1,174 @@
+import re
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Pattern
+from typing import Tuple
+
+from .route_converter import RouteConverter
+
+
+class RouteNode:
+    """
+    A node in the route tree. Every node represents one segment of the
+    action URI.
+    """
+
+    __slots__ = ('static', 'dynamic', 'action', 'route', 'order')
+
+    def __init__(self) -> None:
+        self.static: Dict[str, 'RouteNode'] = {}
+        self.dynamic: List[Tuple[Pattern, 'RouteNode']] = []
+        self.action: Optional[Callable] = None
+        self.route: Optional[str] = None
+        self.order = -1
+
+
+class RouteTree:
+    """
+    Segment based tree of the routes registered for one HTTP verb.
+
+    Static segments are looked up in a dict and segments containing
+    placeholders (`{name:int}`, `{name:str}`) are matched with a regular
+    expression, so the cost of a lookup depends on the number of segments
+    in the request URI and not on the number of registered routes.
+    """
+
+    def __init__(self, converter: Optional[RouteConverter]=None) -> None:
+        self._root = RouteNode()
+        self._converter = converter or RouteConverter()
+        self._size = 0
+
+    @classmethod
+    def from_routes(cls,
+                    routes: Iterable[Tuple[str, Callable]],
+                    converter: Optional[RouteConverter]=None) -> 'RouteTree':
+        """
+        Build a new tree out of a list of (route, action) tuples.
+        """
+
+        tree = cls(converter)
+
+        for route, action in routes:
+            tree.insert(route, action)
+
+        return tree
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, route: str, action: Callable) -> None:
+        """
+        Add a new route to the tree.
+
+        :Parameters:
+        - `route`: the action URI, e.g. /api/user/{id:int}
+        - `action`: the function that will be invoked when the route is
+        requested.
+
+        .. Note:: Like the route table, if the same route is registered more
+        than once the first registration wins.
+        """
+
+        route = self._converter.normalize(route)
+        node = self._root
+
+        for segment in route.split('/')[1:]:
+            if '{' in segment:
+                node = self._dynamic_child(node, segment)
+            else:
+                node = node.static.setdefault(segment, RouteNode())
+
+        if node.action is None:
+            node.action = action
+            node.route = route
+            node.order = self._size
+
+        self._size += 1
+
+    def lookup(self, uri: str) -> Optional[Tuple[str, Callable, Tuple]]:
+        """
+        Search the tree for the given URI.
+
+        :Parameters:
+        - `uri`: the request path
+
+        ..Note:: If found it will return a tuple containing the route
+        definition, the action and the parameter values extracted from
+        the URI, otherwise None.
+        """
+
+        if not uri.startswith('/'):
+            return None
+
+        segments = uri.split('/')[1:]
+        found = self._match(self._root, segments, 0, ())
+
+        # Routes accept an optional trailing slash.
+        if len(segments) > 1 and segments[-1] == '':
+            trimmed = self._match(self._root, segments[:-1], 0, ())
+
+            if trimmed is not None and (found is None or
+                                        trimmed[0] < found[0]):
+                found = trimmed
+
+        if found is None:
+            return None
+
+        _, node, params = found
+
+        return (node.route, node.action, params)
+
+    def _dynamic_child(self, node: RouteNode, segment: str) -> RouteNode:
+        regex = self._converter.convert_segment(segment)
+
+        for pattern, child in node.dynamic:
+            if pattern.pattern == regex:
+                return child
+
+        child = RouteNode()
+        node.dynamic.append((re.compile(regex), child))
+
+        return child
+
+    def _match(self,
+               node: RouteNode,
+               segments: List[str],
+               index: int,
+               params: Tuple) -> Optional[Tuple[int, RouteNode, Tuple]]:
+        """
+        Walk down the tree returning the matching node registered first,
+        to keep the same precedence as the order the routes were added.
+        """
+
+        if index == len(segments):
+            if node.action is None:
+                return None
+            return (node.order, node, params)
+
+        segment = segments[index]
+        best: Any = None
+
+        child = node.static.get(segment)
+
+        if child is not None:
+            best = self._match(child, segments, index + 1, params)
+
+        for pattern, child in node.dynamic:
+            values = pattern.fullmatch(segment)
+
+            if values is None:
+                continue
+
+            found = self._match(child,
+                                segments,
+                                index + 1,
+                                params + values.groups())
+
+            if found is not None and (best is None or found[0] < best[0]):
+                best = found
+
+        return best
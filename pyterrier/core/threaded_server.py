@@ -1,6 +1,60 @@
+import socket
 from http.server import HTTPServer
 from socketserver import ThreadingMixIn
+from typing import Callable
+from typing import Optional
+from typing import Tuple
+
+from .connections import ConnectionTracker
 
 
 class ThreadedServer(ThreadingMixIn, HTTPServer):
-    pass
+    """ HTTP server handling every connection in a new thread. """
+
+    request_queue_size = 1024
+
+    def __init__(self,
+                 server_address: Tuple[str, int],
+                 handler: Callable,
+                 sock: Optional[socket.socket]=None) -> None:
+        """
+        Create a new server.
+
+        :Parameters:
+        - `server_address`: a (hostname, port) tuple.
+        - `handler`: the request handler factory.
+        - `sock`: a listening socket, e.g. inherited from the process this
+        one replaces, used instead of binding `server_address`.
+        """
+
+        HTTPServer.__init__(self, server_address, handler,
+                            bind_and_activate=sock is None)
+
+        if sock is not None:
+            use_socket(self, sock)
+
+        self.connections = ConnectionTracker()
+
+    def shutdown(self, drain_timeout: Optional[float]=None) -> None:
+        """
+        Stop the serve_forever loop and wait until it exits. With
+        `drain_timeout`, also close the idle connections and wait up to this
+        number of seconds for the requests in flight.
+        """
+
+        HTTPServer.shutdown(self)
+
+        if drain_timeout is not None:
+            self.connections.drain(drain_timeout)
+
+
+def use_socket(server: HTTPServer, sock: socket.socket) -> None:
+    """ Make a socketserver server, created unbound, accept on `sock`. """
+
+    server.socket.close()
+    server.socket = sock
+    server.server_address = sock.getsockname()
+
+    host, port = server.server_address[:2]
+    server.server_name = socket.getfqdn(host)
+    server.server_port = port
@@ -1,13 +1,45 @@
+import dataclasses
 import json
+import os
 import re
+import sys
+import sysconfig
+from operator import attrgetter
 from typing import Any
+from typing import Callable
 from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+
+_SPECIAL_CHARS = re.compile(r'(\-|\_)')
+
+# Per class functions converting an object to a dict with camel case keys.
+_plans: Dict[type, Callable[[Any], Dict]] = {}
+
+_STDLIB = os.path.normcase(sysconfig.get_paths()['stdlib'])
+
+
+def camelcase_key(key: str) -> str:
+    """ Convert a property name to lowercase camel case. """
+
+    clean_key = _SPECIAL_CHARS.sub(' ', key)
+    camelcase = ''.join(x for x in clean_key.title() if not x.isspace())
+
+    return camelcase[0].lower() + camelcase[1:] if camelcase else camelcase
 
 
 class DefaultJsonEncoder(json.JSONEncoder):
     """
     The framework's default JSON encoder.
 
+    Objects are converted to dicts with lowercase camel case keys. The keys
+    are converted once per class, the first time an object of the class is
+    encoded, `__slots__` objects and dataclasses are read attribute by
+    attribute without building a `__dict__`. Values without attributes,
+    e.g. datetime or Decimal, raise a TypeError like json.JSONEncoder.
+
     ..Note:: This can be changes at application start.
     """
 
@@ -22,11 +54,6 @@ class DefaultJsonEncoder(json.JSONEncoder):
 
         self._builtin_types = (tuple, set, list, str, int, float, )
 
-        self._regexp = re.compile(r'(\-|\_)')
-
-        self._remove_special_chars = lambda key: self._regexp.sub(' ', key)
-        self._to_lower = lambda key: key[0].lower() + key[1:] if key else key
-
     def to_camelcase(self, obj: Any) -> Dict:
         """
         Helper to convert a python object to JSON and change the properties
@@ -36,25 +63,149 @@ class DefaultJsonEncoder(json.JSONEncoder):
         - `obj`: the object to be converted to came case.
         """
 
-        camel_case_keys = []
+        plan = _plan(type(obj))
 
-        for key in obj.__dict__.keys():
-            clean_key = self._remove_special_chars(key)
-            camelcase_key = ''.join(x for x in clean_key.title()
-                                    if not x.isspace())
-            camel_case_keys.append(self._to_lower(camelcase_key))
+        if plan is None:
+            raise TypeError(f'Object of type {type(obj).__name__} '
+                            f'has no attributes to convert')
 
-        return dict(zip(camel_case_keys, obj.__dict__.values()))
+        return plan(obj)
 
     def default(self, obj: Any):
 
         if isinstance(obj, self._builtin_types):
             return obj
-        """
-        elif isinstance(obj, Serializable):
-            return self.to_camelcase(obj)
-        else:
-            return self.__dict__
-        """
 
-        return self.to_camelcase(obj)
+        plan = _plan(type(obj))
+
+        # Values without attributes, e.g. datetime or Decimal, can't be
+        # converted to a dict, the encoder raises a TypeError.
+        if plan is None:
+            return json.JSONEncoder.default(self, obj)
+
+        return plan(obj)
+
+
+def _plan(cls: type) -> Optional[Callable[[Any], Dict]]:
+    try:
+        return _plans[cls]
+    except KeyError:
+        plan = _key_plan(cls)
+
+        if plan is not None:
+            _plans[cls] = plan
+
+        return plan
+
+
+def _key_plan(cls: type) -> Optional[Callable[[Any], Dict]]:
+    """
+    Build the function converting objects of the class to dicts, None if
+    the objects have no attributes to convert.
+    """
+
+    if dataclasses.is_dataclass(cls):
+        names = [field.name for field in dataclasses.fields(cls)]
+        return _attributes_plan(names)
+
+    # The slots of standard library types, e.g. UUID, hold their internal
+    # state and are not converted.
+    slots = [(base, slot) for base in cls.__mro__[:-1]
+             if not _is_stdlib(base)
+             for slot in _as_list(vars(base).get('__slots__', ()))]
+
+    has_dict = cls.__dictoffset__ != 0
+    names = []
+
+    for base, slot in slots:
+        name = _mangle(base, slot)
+
+        if slot not in ('__dict__', '__weakref__') and name not in names:
+            names.append(name)
+
+    if not names:
+        return _dict_plan() if has_dict else None
+
+    if not has_dict:
+        return _attributes_plan(names)
+
+    slots_plan = _attributes_plan(names)
+    dict_plan = _dict_plan()
+
+    def plan(obj: Any) -> Dict:
+        result = slots_plan(obj)
+        result.update(dict_plan(obj))
+        return result
+
+    return plan
+
+
+def _attributes_plan(names: List[str]) -> Callable[[Any], Dict]:
+    """ Read a fixed list of attributes, skipping the unset ones. """
+
+    items: List[Tuple[str, str]] = [(name, camelcase_key(name))
+                                    for name in names]
+    keys = [key for _, key in items]
+    getter = attrgetter(*names)
+
+    def plan(obj: Any) -> Dict:
+        try:
+            values = getter(obj)
+        except AttributeError:
+            return {key: getattr(obj, name)
+                    for name, key in items if hasattr(obj, name)}
+
+        if len(items) == 1:
+            values = (values,)
+
+        return dict(zip(keys, values))
+
+    return plan
+
+
+def _dict_plan() -> Callable[[Any], Dict]:
+    """ Read the object's `__dict__`, converting each key only once. """
+
+    keys: Dict[str, str] = {}
+
+    def plan(obj: Any) -> Dict:
+        attributes = obj.__dict__
+
+        try:
+            return {keys[name]: value for name, value in attributes.items()}
+        except KeyError:
+            for name in attributes:
+                if name not in keys:
+                    keys[name] = camelcase_key(name)
+
+            return {keys[name]: value for name, value in attributes.items()}
+
+    return plan
+
+
+def _is_stdlib(cls: type) -> bool:
+    """ Whether the class is a builtin or comes from the standard library. """
+
+    module = sys.modules.get(cls.__module__)
+    filename = getattr(module, '__file__', None)
+
+    if filename is None:
+        return True
+
+    filename = os.path.normcase(os.path.abspath(filename))
+
+    return (filename.startswith(_STDLIB) and
+            'site-packages' not in filename)
+
+
+def _mangle(cls: type, name: str) -> str:
+    """ The attribute name of a private slot, e.g. `__id`. """
+
+    if name.startswith('__') and not name.endswith('__'):
+        return f'_{cls.__name__.lstrip("_")}{name}'
+
+    return name
+
+
+def _as_list(slots: Any) -> List[str]:
+    return [slots] if isinstance(slots, str) else list(slots)
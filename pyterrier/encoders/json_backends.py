@@ -0,0 +1,68 @@
+import importlib
+from typing import Any
+from typing import Callable
+from typing import Union
+
+from .default_json_encoder import DefaultJsonEncoder
+
+
+JSON_BACKENDS = ('json', 'orjson', 'ujson', 'auto')
+
+
+def json_dumps_function(
+        backend: str='json') -> Callable[[Any], Union[str, bytes]]:
+    """
+    Returns the function serializing the actions' results to JSON.
+
+    All the backends use DefaultJsonEncoder to convert objects, so the
+    output only differs in whitespace.
+
+    :Parameters:
+    - `backend`: `json` uses the standard library, `orjson` and `ujson`
+    use the faster third party packages, they must be installed, and `auto`
+    uses the fastest one installed.
+    """
+
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f'Unknown JSON backend `{backend}`, the options '
+                         f'are {", ".join(JSON_BACKENDS)}.')
+
+    if backend == 'auto':
+        for name in ('orjson', 'ujson'):
+            if _import(name) is not None:
+                return json_dumps_function(name)
+
+        return json_dumps_function('json')
+
+    encoder = DefaultJsonEncoder()
+
+    if backend == 'json':
+        return encoder.encode
+
+    module = _import(backend)
+
+    if module is None:
+        raise ImportError(f'The JSON backend `{backend}` is not installed, '
+                          f'install it with `pip install {backend}`.')
+
+    if backend == 'orjson':
+        # Dataclasses are passed to the encoder, so their keys are converted
+        # to camel case as with the other backends.
+        option = module.OPT_PASSTHROUGH_DATACLASS
+
+        def orjson_dumps(data: Any) -> bytes:
+            return module.dumps(data, default=encoder.default, option=option)
+
+        return orjson_dumps
+
+    def ujson_dumps(data: Any) -> str:
+        return module.dumps(data, default=encoder.default)
+
+    return ujson_dumps
+
+
+def _import(name: str) -> Any:
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
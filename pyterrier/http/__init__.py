@@ -1,4 +1,8 @@
+from .cache import Cache
+from .form_parser import UploadedFile
 from .http_result import HttpResult
 from .http_result_aliases import Ok, NotFound, NoContent
-from .view_result import ViewResult
+from .streaming_http_result import StreamingHttpResult
+from .view_result import ViewResult, StreamingViewResult
 from .http_verbs import get, post, put, patch, delete
+from pyterrier.core.request import current_request
@@ -0,0 +1,588 @@
+import asyncio
+import contextvars
+import functools
+import http.client
+import inspect
+import io
+import sys
+import time
+import traceback
+
+from email.utils import formatdate
+
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from concurrent.futures import Executor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+
+from pyterrier.core.application import Application
+from pyterrier.core.connections import ConnectionTracker
+from pyterrier.core.connections import LINGER_TIMEOUT
+from pyterrier.core.request import Request
+from pyterrier.core.request import _current_request
+from .form_parser import FormError
+from .form_parser import close_uploads
+from .response_mixin import ResponseMixin
+from .response_mixin import _LAST_CHUNK
+from .response_mixin import _NO_BODY_STATUSES
+from .response_mixin import _STREAMING_RESULTS
+from .response_mixin import _chunk
+
+_SUPPORTED_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+# Request bodies up to this size are read before dispatching the request,
+# larger bodies are read in chunks while they are parsed.
+_BUFFERED_BODY_SIZE = 64 * 1024
+
+
+class _StreamBody:
+    """
+    Blocking reader of the request body for the executor threads, every
+    read waits for the event loop to read the data from the connection.
+    """
+
+    def __init__(self,
+                 reader: asyncio.StreamReader,
+                 loop: asyncio.AbstractEventLoop,
+                 length: int) -> None:
+        self._reader = reader
+        self._loop = loop
+        self.remaining = length
+
+    def read(self, size: Optional[int]=-1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+
+        if size == 0:
+            return b''
+
+        data = asyncio.run_coroutine_threadsafe(self._reader.read(size),
+                                                self._loop).result()
+        self.remaining -= len(data)
+
+        return data
+
+
+class AsyncHttpRequestHandler(ResponseMixin):
+    """
+    The framework's HTTP handler for the asyncio server engine.
+
+    One handler is created per connection and, like the HttpRequestHandler,
+    it exposes the current request's `path`, `requestline`, `headers` and
+    `rfile` so the same Request object and response helpers can be used.
+    Actions defined with `async def` run in the event loop, all the other
+    actions run in the server's executor.
+    """
+
+    server_version = BaseHTTPRequestHandler.server_version
+    sys_version = BaseHTTPRequestHandler.sys_version
+
+    max_headers = 100
+
+    def __init__(self,
+                 app: Application,
+                 reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter,
+                 executor: Executor,
+                 connections: Optional[ConnectionTracker]=None) -> None:
+        """
+        Create a new request handler.
+
+        :Parameters:
+        - `app`: the compiled application.
+        - `reader`, `writer`: the connection streams.
+        - `executor`: the executor running the actions that are not
+        coroutines and rendering the results.
+        - `connections`: the server's connections, the handler reports when
+        it is idle or handling a request.
+        """
+
+        self._app = app
+        self._reader = reader
+        self._writer = writer
+        self._executor = executor
+        self._connections = connections
+
+        self._keep_alive = app.config.get('keep_alive')
+        self._requests_handled = 0
+
+        self.protocol_version = 'HTTP/1.1' if self._keep_alive else 'HTTP/1.0'
+        self.client_address = writer.get_extra_info('peername')
+        self.close_connection = True
+
+        self.command = None
+        self.path = None
+        self.requestline = ''
+        self.request_version = 'HTTP/0.9'
+        self.headers = None
+        self.rfile = None
+        self._form = {}
+        self._route_metrics = None
+        self._profile = None
+        self._start = 0.0
+        self._status = 0
+
+    async def handle(self) -> None:
+        """ Handle the requests sent through the connection. """
+
+        connections = self._connections
+        abort = functools.partial(asyncio.get_running_loop()
+                                  .call_soon_threadsafe,
+                                  self._writer.transport.abort)
+
+        # A new connection counts as busy until its first request has been
+        # handled.
+        if connections is not None:
+            connections.set_busy(self, abort)
+
+        try:
+            while True:
+                if (connections is not None and self._requests_handled and
+                        not connections.set_idle(self, abort)):
+                    break
+
+                if not await self._read_request():
+                    break
+
+                if (connections is not None and
+                        not connections.set_busy(self, abort)):
+                    self.close_connection = True
+
+                # Switch to the application reloaded controllers were
+                # swapped in.
+                self._app = self._app.current
+
+                await self._dispatch()
+                await self._writer.drain()
+
+                if self.close_connection:
+                    break
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.TimeoutError:
+            self.log_error('Request timed out')
+        finally:
+            if self._unread_body:
+                await self._linger()
+
+            self._writer.close()
+
+            if connections is not None:
+                connections.remove(self)
+
+    async def _linger(self) -> None:
+        """
+        Discard the request data the client still sends before closing the
+        connection, see pyterrier.core.connections.lingering_close.
+        """
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + LINGER_TIMEOUT
+
+        try:
+            await self._writer.drain()
+            self._writer.write_eof()
+
+            while await asyncio.wait_for(self._reader.read(65536),
+                                         deadline - loop.time()):
+                pass
+        except (OSError, RuntimeError, asyncio.TimeoutError):
+            pass
+
+    async def _read_request(self) -> bool:
+        """
+        Read the request line, headers and body of the next request. Returns
+        False when the connection should be closed.
+        """
+
+        self.close_connection = True
+        # The whole request must arrive within the timeout, not only the
+        # request line, so a stalled client can not hold the connection.
+        timeout = self._app.config.get('keep_alive_timeout')
+
+        try:
+            line = await asyncio.wait_for(self._reader.readline(), timeout)
+        except ValueError:
+            self.send_error(HTTPStatus.REQUEST_URI_TOO_LONG)
+            return False
+
+        if not line:
+            return False
+
+        self.requestline = str(line, 'iso-8859-1').rstrip('\r\n')
+        words = self.requestline.split()
+
+        if len(words) != 3 or not words[2].startswith('HTTP/'):
+            self.send_error(HTTPStatus.BAD_REQUEST,
+                            f'Bad request syntax ({self.requestline!r})')
+            return False
+
+        self.command, self.path, self.request_version = words
+
+        lines = []
+
+        while True:
+            try:
+                line = await asyncio.wait_for(self._reader.readline(),
+                                              timeout)
+            except ValueError:
+                line = None
+
+            if line is None or len(lines) > self.max_headers:
+                self.send_error(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+                return False
+
+            lines.append(line)
+
+            if line in (b'\r\n', b'\n', b''):
+                break
+
+        self.headers = http.client.parse_headers(io.BytesIO(b''.join(lines)))
+
+        self._requests_handled += 1
+
+        if self._keep_alive:
+            self.close_connection = self._should_close()
+
+        if (self.request_version >= 'HTTP/1.1' and
+                self.headers.get('Expect', '').lower() == '100-continue'):
+            self._writer.write(
+                f'{self.protocol_version} 100 Continue\r\n\r\n'.encode())
+
+        body = b''
+
+        if self.headers.get('Transfer-Encoding'):
+            self.close_connection = True
+        else:
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                length = -1
+
+            if length < 0:
+                self.send_error(HTTPStatus.BAD_REQUEST,
+                                'Invalid Content-Length header')
+                return False
+
+            if length > _BUFFERED_BODY_SIZE:
+                self.rfile = _StreamBody(self._reader,
+                                         asyncio.get_running_loop(),
+                                         length)
+                return True
+
+            body = await asyncio.wait_for(self._reader.readexactly(length),
+                                          timeout)
+
+        self.rfile = io.BytesIO(body)
+
+        return True
+
+    def _should_close(self) -> bool:
+        max_requests = self._app.config.get('max_keep_alive_requests')
+
+        if max_requests is not None and self._requests_handled >= max_requests:
+            return True
+
+        conntype = self.headers.get('Connection', '').lower()
+
+        if conntype == 'close':
+            return True
+
+        return (self.request_version < 'HTTP/1.1' and
+                conntype != 'keep-alive')
+
+    async def _dispatch(self) -> None:
+        """
+        Resolve the request and execute the action, this follows the same
+        rules of HttpRequestHandler.do_GET and HttpRequestHandler.do_POST.
+        """
+
+        if self.command not in _SUPPORTED_METHODS:
+            self.send_error(HTTPStatus.NOT_IMPLEMENTED,
+                            f'Unsupported method ({self.command!r})')
+            return
+
+        request = Request(self)
+        is_get = self.command == 'GET'
+        _current_request.set(request)
+
+        if is_get and self._is_metrics_request(request.path):
+            self._send_response(*self._prepare_metrics())
+            return
+
+        if is_get and self.is_requesting_file(request.path):
+            await self._serve_file(request.path)
+            return
+
+        self._form = {}
+        self._route_metrics = None
+        self._profile = None
+
+        try:
+            response = await self._call_action(request, is_get)
+        except Exception:
+            self.log_error('%s', traceback.format_exc())
+            self.close_connection = True
+            response = self._encode_response(
+                f'Internal Error {sys.exc_info()[0]}',
+                HTTPStatus.INTERNAL_SERVER_ERROR)
+
+        # A body that was not read can't be skipped without reading it.
+        if getattr(self.rfile, 'remaining', 0):
+            self.close_connection = True
+
+        try:
+            if isinstance(response, _STREAMING_RESULTS):
+                await self._send_stream(response)
+            else:
+                self._write_response(*response)
+        finally:
+            close_uploads(self._form)
+
+            if self._route_metrics is not None:
+                self._route_metrics.finish(self._start, self._status)
+
+            if self._profile is not None:
+                self._profile.save()
+                self._profile = None
+
+    async def _call_action(self, request: Request, is_get: bool):
+        try:
+            action_info = self._app.resolver.resolve(request.path,
+                                                     request.method)
+        except KeyError:
+            return self._encode_response({}, HTTPStatus.METHOD_NOT_ALLOWED)
+
+        if not action_info:
+            return self._encode_response({}, HTTPStatus.NOT_FOUND)
+
+        verb, handler, params = action_info
+
+        if self._app.metrics is not None:
+            self._route_metrics = self._app.metrics.for_action(verb, handler)
+            self._start = self._route_metrics.start()
+
+        if self._app.profiler is not None:
+            # Only the functions run in the executor are profiled, the
+            # event loop runs other requests in between.
+            self._profile = self._app.profiler.start(
+                self.headers, verb, self._app.route_template(verb, handler))
+
+        if not is_get:
+            try:
+                if isinstance(self.rfile, _StreamBody):
+                    self._form = await self._run(self._read_postvars)
+                else:
+                    self._form = self._read_postvars()
+            except FormError as e:
+                return self._encode_response(*self._form_error(e))
+        cache = self._app.response_cache(handler) if is_get else None
+
+        if cache is not None:
+            key = self._cache_key(cache)
+            response = cache.get(key)
+
+            if response is not None:
+                return response
+
+            generation = cache.generation
+
+        if is_get:
+            args = params
+        else:
+            args = (self._form,) if self._form else ()
+
+        if inspect.iscoroutinefunction(handler):
+            results = await handler(*args)
+        else:
+            results = await self._run(handler, *args)
+
+        if isinstance(results, _STREAMING_RESULTS):
+            return results
+
+        prepare = self._prepare_result if is_get else self._prepare_json_result
+
+        response = await self._run(self._render, prepare, results)
+
+        if cache is not None and response[0] == HTTPStatus.OK:
+            cache.put(key, response, generation)
+
+        return response
+
+    def _render(self, prepare: Callable, results: Any):
+        """
+        Prepare and encode the action's result, it runs in the executor as
+        rendering and compressing can take a while.
+        """
+
+        return self._encode_response(*prepare(results))
+
+    def _run(self, func: Callable, *args: Any) -> asyncio.Future:
+        """
+        Run a blocking function in the executor, in a copy of the task's
+        context so the function sees the current request.
+        """
+
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+
+        if self._profile is not None:
+            func = functools.partial(self._profile.run, func)
+
+        return loop.run_in_executor(
+            self._executor, functools.partial(context.run, func, *args))
+
+    async def _send_stream(self, result: Any) -> None:
+        """
+        Send a StreamingViewResult or StreamingHttpResult to the client
+        while it is rendered in the executor, waiting for the client to read
+        each chunk before rendering the next one.
+        """
+
+        chunked = self._keep_alive and self.request_version >= 'HTTP/1.1'
+        headers = self._stream_headers(result, chunked)
+        chunks = self._stream_body(result, headers)
+        status = getattr(result, 'http_status', HTTPStatus.OK)
+
+        # Errors raised before the first chunk can still be reported.
+        try:
+            chunk = await self._run(next, chunks, b'')
+        except Exception as e:
+            self._send_response(str(e),
+                                HTTPStatus.INTERNAL_SERVER_ERROR,
+                                'application/json')
+            return
+
+        if not chunked:
+            self.close_connection = True
+
+        self._writer.write(self._head(status, headers))
+        size = 0
+
+        try:
+            while chunk:
+                self._writer.write(_chunk(chunk) if chunked else chunk)
+                size += len(chunk)
+
+                await self._writer.drain()
+                chunk = await self._run(next, chunks, b'')
+
+            if chunked:
+                self._writer.write(_LAST_CHUNK)
+        except ConnectionError:
+            raise
+        except Exception as e:
+            # The response is left incomplete, so the client knows it
+            # failed.
+            self.log_error('Error streaming the response: %r', e)
+            self.close_connection = True
+
+        self.log_request(HTTPStatus(status).value, size)
+
+    async def _serve_file(self, path: str) -> None:
+        """
+        Server a static file to the client, the file is copied to the
+        socket with the event loop's sendfile.
+        """
+
+        try:
+            response = await self._run(self._app.static_files.prepare,
+                                       path,
+                                       self.headers)
+            static_file = (await self._run(open, response.path, 'rb')
+                           if response.path else None)
+        except Exception:
+            self.log_error('%s', traceback.format_exc())
+            self.close_connection = True
+            self._send_response(f'Internal Error {sys.exc_info()[0]}',
+                                HTTPStatus.INTERNAL_SERVER_ERROR)
+            return
+
+        try:
+            length = response.content_length
+            headers = response.headers
+
+            if response.status not in _NO_BODY_STATUSES:
+                headers = headers + [('Content-Length', str(length))]
+
+            self._writer.write(self._head(response.status, headers))
+
+            loop = asyncio.get_running_loop()
+
+            for part in response.parts:
+                if isinstance(part, tuple):
+                    await self._writer.drain()
+                    await loop.sendfile(self._writer.transport,
+                                        static_file,
+                                        *part)
+                else:
+                    self._writer.write(part)
+
+            self.log_request(response.status.value, length)
+        finally:
+            if static_file is not None:
+                static_file.close()
+
+    def _send_response(self,
+                       results: Any, http_status: int,
+                       content_type: Optional[str]='text/html') -> None:
+        """ Prepare response to be sent to the client """
+
+        self._write_response(*self._encode_response(results,
+                                                    http_status,
+                                                    content_type))
+
+    def _write_response(self,
+                        http_status: HTTPStatus,
+                        headers: List[Tuple[str, str]],
+                        parts: List[bytes]) -> None:
+        self._writer.writelines([self._head(http_status, headers)] + parts)
+        self.log_request(http_status.value, sum(map(len, parts)))
+
+    def _head(self, http_status: int, headers: List[Tuple[str, str]]) -> bytes:
+        """ Returns the status line and the headers of the response. """
+
+        http_status = HTTPStatus(http_status)
+        self._status = http_status.value
+
+        lines = [
+            f'{self.protocol_version} {http_status.value} '
+            f'{http_status.phrase}',
+            f'Server: {self.server_version} {self.sys_version}',
+            f'Date: {formatdate(usegmt=True)}',
+        ]
+        lines.extend(f'{name}: {value}' for name, value in headers)
+
+        # The server may have started draining while the request was
+        # handled.
+        if self._connections is not None and self._connections.draining:
+            self.close_connection = True
+
+        if self._keep_alive and self.close_connection:
+            lines.append('Connection: close')
+
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', 'strict')
+
+    def send_error(self, code: int, message: Optional[str]=None) -> None:
+        """ Send an error response and close the connection. """
+
+        self.close_connection = True
+        self._send_response(message or HTTPStatus(code).phrase, code)
+
+    def log_request(self, code: Any='-', size: Any='-') -> None:
+        self.log_message('"%s" %s %s', self.requestline, str(code), str(size))
+
+    def log_error(self, format: str, *args: Any) -> None:
+        self.log_message(format, *args)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        host = self.client_address[0] if self.client_address else '-'
+        timestamp = time.strftime('%d/%b/%Y %H:%M:%S')
+
+        sys.stderr.write(f'{host} - - [{timestamp}] {format % args}\n')
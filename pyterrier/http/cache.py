@@ -0,0 +1,124 @@
+import time
+from typing import Any
+from typing import Hashable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from pyterrier.core.lru_cache import LruCache
+
+
+class Cache(LruCache):
+    """
+    Cache of the full responses of a GET action.
+
+    The encoded response, status, headers and body, is kept for `ttl`
+    seconds in a bounded LRU and served without calling the action. By
+    default requests to the same path share the response, `vary` adds the
+    query string and request headers to the cache key.
+
+    .. Usage::
+
+    users_cache = Cache(ttl=60, vary=['query', 'Accept-Language'])
+
+    @app.get('/api/users', cache=users_cache)
+    def get_users(self):
+        ...
+
+    users_cache.invalidate('/api/users')
+
+    ..Note:: Only 200 OK responses are cached.
+    """
+
+    def __init__(self,
+                 ttl: float,
+                 vary: Optional[List[str]]=None,
+                 maxsize: Optional[int]=1024) -> None:
+        """
+        Create a new response cache.
+
+        :Parameters:
+        - `ttl`: seconds a response is served from the cache.
+        - `vary`: `query` and request header names the response depends
+        on, in addition to the path.
+        - `maxsize`: max number of responses kept in the cache, when it is
+        full the least recently used response is evicted.
+        """
+
+        if ttl <= 0:
+            raise ValueError('The argument `ttl` must be positive.')
+
+        super().__init__(maxsize)
+
+        vary = [name.lower() for name in vary or []]
+
+        self._ttl = ttl
+        self._vary_query = 'query' in vary
+        self._vary_headers = tuple(name for name in vary if name != 'query')
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    @property
+    def hit_ratio(self) -> float:
+        """ Fraction of the lookups served from the cache. """
+
+        hits = self.hits
+        total = hits + self.misses
+
+        return hits / total if total else 0.0
+
+    def key(self, request_path: str, headers: Any) -> Tuple:
+        """
+        Returns the cache key of a request.
+
+        :Parameters:
+        - `request_path`: the request path, with the query string.
+        - `headers`: the request headers.
+        """
+
+        path, _, query = request_path.partition('?')
+
+        return (path,
+                query if self._vary_query else None,
+                tuple(headers.get(name) for name in self._vary_headers))
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached response for `key` or None if it is not in the
+        cache or it has expired.
+        """
+
+        entry = super().get(key)
+
+        return None if entry is None else entry[1]
+
+    def put(self, key: Hashable, response: Any, generation: int) -> None:
+        """
+        Add a response to the cache, evicting the least recently used
+        responses if the cache is full.
+
+        :Parameters:
+        - `key`: the cache key, see `key`.
+        - `response`: the encoded response.
+        - `generation`: the cache generation read before the action was
+        called.
+        """
+
+        super().put(key, (time.monotonic() + self._ttl, response),
+                    generation)
+
+    def invalidate(self, path: Optional[str]=None) -> None:
+        """
+        Remove the responses to the request path from the cache, or all
+        the responses if no path is given.
+        """
+
+        if path is None:
+            super().invalidate()
+        else:
+            self._invalidate_keys(lambda key: key[0] == path)
+
+    def _expired(self, entry: Tuple[float, Any]) -> bool:
+        return entry[0] <= time.monotonic()
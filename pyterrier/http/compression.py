@@ -0,0 +1,124 @@
+import zlib
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+
+# Content types worth compressing, besides the text/* types.
+_COMPRESSIBLE_TYPES = frozenset([
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'application/xhtml+xml',
+    'application/rss+xml',
+    'application/atom+xml',
+    'application/manifest+json',
+    'application/wasm',
+    'image/svg+xml',
+    'font/ttf',
+    'font/otf',
+    'application/vnd.ms-fontobject',
+])
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """ Returns True if the content type benefits from compression. """
+
+    if not content_type:
+        return False
+
+    mime_type = content_type.partition(';')[0].strip().lower()
+
+    return mime_type.startswith('text/') or mime_type in _COMPRESSIBLE_TYPES
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Returns True if the value of the request's `Accept-Encoding` header
+    allows a gzip encoded response, see RFC 7231 section 5.3.4.
+    """
+
+    if not accept_encoding:
+        return False
+
+    qualities = {}
+
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        params = params.strip()
+
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+
+        qualities[coding.strip().lower()] = quality
+
+    quality = qualities.get('gzip', qualities.get('x-gzip'))
+
+    if quality is None:
+        quality = qualities.get('*', 0.0)
+
+    return quality > 0
+
+
+class GzipStream:
+    """
+    Incremental gzip compressor, the output of `compress` and `flush` form
+    a single gzip member.
+    """
+
+    __slots__ = ('_compressor',)
+
+    def __init__(self, level: Optional[int]=6) -> None:
+        """
+        Create a new compressor.
+
+        :Parameters:
+        - `level`: the compression level, from 1 (fastest) to 9 (smallest).
+        """
+
+        self._compressor = zlib.compressobj(level,
+                                            zlib.DEFLATED,
+                                            16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self, mode: Optional[int]=zlib.Z_FINISH) -> bytes:
+        """
+        Returns the pending compressed data. By default it ends the stream,
+        with `zlib.Z_SYNC_FLUSH` the data sent so far can be decompressed
+        and more data can still be compressed.
+        """
+
+        return self._compressor.flush(mode)
+
+    def iter_compress(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """ Compress the chunks, skipping empty output. """
+
+        for chunk in chunks:
+            data = self._compressor.compress(chunk)
+
+            if data:
+                yield data
+
+        yield self._compressor.flush()
+
+
+def gzip_body(body: bytes, level: Optional[int]=6) -> List[bytes]:
+    """
+    Compress the response body in chunks, so a large body is never copied
+    whole, returning the compressed chunks.
+    """
+
+    view = memoryview(body)
+    chunks = (view[offset:offset + _CHUNK_SIZE]
+              for offset in range(0, len(body), _CHUNK_SIZE))
+
+    return list(GzipStream(level).iter_compress(chunks))
@@ -0,0 +1,398 @@
+import shutil
+import tempfile
+from email.parser import BytesHeaderParser
+from urllib.parse import parse_qsl
+
+from typing import Any
+from typing import BinaryIO
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+from typing import Union
+
+
+_CHUNK_SIZE = 64 * 1024
+
+# Max size of the headers of a multipart/form-data part.
+_MAX_PART_HEADERS_SIZE = 16 * 1024
+
+_SPOOL_SIZE = 1024 * 1024
+
+
+class FormError(ValueError):
+    """ The request body is not a valid form. """
+
+
+class BodyTooLarge(FormError):
+    """ The request body or one of its fields exceeds the size limits. """
+
+
+class LengthRequired(FormError):
+    """ The request body has no Content-Length, e.g. it is chunked. """
+
+
+class UploadedFile:
+    """
+    A file sent in a multipart/form-data request.
+
+    The content is kept in memory up to `spool_size` bytes and in a
+    temporary file past that, it is only read when the action reads it.
+    The temporary file is removed once the response has been sent.
+    """
+
+    def __init__(self,
+                 name: str,
+                 filename: str,
+                 content_type: str,
+                 spool_size: Optional[int]=_SPOOL_SIZE) -> None:
+        self._name = name
+        self._filename = filename
+        self._content_type = content_type
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_size)
+        self._size = 0
+
+    @property
+    def name(self) -> str:
+        """ The name of the form field. """
+        return self._name
+
+    @property
+    def filename(self) -> str:
+        """ The file name sent by the client, it must not be trusted. """
+        return self._filename
+
+    @property
+    def content_type(self) -> str:
+        return self._content_type
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def read(self, size: Optional[int]=-1) -> bytes:
+        return self._file.read(size)
+
+    def readline(self, size: Optional[int]=-1) -> bytes:
+        return self._file.readline(size)
+
+    def seek(self, offset: int, whence: Optional[int]=0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def save(self, path: str) -> None:
+        """ Copy the content to `path`, without reading it all at once. """
+
+        self._file.seek(0)
+
+        with open(path, 'wb') as f:
+            shutil.copyfileobj(self._file, f, _CHUNK_SIZE)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(self._file)
+
+    def __enter__(self) -> 'UploadedFile':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return (f'UploadedFile({self._name!r}, {self._filename!r}, '
+                f'{self._content_type!r}, size={self._size})')
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._size += len(data)
+
+
+class _Body:
+    """ Reads at most `length` bytes of the request body. """
+
+    __slots__ = ('_rfile', '_remaining')
+
+    def __init__(self, rfile: BinaryIO, length: int) -> None:
+        self._rfile = rfile
+        self._remaining = length
+
+    def read(self, size: int) -> bytes:
+        size = min(size, self._remaining)
+
+        if size <= 0:
+            return b''
+
+        data = self._rfile.read(size)
+
+        if not data:
+            raise FormError('The request body is incomplete.')
+
+        self._remaining -= len(data)
+
+        return data
+
+    def discard(self) -> None:
+        while self.read(_CHUNK_SIZE):
+            pass
+
+
+def parse_form(rfile: BinaryIO,
+               headers: Any,
+               max_body_size: Optional[int]=None,
+               max_field_size: Optional[int]=None,
+               max_file_size: Optional[int]=None,
+               spool_size: Optional[int]=_SPOOL_SIZE
+               ) -> Dict[str, Union[str, UploadedFile]]:
+    """
+    Parse a application/x-www-form-urlencoded or multipart/form-data
+    request body, reading it from `rfile` in chunks. Returns the value of
+    each field, the first one when a field is sent more than once, files are
+    returned as UploadedFile objects. The body of other content types is
+    discarded.
+
+    Raises BodyTooLarge when the body or a field exceeds its limit and
+    FormError when the body is malformed, the body is left partially read.
+
+    :Parameters:
+    - `rfile`: the request body stream.
+    - `headers`: the request headers, a `http.client.HTTPMessage`.
+    - `max_body_size`: max size of the body in bytes.
+    - `max_field_size`: max size in bytes of a field that is not a file,
+    these are kept in memory.
+    - `max_file_size`: max size in bytes of an uploaded file.
+    - `spool_size`: uploaded files larger than this are written to a
+    temporary file.
+    """
+
+    try:
+        length = int(headers.get('Content-Length') or 0)
+    except ValueError:
+        length = -1
+
+    if length < 0:
+        raise FormError('Invalid Content-Length header.')
+
+    if max_body_size is not None and length > max_body_size:
+        raise BodyTooLarge(f'The request body exceeds {max_body_size} bytes.')
+
+    body = _Body(rfile, length)
+    content_type = headers.get_content_type()
+
+    if content_type == 'application/x-www-form-urlencoded':
+        form = _parse_urlencoded(body, max_field_size)
+    elif content_type == 'multipart/form-data':
+        boundary = headers.get_param('boundary')
+
+        if not boundary:
+            raise FormError('The multipart boundary is missing.')
+
+        form = _parse_multipart(body, boundary.encode('latin-1'),
+                                max_field_size, max_file_size, spool_size)
+    else:
+        form = {}
+
+    body.discard()
+
+    return form
+
+
+def close_uploads(form: Dict[str, Any]) -> None:
+    """ Remove the temporary files of the uploaded files in the form. """
+
+    for value in form.values():
+        if isinstance(value, UploadedFile):
+            value.close()
+
+
+def _parse_urlencoded(body: _Body,
+                      max_field_size: Optional[int]) -> Dict[str, str]:
+    """
+    Parse a urlencoded body, the fields are parsed as the chunks are read
+    so only the field being read is kept in the buffer. The field size
+    limit applies to the encoded `name=value` pair.
+    """
+
+    form: Dict[str, str] = {}
+    pending = bytearray()
+
+    while True:
+        chunk = body.read(_CHUNK_SIZE)
+
+        if not chunk:
+            break
+
+        pending += chunk
+        end = pending.rfind(b'&')
+
+        if end != -1:
+            _add_fields(form, pending[:end], max_field_size)
+            del pending[:end + 1]
+
+        if max_field_size is not None and len(pending) > max_field_size:
+            name = bytes(pending[:pending.find(b'=')]).decode('utf-8',
+                                                              'replace')
+            raise BodyTooLarge(f'The field `{name}` exceeds '
+                               f'{max_field_size} bytes.')
+
+    _add_fields(form, pending, max_field_size)
+
+    return form
+
+
+def _add_fields(form: Dict[str, str],
+                data: bytearray,
+                max_field_size: Optional[int]) -> None:
+    try:
+        fields = parse_qsl(data.decode('utf-8'), keep_blank_values=True)
+    except UnicodeDecodeError:
+        raise FormError('The form data is not valid utf-8.') from None
+
+    for name, value in fields:
+        if max_field_size is not None and len(value) > max_field_size:
+            raise BodyTooLarge(f'The field `{name}` exceeds '
+                               f'{max_field_size} bytes.')
+
+        form.setdefault(name, value)
+
+
+def _parse_multipart(body: _Body,
+                     boundary: bytes,
+                     max_field_size: Optional[int],
+                     max_file_size: Optional[int],
+                     spool_size: int) -> Dict[str, Any]:
+    """
+    Parse a multipart/form-data body, see RFC 7578. The parts are copied to
+    their field or file as the chunks are read, only the last bytes of a
+    chunk, which may be the start of a boundary, are kept for the next one.
+    """
+
+    # The first boundary is not preceded by a line break.
+    delimiter = b'\r\n--' + boundary
+    keep = len(delimiter) - 1
+    buffer = bytearray(b'\r\n')
+    form: Dict[str, Any] = {}
+    value: Any = None
+
+    def fill() -> None:
+        chunk = body.read(_CHUNK_SIZE)
+
+        if not chunk:
+            raise FormError('The multipart body is incomplete.')
+
+        buffer.extend(chunk)
+
+    # Skip the preamble.
+    while True:
+        index = buffer.find(delimiter)
+
+        if index >= 0:
+            del buffer[:index + len(delimiter)]
+            break
+
+        del buffer[:-keep]
+        fill()
+
+    try:
+        while True:
+            while len(buffer) < 2:
+                fill()
+
+            if buffer.startswith(b'--'):
+                return form
+
+            headers = _read_part_headers(buffer, fill)
+            name = headers.get_param('name', header='content-disposition')
+
+            if not name:
+                raise FormError('A multipart part has no field name.')
+
+            filename = headers.get_filename()
+
+            if filename is None:
+                value: Any = bytearray()
+                write = value.extend
+                limit = max_field_size
+            else:
+                value = UploadedFile(name,
+                                     filename,
+                                     headers.get_content_type(),
+                                     spool_size)
+                write = value._write
+                limit = max_file_size
+
+            # Only the first value of a field is kept, the others are read
+            # and dropped.
+            if name not in form:
+                form[name] = value
+
+            size = 0
+
+            while True:
+                index = buffer.find(delimiter)
+                end = index if index >= 0 else len(buffer) - keep
+
+                if end > 0:
+                    size += end
+
+                    if limit is not None and size > limit:
+                        raise BodyTooLarge(f'The field `{name}` exceeds '
+                                           f'{limit} bytes.')
+
+                    write(buffer[:end])
+                    del buffer[:end]
+
+                if index >= 0:
+                    del buffer[:len(delimiter)]
+                    break
+
+                fill()
+
+            if form[name] is not value:
+                if filename is not None:
+                    value.close()
+            elif filename is None:
+                try:
+                    form[name] = value.decode('utf-8')
+                except UnicodeDecodeError:
+                    raise FormError(f'The field `{name}` is not valid '
+                                    'utf-8.') from None
+            else:
+                value.seek(0)
+    except Exception:
+        close_uploads(form)
+
+        if isinstance(value, UploadedFile):
+            value.close()
+
+        raise
+
+
+def _read_part_headers(buffer: bytearray, fill: Callable[[], None]) -> Any:
+    """
+    Consume the line break after the boundary and the part headers, the
+    headers of a part without headers are just the line break.
+    """
+
+    while True:
+        index = buffer.find(b'\r\n\r\n')
+
+        if index >= 0:
+            break
+
+        if len(buffer) > _MAX_PART_HEADERS_SIZE:
+            raise BodyTooLarge('The headers of a multipart part are too '
+                               'large.')
+
+        fill()
+
+    raw = bytes(buffer[:index + 4])
+    del buffer[:index + 4]
+
+    if not raw.startswith(b'\r\n'):
+        raise FormError('The multipart boundary is malformed.')
+
+    return BytesHeaderParser().parsebytes(raw[2:])
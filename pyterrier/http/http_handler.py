@@ -1,69 +1,235 @@
-import cgi
-import json
-import mimetypes
+import functools
+import inspect
+import itertools
 import os
-import re
+import select
+import socket
 import sys
-
-from urllib.parse import urlparse
+import threading
+import time
 
 from typing import Any
-from typing import Tuple
+from typing import Callable
+from typing import List
 from typing import Optional
-from typing import Dict
+from typing import Tuple
 
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler
 
+from pyterrier.core.action_loop import action_loop
+from pyterrier.core.application import Application
+from pyterrier.core.connections import lingering_close
 from pyterrier.core.request import Request
-from pyterrier.core.route_resolver import RouteResolver
-from pyterrier.encoders.default_json_encoder import DefaultJsonEncoder
-from .view_result import ViewResult
+from pyterrier.core.request import _current_request
+from .form_parser import FormError
+from .form_parser import close_uploads
+from .response_mixin import ResponseMixin
+from .response_mixin import _LAST_CHUNK
+from .response_mixin import _NO_BODY_STATUSES
+from .response_mixin import _STREAMING_RESULTS
+from .response_mixin import _chunk
+
+
+_COPY_BUFFER_SIZE = 64 * 1024
+
+# Seconds between the checks of an idle connection for the pooled server.
+_IDLE_POLL_INTERVAL = 0.05
+
+# Seconds a connection must be idle before the pooled server reclaims its
+# worker, a client sending its next request right away keeps it.
+_RECLAIM_AFTER = 0.5
+
+_local = threading.local()
 
 
-class HttpRequestHandler(BaseHTTPRequestHandler):
+class HttpRequestHandler(ResponseMixin, BaseHTTPRequestHandler):
     """ Le framework's HTTP handler. """
 
-    def __init__(self,
-                 route_table: Dict[str, Tuple[str, Any]],
-                 config: Dict[str, str],
-                 renderer, *args: Any) -> None:
+    # Headers and body are written separately, without TCP_NODELAY the
+    # second write waits for the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def __init__(self, app: Application, *args: Any) -> None:
         """
         Create a new request handler.
-        :param route_table: A dict with route information, the key is the route
-        as string and the value is a tuple containing the http verb and the
-        action to be executed when the route is requested.
+        :param app: The compiled application, it holds the resolver, the
+        renderer and the configuration shared between all the requests.
         """
 
-        self._route_table = route_table
-        self._resolver = RouteResolver(route_table)
-        self._config = config
-        self._renderer = renderer
+        self._app = app
+        self._requests_handled = 0
+        self._last_request = False
+        self._status = 0
+        self._connections = None
 
-        self._static_regex = re.compile(r'[/\w\-\.\_]+(?P<ext>\.\w{,4})$',
-                                        re.IGNORECASE | re.DOTALL)
+        if app.config.get('keep_alive'):
+            self.protocol_version = 'HTTP/1.1'
+            self.timeout = app.config.get('keep_alive_timeout')
 
         BaseHTTPRequestHandler.__init__(self, *args)
 
-        mimetypes.init()
+    def setup(self) -> None:
+        BaseHTTPRequestHandler.setup(self)
+
+        # The connections of the pyterrier servers are tracked so they can
+        # be drained, a new connection counts as busy until its first
+        # request has been handled.
+        self._connections = getattr(self.server, 'connections', None)
+
+        if self._connections is not None:
+            self._connections.set_busy(self, self._abort)
+
+    def finish(self) -> None:
+        try:
+            BaseHTTPRequestHandler.finish(self)
+
+            if self._unread_body:
+                lingering_close(self.connection)
+        finally:
+            if self._connections is not None:
+                self._connections.remove(self)
+
+    def handle_one_request(self) -> None:
+        """
+        Handle a single request, when keep-alive is enabled the connection
+        is closed after `max_keep_alive_requests` requests or when the
+        server is draining.
+        """
+
+        if (self._connections is not None and self._requests_handled and
+                not self._connections.set_idle(self, self._abort)):
+            self.close_connection = True
+            return
+
+        if self._requests_handled and not self._wait_for_request():
+            self.close_connection = True
+            return
+
+        max_requests = self._app.config.get('max_keep_alive_requests')
+
+        self._requests_handled += 1
+        self._last_request = (max_requests is not None and
+                              self._requests_handled >= max_requests)
+
+        # The request context is cleared after every request, the thread may
+        # be a worker handling other connections afterwards.
+        token = _current_request.set(None)
+
+        try:
+            BaseHTTPRequestHandler.handle_one_request(self)
+        finally:
+            _current_request.reset(token)
+
+        if self._last_request:
+            self.close_connection = True
+
+    def _wait_for_request(self) -> bool:
+        """
+        Wait for the next request of a persistent connection. A worker of
+        the pooled server gives up a connection idle for a while when other
+        connections are waiting for a worker, returns False then or when
+        the connection has been idle for `keep_alive_timeout` seconds.
+        """
+
+        reclaim_idle = getattr(self.server, 'reclaim_idle', None)
+
+        if reclaim_idle is None or self._has_buffered_data():
+            return True
+
+        start = time.monotonic()
+        deadline = start + self.timeout if self.timeout is not None else None
+
+        while (time.monotonic() - start < _RECLAIM_AFTER or
+               not reclaim_idle()):
+            wait = _IDLE_POLL_INTERVAL
+
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+
+                if wait <= 0:
+                    return False
+
+            readable, _, _ = select.select([self.connection], [], [], wait)
+
+            if readable:
+                return True
+
+        return False
+
+    def _has_buffered_data(self) -> bool:
+        """ Whether a pipelined request has already been read. """
+
+        timeout = self.connection.gettimeout()
+        self.connection.settimeout(0)
+
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(timeout)
+
+    def parse_request(self) -> bool:
+        # Switch to the application reloaded controllers were swapped in,
+        # once the request has been read as the connection may have been
+        # idle for a while.
+        self._app = self._app.current
+
+        if (self._connections is not None and
+                not self._connections.set_busy(self, self._abort)):
+            self._last_request = True
+
+        return BaseHTTPRequestHandler.parse_request(self)
+
+    def _abort(self) -> None:
+        """ Close the connection, called by another thread when draining. """
+
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def end_headers(self) -> None:
+        # The server may have started draining while the request was
+        # handled, and the pooled server closes the connections while
+        # others wait for a worker.
+        if self._connections is not None and self._connections.draining:
+            self._last_request = True
+
+        reclaim_idle = getattr(self.server, 'reclaim_idle', None)
+
+        if reclaim_idle is not None and reclaim_idle():
+            self._last_request = True
+
+        if self._last_request and not self.close_connection:
+            self.send_header('Connection', 'close')
+
+        BaseHTTPRequestHandler.end_headers(self)
 
     def _send_response(self,
                        results: Any, http_status: int,
                        content_type: Optional[str]='text/html'):
         """ Prepare response to be sent to the client """
 
+        self._write_response(*self._encode_response(results,
+                                                    http_status,
+                                                    content_type))
+
+    def _write_response(self,
+                        http_status: HTTPStatus,
+                        headers: List[Tuple[str, str]],
+                        parts: List[bytes]) -> None:
         self.send_response(http_status)
-        self.send_header('Content-type', content_type)
-        self.end_headers()
 
-        if results:
-            self.wfile.write(bytes(results, 'utf-8'))
+        for name, value in headers:
+            self.send_header(name, value)
 
-    def _decode_results(self, data: Any):
-        """ Decode the binary strings to utf-8 """
+        self.end_headers()
 
-        return {x[0].decode('utf-8'): x[1][0].decode('utf-8')
-                for x in data.items()}
+        for part in parts:
+            if part:
+                self.wfile.write(part)
 
     def do_DELETE(self) -> None:
         self.do_POST()
@@ -77,29 +243,44 @@ class HttpRequestHandler(BaseHTTPRequestHandler):
     def do_POST(self) -> None:
         """ Handler POST requests """
         request = Request(self)
+        _current_request.set(request)
 
         try:
-            action_info = self._resolver.resolve(self.path, request.method)
+            action_info = self._app.resolver.resolve(request.path,
+                                                     request.method)
         except KeyError:
+            self._discard_body()
             return self._send_response({}, HTTPStatus.METHOD_NOT_ALLOWED)
 
-        ctype, pdict = cgi.parse_header(self.headers.get_content_type())
+        if not action_info:
+            self._discard_body()
+            self._send_response({}, HTTPStatus.NOT_FOUND)
+            return
 
-        if ctype == 'multipart/form-data':
-            postvars = cgi.parse_multipart(self.rfile, pdict)
-        elif ctype == 'application/x-www-form-urlencoded':
-            length = int(self.headers.get('Content-Length'))
-            postvars = cgi.parse_qs(self.rfile.read(length),
-                                    keep_blank_values=1)
-        else:
-            postvars = {}
+        verb, handler, params = action_info
+        self._measure(verb, handler, self._post_action, handler)
+
+    def _post_action(self, handler: Callable) -> None:
+        try:
+            postvars = self._read_postvars()
+        except FormError as e:
+            status, headers, parts = self._encode_response(
+                *self._form_error(e))
+            headers.append(('Connection', 'close'))
+            return self._write_response(status, headers, parts)
+
+        try:
+            args = (postvars,) if postvars else ()
+            results = self._call_action(handler, *args)
+
+            if isinstance(results, _STREAMING_RESULTS):
+                self._send_stream(results)
+                return
 
-        if action_info:
-            verb, handler, params = action_info
-            decoded_str = self._decode_results(postvars)
-            results = handler(decoded_str) if decoded_str else handler()
             response = self._prepare_json_result(results)
             self._send_response(*response)
+        finally:
+            close_uploads(postvars)
 
     def do_GET(self) -> None:
         """
@@ -110,12 +291,19 @@ class HttpRequestHandler(BaseHTTPRequestHandler):
         """
 
         request = Request(self)
+        _current_request.set(request)
+
+        if self._is_metrics_request(request.path):
+            self._send_response(*self._prepare_metrics())
+            return
 
         if self.is_requesting_file(request.path):
             self._serve_file(request.path)
+            return
 
         try:
-            action_info = self._resolver.resolve(request.path, request.method)
+            action_info = self._app.resolver.resolve(request.path,
+                                                     request.method)
         except KeyError:
             return self._send_response({}, HTTPStatus.METHOD_NOT_ALLOWED)
         else:
@@ -124,100 +312,143 @@ class HttpRequestHandler(BaseHTTPRequestHandler):
                 return
 
         (verb, handler, params) = action_info
-        handler.__self__.request = request
-        results = handler(*params)
+        self._measure(verb, handler, self._get_action, handler, params)
 
-        response = None
+    def _get_action(self, handler: Callable, params: Tuple) -> None:
+        cache = self._app.response_cache(handler)
 
-        if isinstance(results, ViewResult):
-            response = self._prepare_view_result(results)
-        else:
-            response = self._prepare_json_result(results)
+        if cache is not None:
+            key = self._cache_key(cache)
+            response = cache.get(key)
 
-        self._send_response(*response)
+            if response is not None:
+                self._write_response(*response)
+                return
 
-    def _prepare_view_result(self, view_result) -> Tuple[str, HTTPStatus, str]:
-        """
-        Render the view result returning the rendered view using the default
-        template engine.
+            generation = cache.generation
 
-        view_result: It is an instance of ViewResult. See ViewResult in
-        PyTerrier.http_handler for more details.
-        """
+        results = self._call_action(handler, *params)
 
-        response: Tuple[str, HTTPStatus, str]
+        if isinstance(results, _STREAMING_RESULTS):
+            self._send_stream(results)
+            return
 
-        try:
-            result = self._renderer.render(view_result.template,
-                                           view_result.context)
-            response = (
-                    result,
-                    HTTPStatus.OK,
-                    'text/html',
-                    )
-        except Exception as e:
-            response = (
-                    str(e),
-                    HTTPStatus.INTERNAL_SERVER_ERROR,
-                    'application/json',
-                    )
+        response = self._encode_response(*self._prepare_result(results))
+
+        if cache is not None and response[0] == HTTPStatus.OK:
+            cache.put(key, response, generation)
 
-        return response
+        self._write_response(*response)
 
-    def _prepare_json_result(self, json_result) -> Tuple[str, HTTPStatus, str]:
+    def _call_action(self, handler: Callable, *args: Any) -> Any:
         """
-        Parse the json result returning a prepare response to be sent
-        to the client.
-        The response will be a tuple containing:
-        (HTTPStatus, data, content-type)
+        Call the action, the ones defined with `async def` run in the event
+        loop shared by the request threads while this thread waits.
+        """
+
+        if inspect.iscoroutinefunction(handler):
+            return action_loop.run(handler(*args))
 
-        json_result: It is a instance of HttpResult. See
-        PyTerrier.http.http_result for more details.
+        return handler(*args)
+
+    def _measure(self,
+                 verb: str,
+                 handler: Callable,
+                 action: Callable,
+                 *args: Any) -> None:
+        """
+        Call `action`, recording the request in the metrics of the route
+        resolved to `handler` and profiling it when they are enabled.
         """
 
-        response: Tuple[str, HTTPStatus, str]
+        profiler = self._app.profiler
+        session = None
+
+        if profiler is not None:
+            session = profiler.start(self.headers,
+                                     verb,
+                                     self._app.route_template(verb, handler))
+
+        if session is not None:
+            action = functools.partial(session.run, action)
 
         try:
-            response = (
-                    json.dumps(json_result.data, cls=DefaultJsonEncoder),
-                    json_result.http_status,
-                    'application/json',
-                    )
+            self._call_measured(verb, handler, action, *args)
+        finally:
+            if session is not None:
+                session.save()
+
+    def _call_measured(self,
+                       verb: str,
+                       handler: Callable,
+                       action: Callable,
+                       *args: Any) -> None:
+        metrics = self._app.metrics
+
+        if metrics is None:
+            action(*args)
+            return
 
-        except TypeError as e:
-            response = (
-                    str(e),
-                    HTTPStatus.INTERNAL_SERVER_ERROR,
-                    'application/json',
-                    )
+        route_metrics = metrics.for_action(verb, handler)
+        # Unhandled errors close the connection without a response.
+        self._status = HTTPStatus.INTERNAL_SERVER_ERROR.value
+        start = route_metrics.start()
 
-        return response
+        try:
+            action(*args)
+        finally:
+            route_metrics.finish(start, self._status)
 
-    def is_requesting_file(self, path):
-        """
-        Returns True if the it is requesting a file, otherwise, return False.
+    def send_response(self, code: int, message: Optional[str]=None) -> None:
+        self._status = int(code)
+        BaseHTTPRequestHandler.send_response(self, code, message)
 
-        path: The relative path to the static file. By default it will
-        search in the static folder in the application root.
+    def _send_stream(self, result: Any) -> None:
+        """
+        Send a StreamingViewResult or StreamingHttpResult to the client
+        while it is rendered, with chunked transfer encoding when the client
+        speaks HTTP/1.1, otherwise the end of the body is marked by closing
+        the connection. Writes block while the client is not reading, so no
+        more than a chunk is rendered ahead.
         """
 
-        match = self._static_regex.search(path)
+        chunked = (self.protocol_version >= 'HTTP/1.1' and
+                   self.request_version >= 'HTTP/1.1')
+        headers = self._stream_headers(result, chunked)
+        chunks = self._stream_body(result, headers)
 
-        return match is not None and match.group('ext') is not None
+        # Errors raised before the first chunk can still be reported.
+        try:
+            first = next(chunks, b'')
+        except Exception as e:
+            self._send_response(str(e),
+                                HTTPStatus.INTERNAL_SERVER_ERROR,
+                                'application/json')
+            return
 
-    def get_mime_type(self, path: str):
-        """
-        Returns the mime type base on the extension of the file that the
-        client is requesting.
+        self.send_response(getattr(result, 'http_status', HTTPStatus.OK))
 
-        path: The relative path to the static file. By default it will
-        search in the static folder in the application root.
-        """
+        for name, value in headers:
+            self.send_header(name, value)
 
-        match = self._static_regex.search(path)
+        if not chunked:
+            self.send_header('Connection', 'close')
 
-        if match and match.group('ext'):
-            return mimetypes.types_map[match.group('ext')]
+        self.end_headers()
+
+        try:
+            for chunk in itertools.chain([first], chunks):
+                self.wfile.write(_chunk(chunk) if chunked else chunk)
+
+            if chunked:
+                self.wfile.write(_LAST_CHUNK)
+        except ConnectionError:
+            self.close_connection = True
+        except Exception as e:
+            # The response is left incomplete, so the client knows it
+            # failed.
+            self.log_error('Error streaming the response: %r', e)
+            self.close_connection = True
 
     def _serve_file(self, path: str):
         """
@@ -227,26 +458,63 @@ class HttpRequestHandler(BaseHTTPRequestHandler):
         search in the static folder in the application root.
         """
 
-        parsed_req_url = urlparse(path)
-        path = parsed_req_url.path
-
-        path = os.path.normpath(self._config['staticfiles'] + path)
+        try:
+            response = self._app.static_files.prepare(path, self.headers)
+            static_file = open(response.path, 'rb') if response.path else None
+        except Exception:
+            self._send_response(f'Internal Error {sys.exc_info()[0]}',
+                                HTTPStatus.INTERNAL_SERVER_ERROR)
+            raise
 
         try:
-            mime_type = self.get_mime_type(path)
-        except KeyError:
-            self._send_response('Unsupported media type.',
-                                HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+            self.send_response(response.status)
+
+            for name, value in response.headers:
+                self.send_header(name, value)
+
+            if response.status not in _NO_BODY_STATUSES:
+                self.send_header('Content-Length',
+                                 str(response.content_length))
+
+            self.end_headers()
+
+            for part in response.parts:
+                if isinstance(part, tuple):
+                    self._send_file_segment(static_file, *part)
+                else:
+                    self.wfile.write(part)
+        finally:
+            if static_file is not None:
+                static_file.close()
+
+    def _send_file_segment(self, static_file: Any, offset: int, count: int):
+        """
+        Copy a segment of the file to the client, using sendfile when the
+        platform supports it.
+        """
+
+        if hasattr(os, 'sendfile'):
+            self.connection.sendfile(static_file, offset, count)
             return
 
-        if not os.path.exists(path):
-            self._send_response('File not found.', HTTPStatus.NOT_FOUND)
-        else:
-            try:
-                with open(path, encoding='utf-8') as f:
-                    results = f.read()
-                    self._send_response(results, HTTPStatus.OK, mime_type)
-            except Exception:
-                self._send_response(f'Internal Error {sys.exc_info()[0]}',
-                                    HTTPStatus.INTERNAL_SERVER_ERROR)
-                raise
+        view = memoryview(_copy_buffer())
+        static_file.seek(offset)
+
+        while count > 0:
+            read = static_file.readinto(view[:min(count, len(view))])
+
+            if not read:
+                break
+
+            self.wfile.write(view[:read])
+            count -= read
+
+
+def _copy_buffer() -> bytearray:
+    """ Buffer used to copy static files, one per thread. """
+
+    try:
+        return _local.buffer
+    except AttributeError:
+        _local.buffer = bytearray(_COPY_BUFFER_SIZE)
+        return _local.buffer
@@ -1,8 +1,13 @@
 from typing import Callable
 from typing import List
+from typing import Optional
 
+from .cache import Cache
 
-def get(route: str, additional_methods: List[str]=[]) -> Callable:
+
+def get(route: str,
+        additional_methods: List[str]=[],
+        cache: Optional[Cache]=None) -> Callable:
     """
     States that a function will be executed when a GET request
     is sent to the server.
@@ -33,9 +38,25 @@ def get(route: str, additional_methods: List[str]=[]) -> Callable:
     The format for the placeholders are {name:type} where type
     can be: str or int.
 
+    The responses of the action can be cached with the `cache` option, see
+    pyterrier.http.Cache:
+
+    @get('/users', cache=Cache(ttl=60, vary=['query']))
+    def get_users(self):
+        pass
+
+    Actions, for any HTTP verb, can be defined with `async def`. The
+    asyncio engine awaits them in its event loop without taking a thread,
+    the threaded engine runs them for compatibility in an event loop
+    shared by the request threads, each waiting for its result:
+
+    @get('/user/{id:int}')
+    async def get_user(self, id):
+        return Ok(await users.get(id))
+
     """
 
-    return lambda func: (route, 'GET', func, additional_methods)
+    return lambda func: (route, 'GET', func, additional_methods, cache)
 
 
 def post(route: str, additional_methods: List[str]=[]) -> Callable:
@@ -44,7 +65,7 @@ def post(route: str, additional_methods: List[str]=[]) -> Callable:
     is sent to the server.
     """
 
-    return lambda func: (route, 'POST', func, additional_methods)
+    return lambda func: (route, 'POST', func, additional_methods, None)
 
 
 def put(route: str, additional_methods: List[str]=[]) -> Callable:
@@ -53,7 +74,7 @@ def put(route: str, additional_methods: List[str]=[]) -> Callable:
     is sent to the server.
     """
 
-    return lambda func: (route, 'PUT', func, additional_methods)
+    return lambda func: (route, 'PUT', func, additional_methods, None)
 
 
 def patch(route: str, additional_methods: List[str]=[]) -> Callable:
@@ -62,7 +83,7 @@ def patch(route: str, additional_methods: List[str]=[]) -> Callable:
     is sent to the server.
     """
 
-    return lambda func: (route, 'PATCH', func, additional_methods)
+    return lambda func: (route, 'PATCH', func, additional_methods, None)
 
 
 def delete(route: str, additional_methods: List[str]=[]) -> Callable:
@@ -71,4 +92,4 @@ def delete(route: str, additional_methods: List[str]=[]) -> Callable:
     is sent to the server.
     """
 
-    return lambda func: (route, 'DELETE', func, additional_methods)
+    return lambda func: (route, 'DELETE', func, additional_methods, None)
@@ -0,0 +1,389 @@
+import itertools
+import zlib
+
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from http import HTTPStatus
+
+from pyterrier.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from .compression import GzipStream
+from .compression import accepts_gzip
+from .compression import gzip_body
+from .compression import is_compressible
+from .form_parser import BodyTooLarge
+from .form_parser import FormError
+from .form_parser import LengthRequired
+from .form_parser import parse_form
+from .streaming_http_result import StreamingHttpResult
+from .view_result import StreamingViewResult
+from .view_result import ViewResult
+
+
+# These responses cannot have a body, see RFC 7230 section 3.3.
+_NO_BODY_STATUSES = (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED)
+
+# Number of strings yielded by the renderer joined at once when streaming.
+_STREAM_BATCH = 64
+
+# Results sent to the client while they are rendered or serialized.
+_STREAMING_RESULTS = (StreamingViewResult, StreamingHttpResult)
+
+
+class ResponseMixin:
+    """
+    Request handling shared by the framework's HTTP handlers, independent of
+    how the request is read from and the response is written to the client.
+
+    The class using the mixin must provide the compiled application as
+    `self._app` and the current request's `headers` and `rfile`.
+    """
+
+    # Set when a response is sent without reading the request body, the
+    # connection is then closed without resetting it, see lingering_close.
+    _unread_body = False
+
+    def _discard_body(self) -> None:
+        """
+        Read the request body that has not been consumed, so the next
+        request in a persistent connection can be parsed.
+        """
+
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+
+        if self.headers.get('Transfer-Encoding') or length < 0:
+            self.close_connection = True
+            self._unread_body = True
+            return
+
+        while length > 0:
+            chunk = self.rfile.read(min(length, 65536))
+
+            if not chunk:
+                break
+
+            length -= len(chunk)
+
+    def _read_postvars(self) -> Dict[str, Any]:
+        """
+        Read and parse the form data sent in the request body, in chunks and
+        within the size limits of the application config, see parse_form.
+        """
+
+        # Chunked bodies are not supported, the action must not run with
+        # an empty form.
+        if self.headers.get('Transfer-Encoding'):
+            raise LengthRequired('The request body must be sent with a '
+                                 'Content-Length header.')
+
+        config = self._app.config
+
+        return parse_form(self.rfile,
+                          self.headers,
+                          config.get('max_body_size'),
+                          config.get('max_field_size'),
+                          config.get('max_file_size'),
+                          config.get('upload_spool_size') or 1024 * 1024)
+
+    def _form_error(self, error: FormError) -> Tuple[str, HTTPStatus, str]:
+        """
+        Returns the response to a body that could not be parsed, the rest of
+        the body is not read so the connection is closed.
+        """
+
+        self.close_connection = True
+        self._unread_body = True
+
+        if isinstance(error, BodyTooLarge):
+            status = HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        elif isinstance(error, LengthRequired):
+            status = HTTPStatus.LENGTH_REQUIRED
+        else:
+            status = HTTPStatus.BAD_REQUEST
+
+        return str(error), status, 'text/plain'
+
+    def _is_metrics_request(self, path: str) -> bool:
+        """ Returns True if the path is the metrics endpoint. """
+
+        return (self._app.metrics is not None and
+                path == self._app.config.get('metrics_path'))
+
+    def _prepare_metrics(self) -> Tuple[str, HTTPStatus, str]:
+        """ The metrics of all the routes in the Prometheus text format. """
+
+        return (self._app.metrics.render(),
+                HTTPStatus.OK,
+                METRICS_CONTENT_TYPE)
+
+    def _prepare_result(self, results) -> Tuple[str, HTTPStatus, str]:
+        """
+        Prepare the response for the value returned by an action, either
+        a ViewResult or a HttpResult.
+        """
+
+        if isinstance(results, ViewResult):
+            return self._prepare_view_result(results)
+
+        return self._prepare_json_result(results)
+
+    def _prepare_view_result(self, view_result) -> Tuple[str, HTTPStatus, str]:
+        """
+        Render the view result returning the rendered view using the default
+        template engine.
+
+        view_result: It is an instance of ViewResult. See ViewResult in
+        PyTerrier.http_handler for more details.
+        """
+
+        response: Tuple[str, HTTPStatus, str]
+
+        try:
+            result = self._app.renderer.render(view_result.template,
+                                               view_result.context)
+            response = (
+                    result,
+                    HTTPStatus.OK,
+                    'text/html',
+                    )
+        except Exception as e:
+            response = (
+                    str(e),
+                    HTTPStatus.INTERNAL_SERVER_ERROR,
+                    'application/json',
+                    )
+
+        return response
+
+    def _prepare_json_result(
+            self,
+            json_result) -> Tuple[Union[str, bytes], HTTPStatus, str]:
+        """
+        Parse the json result returning a prepare response to be sent
+        to the client.
+        The response will be a tuple containing:
+        (HTTPStatus, data, content-type)
+
+        json_result: It is a instance of HttpResult. See
+        PyTerrier.http.http_result for more details.
+        """
+
+        response: Tuple[Union[str, bytes], HTTPStatus, str]
+
+        try:
+            response = (
+                    self._app.json_dumps(json_result.data),
+                    json_result.http_status,
+                    'application/json',
+                    )
+
+        except TypeError as e:
+            response = (
+                    str(e),
+                    HTTPStatus.INTERNAL_SERVER_ERROR,
+                    'application/json',
+                    )
+
+        return response
+
+    def _cache_key(self, cache: Any) -> Tuple:
+        """
+        Returns the response cache key of the request, a response
+        compressed with gzip is cached apart from the uncompressed one.
+        """
+
+        compressed = (self._app.config.get('compress_min_size') is not None
+                      and accepts_gzip(self.headers.get('Accept-Encoding')))
+
+        return cache.key(self.path, self.headers) + (compressed,)
+
+    def _stream_headers(self,
+                        result: Any,
+                        chunked: bool) -> List[Tuple[str, str]]:
+        """
+        Returns the headers of a StreamingViewResult or StreamingHttpResult
+        response.
+        """
+
+        content_type = (result.content_type
+                        if isinstance(result, StreamingHttpResult)
+                        else 'text/html')
+        headers = [('Content-type', content_type)]
+
+        if self._app.config.get('compress_min_size') is not None:
+            headers.append(('Vary', 'Accept-Encoding'))
+
+            if accepts_gzip(self.headers.get('Accept-Encoding')):
+                headers.append(('Content-Encoding', 'gzip'))
+
+        if chunked:
+            headers.append(('Transfer-Encoding', 'chunked'))
+
+        return headers
+
+    def _stream_body(self,
+                     result: Any,
+                     headers: List[Tuple[str, str]]) -> Iterator[bytes]:
+        """
+        Render the StreamingViewResult, or serialize the rows of the
+        StreamingHttpResult, returning the body in chunks of at least
+        `buffer_size` bytes, compressed if the headers say so.
+        """
+
+        stream = None
+
+        if ('Content-Encoding', 'gzip') in headers:
+            stream = GzipStream(self._app.config.get('compress_level') or 6)
+
+        if isinstance(result, StreamingHttpResult):
+            pieces = self._stream_rows(result)
+        else:
+            pieces = iter(self._app.renderer.stream(result.template,
+                                                    result.context))
+
+        # Renderers yield many small strings, they are joined in batches so
+        # the loop runs once per batch. The size is counted in characters,
+        # never more than the encoded bytes, and the text is encoded once
+        # per chunk.
+        buffer: List[str] = []
+        size = 0
+
+        while True:
+            batch = list(itertools.islice(pieces, _STREAM_BATCH))
+
+            if not batch:
+                break
+
+            text = ''.join(batch)
+            buffer.append(text)
+            size += len(text)
+
+            if size >= result.buffer_size:
+                chunk = ''.join(buffer).encode('utf-8')
+                buffer = []
+                size = 0
+
+                if stream is not None:
+                    chunk = (stream.compress(chunk) +
+                             stream.flush(zlib.Z_SYNC_FLUSH))
+
+                yield chunk
+
+        chunk = ''.join(buffer).encode('utf-8')
+
+        if stream is not None:
+            chunk = stream.compress(chunk) + stream.flush()
+
+        if chunk:
+            yield chunk
+
+    def _stream_rows(self, result: Any) -> Iterator[str]:
+        """ Serialize the rows as a JSON array or newline delimited JSON. """
+
+        dumps = self._app.json_dumps
+        separator = '\n' if result.ndjson else ','
+
+        if not result.ndjson:
+            yield '['
+
+        for index, row in enumerate(result.data):
+            data = dumps(row)
+
+            if isinstance(data, bytes):
+                data = data.decode('utf-8')
+
+            if result.ndjson:
+                yield data
+                yield separator
+            else:
+                if index:
+                    yield separator
+                yield data
+
+        if not result.ndjson:
+            yield ']'
+
+    def _encode_response(
+            self,
+            results: Any,
+            http_status: int,
+            content_type: Optional[str]='text/html'
+    ) -> Tuple[HTTPStatus, List[Tuple[str, str]], List[bytes]]:
+        """
+        Returns the status, headers and body parts of the response for a
+        prepared result.
+
+        The body is gzip compressed when compression is enabled, it is at
+        least `compress_min_size` bytes long and the client accepts it.
+        """
+
+        http_status = HTTPStatus(http_status)
+        headers = [('Content-type', content_type)]
+
+        if http_status in _NO_BODY_STATUSES:
+            return http_status, headers, []
+
+        if isinstance(results, bytes):
+            body = results
+        else:
+            body = bytes(results, 'utf-8') if results else b''
+        parts = [body]
+        min_size = self._app.config.get('compress_min_size')
+
+        if (min_size is not None and body and len(body) >= min_size and
+                is_compressible(content_type)):
+            headers.append(('Vary', 'Accept-Encoding'))
+
+            if (self.headers is not None and
+                    accepts_gzip(self.headers.get('Accept-Encoding'))):
+                headers.append(('Content-Encoding', 'gzip'))
+                parts = gzip_body(body,
+                                  self._app.config.get('compress_level') or 6)
+
+        headers.append(('Content-Length', str(sum(map(len, parts)))))
+
+        return http_status, headers, parts
+
+    def is_requesting_file(self, path):
+        """
+        Returns True if the it is requesting a file, otherwise, return False.
+
+        path: The relative path to the static file. By default it will
+        search in the static folder in the application root.
+        """
+
+        match = self._app.static_regex.search(path)
+
+        return match is not None and match.group('ext') is not None
+
+    def get_mime_type(self, path: str):
+        """
+        Returns the mime type base on the extension of the file that the
+        client is requesting.
+
+        path: The relative path to the static file. By default it will
+        search in the static folder in the application root.
+        """
+
+        match = self._app.static_regex.search(path)
+
+        if match and match.group('ext'):
+            return self._app.mime_types[match.group('ext')]
+
+
+def _chunk(data: bytes) -> bytes:
+    """ Frame the data as a chunk of a chunked transfer encoded body. """
+
+    return b'%X\r\n%s\r\n' % (len(data), data)
+
+
+# Ends a chunked transfer encoded body.
+_LAST_CHUNK = b'0\r\n\r\n'
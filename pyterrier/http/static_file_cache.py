@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+from typing import Any
+from typing import Optional
+
+
+class StaticFileCache:
+    """
+    Size bounded LRU cache of small static files.
+
+    Entries are the StaticFile objects, holding the file contents and the
+    precomputed response headers. The StaticFiles handler checks the file's
+    modification time at most once every `check_interval` seconds, so
+    repeated requests to a cached file do not touch the disk.
+    """
+
+    def __init__(self,
+                 maxsize: int,
+                 max_file_size: Optional[int]=256 * 1024,
+                 check_interval: Optional[float]=1.0) -> None:
+        """
+        Create a new static file cache.
+
+        :Parameters:
+        - `maxsize`: max number of bytes of file contents kept in the cache.
+        - `max_file_size`: files bigger than this are never cached.
+        - `check_interval`: seconds a cached file is served without
+        checking if it has changed on disk.
+        """
+
+        if not isinstance(maxsize, int) or maxsize <= 0:
+            raise ValueError('The argument `maxsize` must be a positive int.')
+
+        self._maxsize = maxsize
+        self._max_file_size = min(max_file_size, maxsize)
+        self._check_interval = check_interval
+        self._entries: OrderedDict = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @property
+    def size(self) -> int:
+        """ Number of bytes of file contents in the cache. """
+
+        return self._size
+
+    @property
+    def check_interval(self) -> float:
+        return self._check_interval
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def accepts(self, size: int) -> bool:
+        """ Returns True if a file with `size` bytes can be cached. """
+
+        return size <= self._max_file_size
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+            return entry
+
+    def put(self, key: str, entry: Any) -> None:
+        """
+        Add a StaticFile to the cache, evicting the least recently used
+        files until the contents fit in `maxsize` bytes.
+        """
+
+        with self._lock:
+            self._remove(key)
+
+            self._entries[key] = entry
+            self._size += len(entry.data)
+
+            while self._size > self._maxsize:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.data)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self._size -= len(entry.data)
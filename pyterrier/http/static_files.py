@@ -0,0 +1,479 @@
+import os
+import re
+import time
+import uuid
+from email.utils import formatdate
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import Any
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from .compression import accepts_gzip
+from .compression import is_compressible
+from .static_file_cache import StaticFileCache
+
+
+# A part of the response body, either a buffer or a (offset, count) segment
+# of the static file.
+BodyPart = Union[bytes, memoryview, Tuple[int, int]]
+
+_RANGE_REGEX = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+
+
+class StaticFile:
+    """
+    Metadata of a file in the static files directory, with the validators
+    and headers of its responses computed once. `data` holds the contents
+    of the files kept in the hot file cache.
+    """
+
+    __slots__ = ('path', 'size', 'mtime', 'mtime_ns', 'content_type',
+                 'encoding', 'etag', 'last_modified', 'headers', 'data',
+                 'checked')
+
+    def __init__(self,
+                 path: str,
+                 size: int,
+                 mtime: float,
+                 content_type: str,
+                 mtime_ns: Optional[int]=None,
+                 data: Optional[bytes]=None,
+                 encoding: Optional[str]=None) -> None:
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.mtime_ns = mtime_ns if mtime_ns is not None else int(mtime * 1e9)
+        self.content_type = content_type
+        self.encoding = encoding
+        self.etag = f'"{self.mtime_ns:x}-{size:x}"'
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self.headers = [
+            ('Content-type', content_type),
+            ('Accept-Ranges', 'bytes'),
+            ('ETag', self.etag),
+            ('Last-Modified', self.last_modified),
+        ]
+
+        if encoding is not None:
+            self.headers.append(('Content-Encoding', encoding))
+            self.headers.append(('Vary', 'Accept-Encoding'))
+
+        self.data = data
+        self.checked = time.monotonic()
+
+    @classmethod
+    def from_stat(cls,
+                  path: str,
+                  stat: os.stat_result,
+                  content_type: str,
+                  data: Optional[bytes]=None,
+                  encoding: Optional[str]=None) -> 'StaticFile':
+        return cls(path, stat.st_size, stat.st_mtime, content_type,
+                   stat.st_mtime_ns, data, encoding)
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """ Returns True if the file has not changed since it was read. """
+
+        return stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.size
+
+
+class StaticResponse:
+    """
+    The response to a static file request. The body is a list of parts,
+    buffers are sent as they are and (offset, count) segments are copied from
+    the file in `path`, so the file never needs to be loaded in memory.
+    """
+
+    __slots__ = ('status', 'headers', 'parts', 'path')
+
+    def __init__(self,
+                 status: HTTPStatus,
+                 headers: Optional[List[Tuple[str, str]]]=None,
+                 parts: Optional[List[BodyPart]]=None,
+                 path: Optional[str]=None) -> None:
+        self.status = status
+        self.headers = headers or []
+        self.parts = parts or []
+        self.path = path
+
+    @property
+    def content_length(self) -> int:
+        return sum(part[1] if isinstance(part, tuple) else len(part)
+                   for part in self.parts)
+
+
+class StaticFiles:
+    """
+    Serve the files in the application's static files directory, with
+    support for conditional requests and for single and multiple byte
+    ranges.
+
+    When a compressible file has an up to date `.gz` sibling, e.g. created
+    with `pyterrier --precompress`, it is sent to the clients accepting
+    gzip, unless they request a range of the file.
+    """
+
+    # More ranges than this in a single request are ignored and the whole
+    # file is sent instead.
+    max_ranges = 16
+
+    def __init__(self,
+                 directory: str,
+                 mime_types: Mapping[str, str],
+                 cache: Optional[StaticFileCache]=None) -> None:
+        """
+        Create a new static files handler.
+
+        :Parameters:
+        - `directory`: the static files directory.
+        - `mime_types`: map of file extensions to mime types.
+        - `cache`: optional cache of the contents of small, frequently
+        requested files.
+        """
+
+        self._directory = os.path.abspath(directory)
+        self._mime_types = mime_types
+        self._cache = cache
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def cache(self) -> Optional[StaticFileCache]:
+        return self._cache
+
+    def find(self, path: str) -> Optional[StaticFile]:
+        """
+        Returns the StaticFile for the request path or None if it does not
+        exist or it is outside the static files directory.
+
+        ..Note:: Raises KeyError if the file extension has no known mime
+        type.
+        """
+
+        filename = os.path.normpath(
+            os.path.join(self._directory, path.lstrip('/')))
+
+        if os.path.commonpath([self._directory, filename]) != self._directory:
+            return None
+
+        _, ext = os.path.splitext(filename)
+        content_type = self._mime_types[ext]
+
+        return self._lookup(filename, content_type)
+
+    def _lookup(self,
+                filename: str,
+                content_type: str,
+                encoding: Optional[str]=None) -> Optional[StaticFile]:
+        """
+        Returns the StaticFile for the file name, from the cache when it was
+        checked recently, or None if it does not exist.
+        """
+
+        cache = self._cache
+        cached = cache.get(filename) if cache is not None else None
+        now = time.monotonic()
+
+        if cached is not None and now - cached.checked < cache.check_interval:
+            return cached
+
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            stat = None
+
+        if stat is None or not os.path.isfile(filename):
+            if cached is not None:
+                cache.remove(filename)
+            return None
+
+        if cached is not None and cached.matches(stat):
+            cached.checked = now
+            return cached
+
+        if cache is None or not cache.accepts(stat.st_size):
+            if cached is not None:
+                cache.remove(filename)
+            return StaticFile.from_stat(filename, stat, content_type,
+                                        encoding=encoding)
+
+        return self._load(filename, content_type, encoding)
+
+    def _load(self,
+              filename: str,
+              content_type: str,
+              encoding: Optional[str]) -> Optional[StaticFile]:
+        """ Read the file and add it to the cache. """
+
+        try:
+            with open(filename, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                data = f.read()
+        except OSError:
+            self._cache.remove(filename)
+            return None
+
+        # The file changed while it was read.
+        if len(data) != stat.st_size:
+            self._cache.remove(filename)
+            return StaticFile.from_stat(filename, stat, content_type,
+                                        encoding=encoding)
+
+        static_file = StaticFile.from_stat(filename, stat, content_type, data,
+                                           encoding)
+        self._cache.put(filename, static_file)
+
+        return static_file
+
+    def prepare(self, path: str, request_headers: Any) -> StaticResponse:
+        """
+        Prepare the response for a static file request.
+
+        :Parameters:
+        - `path`: the request path, relative to the static files directory.
+        - `request_headers`: the request headers, used to read the
+        conditional request, `Accept-Encoding` and `Range` headers.
+        """
+
+        try:
+            static_file = self.find(path)
+        except KeyError:
+            return _text_response(HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+                                  'Unsupported media type.')
+
+        if static_file is None:
+            return _text_response(HTTPStatus.NOT_FOUND, 'File not found.')
+
+        vary = []
+        encoded = None
+
+        if is_compressible(static_file.content_type):
+            encoded = self._find_encoded(static_file)
+
+            if encoded is not None:
+                if ('Range' not in request_headers and
+                        accepts_gzip(request_headers.get('Accept-Encoding'))):
+                    static_file = encoded
+                else:
+                    vary.append(('Vary', 'Accept-Encoding'))
+
+        if not_modified(static_file, request_headers):
+            headers = [('ETag', static_file.etag),
+                       ('Last-Modified', static_file.last_modified)]
+
+            # Both the compressed and the identity variant vary on the
+            # accepted encodings.
+            if encoded is not None:
+                headers.append(('Vary', 'Accept-Encoding'))
+
+            return StaticResponse(HTTPStatus.NOT_MODIFIED, headers)
+
+        size = static_file.size
+        ranges = parse_range(request_headers.get('Range'), size)
+
+        if_range = request_headers.get('If-Range')
+
+        if ranges is not None and if_range is not None and \
+                if_range.strip() not in (static_file.etag,
+                                         static_file.last_modified):
+            ranges = None
+
+        whole_file = StaticResponse(HTTPStatus.OK,
+                                    static_file.headers + vary,
+                                    [_body_part(static_file, 0, size)],
+                                    _body_path(static_file))
+
+        if ranges is None or len(ranges) > self.max_ranges:
+            return whole_file
+
+        if not ranges:
+            response = _text_response(
+                HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, '')
+            response.headers.append(('Content-Range', f'bytes */{size}'))
+            return response
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            headers = static_file.headers + vary
+            headers.append(('Content-Range', f'bytes {start}-{end}/{size}'))
+
+            return StaticResponse(HTTPStatus.PARTIAL_CONTENT,
+                                  headers,
+                                  [_body_part(static_file,
+                                              start,
+                                              end - start + 1)],
+                                  _body_path(static_file))
+
+        response = self._multipart_response(static_file, ranges, vary)
+
+        # Ranges covering most of the file take more bytes as a multipart
+        # body than the file itself.
+        if response.content_length >= whole_file.content_length:
+            return whole_file
+
+        return response
+
+    def _find_encoded(self, static_file: StaticFile) -> Optional[StaticFile]:
+        """
+        Returns the gzip compressed sibling of the file, if it exists and it
+        is not older than the file.
+        """
+
+        encoded = self._lookup(static_file.path + '.gz',
+                               static_file.content_type,
+                               'gzip')
+
+        if encoded is None or encoded.mtime < static_file.mtime:
+            return None
+
+        return encoded
+
+    def _multipart_response(self,
+                            static_file: StaticFile,
+                            ranges: List[Tuple[int, int]],
+                            vary: List[Tuple[str, str]]) -> StaticResponse:
+        boundary = uuid.uuid4().hex
+        size = static_file.size
+        parts: List[BodyPart] = []
+
+        for start, end in ranges:
+            parts.append((f'\r\n--{boundary}\r\n'
+                          f'Content-Type: {static_file.content_type}\r\n'
+                          f'Content-Range: bytes {start}-{end}/{size}\r\n'
+                          '\r\n').encode('latin-1'))
+            parts.append(_body_part(static_file, start, end - start + 1))
+
+        parts.append(f'\r\n--{boundary}--\r\n'.encode('latin-1'))
+
+        headers = [
+            ('Content-type', f'multipart/byteranges; boundary={boundary}'),
+            ('Accept-Ranges', 'bytes'),
+            ('ETag', static_file.etag),
+            ('Last-Modified', static_file.last_modified),
+        ] + vary
+
+        return StaticResponse(HTTPStatus.PARTIAL_CONTENT,
+                              headers,
+                              parts,
+                              _body_path(static_file))
+
+
+def not_modified(static_file: StaticFile, request_headers: Any) -> bool:
+    """
+    Returns True if the client's copy of the file is still valid, according
+    to the `If-None-Match` or, when it is not sent, the `If-Modified-Since`
+    request headers.
+    """
+
+    if_none_match = request_headers.get('If-None-Match')
+
+    if if_none_match is not None:
+        # Weak comparison, the W/ prefix is ignored, see RFC 7232 section
+        # 3.2.
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        tags = [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+
+        return '*' in tags or static_file.etag in tags
+
+    if_modified_since = request_headers.get('If-Modified-Since')
+
+    if if_modified_since is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return False
+
+    # HTTP dates have a resolution of one second.
+    return int(static_file.mtime) <= since
+
+
+def parse_range(value: Optional[str],
+                size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse the value of a `Range` header returning a list of (start, end)
+    tuples, with inclusive ends. The ranges are sorted and the overlapping
+    or adjacent ones merged, so a file part is never sent twice.
+
+    ..Note:: Returns None if there is no header or it cannot be parsed, in
+    which case the header must be ignored, and an empty list if none of the
+    ranges can be satisfied.
+    """
+
+    if not value:
+        return None
+
+    unit, _, ranges_spec = value.partition('=')
+
+    if unit.strip().lower() != 'bytes' or not ranges_spec:
+        return None
+
+    ranges = []
+
+    for spec in ranges_spec.split(','):
+        match = _RANGE_REGEX.match(spec)
+
+        if match is None:
+            return None
+
+        first, last = match.groups()
+
+        if not first and not last:
+            return None
+
+        if not first:
+            # Suffix range, the last N bytes of the file.
+            length = int(last)
+
+            if length == 0 or size == 0:
+                continue
+
+            ranges.append((max(size - length, 0), size - 1))
+            continue
+
+        start = int(first)
+        end = int(last) if last else size - 1
+
+        if last and end < start:
+            return None
+
+        if start >= size:
+            continue
+
+        ranges.append((start, min(end, size - 1)))
+
+    merged: List[Tuple[int, int]] = []
+
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def _text_response(status: HTTPStatus, message: str) -> StaticResponse:
+    return StaticResponse(status,
+                          [('Content-type', 'text/html')],
+                          [message.encode('utf-8')] if message else [])
+
+
+def _body_part(static_file: StaticFile, offset: int, count: int) -> BodyPart:
+    if static_file.data is None:
+        return (offset, count)
+
+    return memoryview(static_file.data)[offset:offset + count]
+
+
+def _body_path(static_file: StaticFile) -> Optional[str]:
+    """ Cached files are sent from memory and do not need to be opened. """
+
+    return static_file.path if static_file.data is None else None
@@ -0,0 +1,53 @@
+from http import HTTPStatus
+from typing import Any
+from typing import Iterable
+from typing import Optional
+
+from .http_result import HttpResult
+
+
+class StreamingHttpResult(HttpResult):
+    """
+    A HttpResult with the rows of an iterator or generator, they are
+    serialized to JSON and sent to the client one by one, so the rows never
+    need to be all in memory.
+
+    The rows are sent as a JSON array or, with `ndjson`, as newline
+    delimited JSON, with chunked transfer encoding, or delimited by closing
+    the connection for HTTP/1.0 clients.
+    """
+
+    def __init__(self,
+                 rows: Iterable[Any],
+                 http_status: Optional[int]=HTTPStatus.OK,
+                 ndjson: Optional[bool]=False,
+                 buffer_size: Optional[int]=8192) -> None:
+        """
+        Constructor
+
+        :Parameters:
+        - `rows`: the rows to be serialized, any iterable.
+        - `http_status`: the response status.
+        - `ndjson`: send newline delimited JSON instead of a JSON array.
+        - `buffer_size`: the serialized rows are sent in chunks of at least
+        this number of bytes.
+        """
+
+        if buffer_size <= 0:
+            raise ValueError('The argument `buffer_size` must be positive.')
+
+        super().__init__(rows, http_status)
+        self._ndjson = ndjson
+        self._buffer_size = buffer_size
+
+    @property
+    def ndjson(self) -> bool:
+        return self._ndjson
+
+    @property
+    def buffer_size(self) -> int:
+        return self._buffer_size
+
+    @property
+    def content_type(self) -> str:
+        return 'application/x-ndjson' if self._ndjson else 'application/json'
@@ -1,4 +1,5 @@
 from typing import Any
+from typing import Optional
 
 
 class ViewResult:
@@ -30,3 +31,38 @@ class ViewResult:
     @property
     def context(self) -> Any:
         return self._context
+
+
+class StreamingViewResult(ViewResult):
+    """
+    A view result that is rendered and sent to the client in chunks, so the
+    first bytes of a large page are sent before it is fully rendered and
+    the whole page is never held in memory.
+
+    The chunks are sent with chunked transfer encoding, or delimited by
+    closing the connection for HTTP/1.0 clients.
+    """
+
+    def __init__(self,
+                 template: str,
+                 context: Any = {},
+                 buffer_size: Optional[int] = 8192) -> None:
+        """
+        Constructor
+
+        :Parameters:
+        - `template`: the template that will be used to render the view.
+        - `context`: the object to be used as the view context.
+        - `buffer_size`: the rendered output is sent in chunks of at least
+        this number of bytes.
+        """
+
+        if buffer_size <= 0:
+            raise ValueError('The argument `buffer_size` must be positive.')
+
+        super().__init__(template, context)
+        self._buffer_size = buffer_size
+
+    @property
+    def buffer_size(self) -> int:
+        return self._buffer_size
@@ -1,19 +1,35 @@
+import signal
 import sys
-import re
+import threading
+import traceback
 
 from os.path import join
+from types import MethodType
 from os.path import dirname
 
 from typing import Tuple
 from typing import Any
+from typing import Callable
 from typing import Optional
 from typing import Dict
 from typing import List
 
+from .encoders.json_backends import JSON_BACKENDS
+from .http.cache import Cache
 from .http.http_handler import HttpRequestHandler
+from .http.static_file_cache import StaticFileCache
 from .core.route_converter import RouteConverter
+from .core.application import Application
+from .core.request import ActionContext
+from .core.route_cache import RouteCache
 from .core.threaded_server import ThreadedServer
+from .core.async_server import AsyncServer
+from .core.pooled_server import PooledServer
+from .core.prefork import PreforkSupervisor
 from .core.route_discovery import RouteDiscovery
+from .core.controller_watcher import ControllerWatcher
+from .core import reexec
+from .core.action_loop import action_loop
 from .renderers.jinja2_renderer import Jinja2Renderer
 from .renderers.base_renderer import BaseRenderer
 
@@ -26,7 +42,11 @@ class PyTerrier():
             port: Optional[int]=8000,
             template_dir: Optional[str]='templates',
             static_files: Optional[str]='static',
-            renderer: Optional[BaseRenderer]=Jinja2Renderer) -> None:
+            renderer: Optional[BaseRenderer]=Jinja2Renderer,
+            route_cache_size: Optional[int]=None,
+            static_cache_size: Optional[int]=None,
+            renderer_options: Optional[Dict[str, Any]]=None,
+            json_backend: Optional[str]='json') -> None:
         """
         Create a new PyTerrier application
 
@@ -39,6 +59,16 @@ class PyTerrier():
         stylesheets, fonts.
         - `renderer`: Specify the default template engine that will be used
         by the framework.
+        - `route_cache_size`: Keep up to this number of resolved request paths
+        in a LRU cache in front of the route table. Disabled by default.
+        - `static_cache_size`: Keep up to this number of bytes of small static
+        files in memory, so serving them needs no disk access. Disabled by
+        default.
+        - `renderer_options`: Keyword arguments for the renderer, e.g.
+        `{'production': True}` precompiles the Jinja2 templates at startup.
+        - `json_backend`: The library serializing the results to JSON, `json`
+        (the standard library), `orjson`, `ujson` or `auto` for the fastest
+        one installed.
         """
 
         if not issubclass(renderer, BaseRenderer):
@@ -46,6 +76,10 @@ class PyTerrier():
                          'pyterrier.renderers.BaseTemplateRenderer')
             raise TypeError(error_msg)
 
+        if json_backend not in JSON_BACKENDS:
+            raise ValueError(f'Unknown JSON backend `{json_backend}`, the '
+                             f'options are {", ".join(JSON_BACKENDS)}.')
+
         self._hostname = hostname
         self._port = port
 
@@ -53,10 +87,45 @@ class PyTerrier():
         self._static_files = join(dirname(sys.argv[0]), static_files)
 
         self._route_discovery = RouteDiscovery()
+        self._controller_actions: Dict[str, List[Callable]] = {}
         self.route_converter = RouteConverter()
-        self._route_table: Dict[str, Tuple[str, Any]] = {}
+        self._route_table: Dict[str, List[Tuple[str, Callable]]] = {}
+        self._response_caches: Dict[Callable, Cache] = {}
+        self._route_cache = (RouteCache(route_cache_size)
+                             if route_cache_size else None)
+        self._static_file_cache = (StaticFileCache(static_cache_size)
+                                   if static_cache_size else None)
+
+        self._json_backend = json_backend
+        self._renderer = renderer(self._template_dir,
+                                  **(renderer_options or {}))
+        self._server = None
+        self._app: Optional[Application] = None
+        self._replacing = threading.Lock()
+
+    @property
+    def route_cache(self) -> Optional[RouteCache]:
+        """
+        The cache of resolved request paths, exposes the hit and miss
+        counters. None if the cache is disabled.
+        """
+
+        return self._route_cache
 
-        self._renderer = renderer(self._template_dir)
+    @property
+    def static_file_cache(self) -> Optional[StaticFileCache]:
+        """ The cache of static files, None if the cache is disabled. """
+
+        return self._static_file_cache
+
+    @property
+    def server(self):
+        """
+        The running server, e.g. a PooledServer exposes the `queue_depth`
+        and `active_workers` gauges. None before `run` is called.
+        """
+
+        return self._server
 
     def _print_config(self) -> None:
         """ Print the server information. """
@@ -65,34 +134,249 @@ class PyTerrier():
         print(f'=> template_dir: {self._template_dir}')
         print(f'=> static_dir: {self._static_files}')
 
-    def run(self) -> None:
+    def _compile(self, **options: Any) -> Application:
         """
-        Start the server and listen on the specified port
-        for new connections.
+        Build the compiled application shared by all the request handlers,
+        it is replaced when controllers are reloaded.
+
+        :Parameters:
+        - `options`: additional options merged in the application config.
         """
 
-        options = {
+        config = {
             'templates': self._template_dir,
-            'staticfiles': self._static_files
+            'staticfiles': self._static_files,
+            'json_backend': self._json_backend,
         }
+        config.update(options)
+
+        self._app = Application(self._route_table,
+                                config,
+                                self._renderer,
+                                self._route_cache,
+                                self._static_file_cache,
+                                self._response_caches)
+
+        return self._app
+
+    def run(self,
+            engine: Optional[str]='threaded',
+            workers: Optional[int]=None,
+            queue_size: Optional[int]=None,
+            processes: Optional[int]=None,
+            keep_alive: Optional[bool]=False,
+            keep_alive_timeout: Optional[float]=5,
+            max_keep_alive_requests: Optional[int]=100,
+            compress_min_size: Optional[int]=None,
+            compress_level: Optional[int]=6,
+            max_body_size: Optional[int]=None,
+            max_field_size: Optional[int]=1024 * 1024,
+            max_file_size: Optional[int]=None,
+            upload_spool_size: Optional[int]=1024 * 1024,
+            metrics_path: Optional[str]=None,
+            profile_dir: Optional[str]=None,
+            profile_every: Optional[int]=None,
+            profile_secret: Optional[str]=None,
+            reload_controllers: Optional[bool]=False,
+            reload_interval: Optional[float]=1.0,
+            drain_timeout: Optional[float]=30) -> None:
+        """
+        Start the server and listen on the specified port
+        for new connections.
 
-        def _handler(*args):
-            return HttpRequestHandler(
-                self._route_table,
-                options,
-                self._renderer,
-                *args
-            )
+        :Parameters:
+        - `engine`: The server engine, `threaded` uses one thread per
+        connection and `asyncio` handles the connections in an event loop.
+        - `workers`: With the `threaded` engine, handle the connections
+        with a fixed number of worker threads instead of a thread per
+        connection. With the `asyncio` engine, the max number of threads
+        running actions that are not defined with `async def`.
+        - `queue_size`: With the `threaded` engine and `workers`, the max
+        number of connections waiting for a free worker, when the queue is
+        full new connections get a 503 response. Defaults to 4 times the
+        number of workers.
+        - `processes`: Fork this number of worker processes sharing the
+        listening socket, to use more than one CPU core. The routes are
+        compiled once before forking. Only on platforms supporting fork.
+        - `keep_alive`: Speak HTTP/1.1 and keep the connections open between
+        requests, pipelined requests are supported. Disabled by default.
+        - `keep_alive_timeout`: Seconds an idle persistent connection is
+        kept open.
+        - `max_keep_alive_requests`: Close a persistent connection after it
+        has served this number of requests.
+        - `compress_min_size`: gzip compress the JSON and HTML responses of
+        at least this number of bytes, for the clients that accept it.
+        Disabled by default.
+        - `compress_level`: The gzip compression level, from 1 (fastest) to
+        9 (smallest).
+        - `max_body_size`: Reject the requests with a body larger than this
+        number of bytes with a 413 response. Unlimited by default.
+        - `max_field_size`: Max size in bytes of a form field, other than a
+        file, larger fields get a 413 response.
+        - `max_file_size`: Max size in bytes of an uploaded file, larger
+        files get a 413 response. Unlimited by default.
+        - `upload_spool_size`: Uploaded files larger than this number of
+        bytes are written to a temporary file instead of kept in memory.
+        - `metrics_path`: Record the request count, status codes, requests in
+        flight and latency of every route and serve them at this path, e.g.
+        `/metrics`, in the Prometheus text format. Disabled by default.
+        - `profile_dir`: Profile a sample of the requests with cProfile and
+        write their stats to `.pstats` files in this folder, one folder per
+        route. Disabled by default.
+        - `profile_every`: With `profile_dir`, profile one every this number
+        of requests.
+        - `profile_secret`: With `profile_dir`, profile the requests sending
+        this value in the `X-PyTerrier-Profile` header.
+        - `reload_controllers`: Watch the controllers folder and import the
+        controllers added or modified again while the server is running, the
+        routes of the other controllers, the templates and the caches are
+        kept. Not supported with `processes`. Disabled by default.
+        - `reload_interval`: Seconds between two checks of the controllers.
+        - `drain_timeout`: On SIGTERM, stop accepting connections, close the
+        idle ones and give the requests in flight up to this number of
+        seconds to finish. On SIGHUP or SIGUSR2, start a new process with
+        the same command, sharing the listening socket, and stop this one
+        the same way once the new one is accepting connections.
+        """
 
+        if compress_level is not None and not 1 <= compress_level <= 9:
+            raise ValueError('The argument `compress_level` must be between '
+                             '1 and 9.')
+
+        if reload_controllers and processes:
+            raise ValueError('The argument `reload_controllers` can not be '
+                             'used with `processes`.')
+
+        app = self._compile(
+            keep_alive=keep_alive,
+            keep_alive_timeout=keep_alive_timeout,
+            max_keep_alive_requests=max_keep_alive_requests if keep_alive
+            else None,
+            compress_min_size=compress_min_size,
+            compress_level=compress_level,
+            max_body_size=max_body_size,
+            max_field_size=max_field_size,
+            max_file_size=max_file_size,
+            upload_spool_size=upload_spool_size,
+            metrics_path=metrics_path,
+            profile_dir=profile_dir,
+            profile_every=profile_every,
+            profile_secret=profile_secret,
+        )
+
+        def _handler(*args):
+            return HttpRequestHandler(app, *args)
+
+        address = (self._hostname, self._port)
+
+        if engine not in ('threaded', 'asyncio'):
+            raise ValueError(f'Unknown server engine `{engine}`, the '
+                             'options are `threaded` and `asyncio`.')
+
+        # Set when this process replaces a previous one.
+        sock = reexec.inherited_socket()
+
+        if engine == 'threaded' and workers:
+            self._server = PooledServer(address,
+                                        _handler,
+                                        workers,
+                                        queue_size or workers * 4,
+                                        sock)
+
+            if app.metrics is not None:
+                self._server.register_metrics(app.metrics)
+        elif engine == 'threaded':
+            self._server = ThreadedServer(address, _handler, sock)
+        else:
+            self._server = AsyncServer(address, app, workers, sock)
+
+        if processes:
+            self._server = PreforkSupervisor(self._server,
+                                             processes,
+                                             drain_timeout)
+
+        watcher = (ControllerWatcher(self._route_discovery,
+                                     self._reload_controllers,
+                                     reload_interval)
+                   if reload_controllers else None)
+
+        self._install_signal_handlers(drain_timeout)
         self._print_config()
-        self._server = ThreadedServer((self._hostname, self._port), _handler)
+
+        if watcher is not None:
+            watcher.start()
+
+        reexec.notify_ready()
 
         try:
             self._server.serve_forever()
         except KeyboardInterrupt:
-            print('\nStopping server. Bye!')
+            pass
+        finally:
+            if watcher is not None:
+                watcher.stop()
+
+        # The requests in flight have finished, server_close waits for them.
+        self._server.server_close()
+        action_loop.stop()
+        print('\nStopping server. Bye!')
+
+    def _install_signal_handlers(self, drain_timeout: float) -> None:
+        """
+        Drain the server on SIGTERM and replace the process on SIGHUP and
+        SIGUSR2. The handlers only start a thread, `shutdown` waits for
+        serve_forever, which runs in the thread receiving the signals.
+        """
+
+        # Signal handlers can only be installed by the main thread.
+        if threading.current_thread() is not threading.main_thread():
+            return
+
+        def stop(signum, frame):
+            threading.Thread(target=self._server.shutdown,
+                             args=(drain_timeout,),
+                             daemon=True).start()
+
+        def replace(signum, frame):
+            threading.Thread(target=self._replace_process,
+                             args=(drain_timeout,),
+                             daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+
+        for signum in reexec.REPLACE_SIGNALS:
+            signal.signal(signum, replace)
 
-    def init_routes(self, prefix_routes: Optional[bool]=False) -> None:
+    def _replace_process(self, drain_timeout: float) -> None:
+        """
+        Start a new process sharing the listening socket and drain this one
+        once the new one is ready, this one keeps serving if it fails.
+        """
+
+        if not self._replacing.acquire(blocking=False):
+            return
+
+        print('Starting a new process.')
+
+        try:
+            process = reexec.spawn_replacement(self._server.socket)
+        except OSError as e:
+            process = None
+            print(f'The new process could not be started: {e}',
+                  file=sys.stderr)
+
+        if process is None:
+            print('The new process did not start, still serving.',
+                  file=sys.stderr)
+            self._replacing.release()
+            return
+
+        print(f'Replaced by process {process.pid}, draining connections.')
+        self._server.shutdown(drain_timeout)
+
+    def init_routes(self,
+                    prefix_routes: Optional[bool]=False,
+                    manifest: Optional[str]=None) -> None:
         """
         The init_routes function will get all routes and actions that have been
         created in files in the controllers folder and register within the
@@ -102,6 +386,11 @@ class PyTerrier():
 
         - `prefix_routes`: Tell the framework to prefix the route with the
         name of the controller.
+        - `manifest`: Path of a route manifest, e.g. `routes.json`. The first
+        time the controllers are imported and their routes written to the
+        manifest, on the next starts the routes are read from it and every
+        controller is imported on the first request to one of its actions.
+        The manifest is rebuilt when the controllers change.
 
         .. Notes:: `controllers` are defined in the controllers directory in
         the application's root directory. For instance, if the application
@@ -116,49 +405,122 @@ class PyTerrier():
         app.init_routes()
         """
 
-        self._route_discovery.register_actions(prefix_routes)
+        self._route_discovery.register_actions(prefix_routes, manifest)
 
-        for route in self._route_discovery.actions:
-            self._register_route(*route)
+        for module, routes in \
+                self._route_discovery.controller_actions.items():
+            self._controller_actions[module] = [
+                self._register_route(*route) for route in routes]
+
+    def _reload_controllers(self, filenames: List[str]) -> None:
+        """
+        Import the changed controllers again and swap in an application
+        with their new routes. The requests being handled finish with the
+        previous application, the other actions keep their response caches
+        and metrics.
+
+        :Parameters:
+        - `filenames`: the file names of the changed controllers.
+        """
+
+        for filename in filenames:
+            module = f'controllers.{filename[:-3]}'
+
+            try:
+                routes = self._route_discovery.reload_controller(filename)
+            except Exception:
+                # The controller keeps its previous routes until it is fixed.
+                traceback.print_exc()
+                continue
+
+            removed = set(self._controller_actions.pop(module, []))
+
+            for action in removed:
+                self._response_caches.pop(action, None)
+
+            for verb in list(self._route_table):
+                remaining = [(route, action)
+                             for route, action in self._route_table[verb]
+                             if action not in removed]
+
+                if remaining:
+                    self._route_table[verb] = remaining
+                else:
+                    del self._route_table[verb]
+
+            if routes:
+                self._controller_actions[module] = [
+                    self._register_route(*route) for route in routes]
+
+            print(f'=> reloaded controller: {filename}')
+
+        # The previous application keeps using the old cache, so it can not
+        # store routes resolved against the old table in the new one.
+        if self._route_cache is not None:
+            self._route_cache = RouteCache(self._route_cache.maxsize)
+
+        if self._app is not None:
+            app = Application(self._route_table,
+                              self._app.config,
+                              self._renderer,
+                              self._route_cache,
+                              self._static_file_cache,
+                              self._response_caches,
+                              previous=self._app)
+            self._app.replace(app)
+            self._app = app
 
     def _register_route(
             self,
             route: str,
             default_method: str,
             func,
-            additional_methods: List[str]=[]):
+            additional_methods: List[str]=[],
+            cache: Optional[Cache]=None) -> Callable:
         """
-        Register a new route.
+        Register a new route, returns the action added to the route table.
 
         :Parameters:
         - `route`: the route definition
         - `verb`: the HTTP verb that the action will respond to.
         - `func`: the function that will be invoked when the route is
         accessed.
+        - `cache`: the response cache of the action.
 
         .. Note:: Duplicated routes will be overwritten.
         """
-        func.__setattr__('request', None)
-        action = func.__get__(func, type(func))
+        action = MethodType(func, ActionContext(func))
 
-        uri_regex = self.route_converter.convert(route)
-        compiled_uri_regex = re.compile(uri_regex)
+        route = self.route_converter.normalize(route)
 
         methods = [default_method] + additional_methods
 
         for method in methods:
             if self._route_table.get(method, None):
-                self._route_table[method].append((compiled_uri_regex, action))
+                self._route_table[method].append((route, action))
             else:
-                self._route_table[method] = [(compiled_uri_regex, action)]
+                self._route_table[method] = [(route, action)]
+
+        if cache is not None:
+            self._response_caches[action] = cache
 
-    def get(self, route: str, additional_methods: List[str]=[]):
+        if self._route_cache is not None:
+            self._route_cache.invalidate()
+
+        return action
+
+    def get(self,
+            route: str,
+            additional_methods: List[str]=[],
+            cache: Optional[Cache]=None):
         """
         Decorator for GET actions.
 
         :Parameters:
         - `route`: the URL where the decorated function (action)
         can be invoked.
+        - `cache`: cache the responses of the action, see
+        pyterrier.http.Cache.
 
         .. Note:: This decorator has the same functionality as the decorator
         @get in pyterrier.http module, the main difference is that this
@@ -171,10 +533,19 @@ class PyTerrier():
         @app.get('/api/get')
         def get(self):
             ...
+
+        Actions waiting on I/O can be defined with `async def`, the
+        `asyncio` engine awaits them without taking a thread. The
+        `threaded` engine runs them in an event loop shared by the request
+        threads, each request thread waits for its action:
+
+        @app.get('/api/user/{id:int}')
+        async def get_user(self, id):
+            ...
         """
 
         return lambda func: self._register_route(
-            route, 'GET', func, additional_methods
+            route, 'GET', func, additional_methods, cache
         )
 
     def post(self, route: str, additional_methods: List[str]=[]):
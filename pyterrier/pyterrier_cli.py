@@ -1,7 +1,8 @@
 import click
 import sys
 
-from pyterrier.cli.commands import create_app, create_ctrl
+from pyterrier.cli.commands import create_app, create_ctrl, precompress
+from pyterrier.cli.commands import collapse_stacks
 
 
 @click.command()
@@ -11,7 +12,16 @@ from pyterrier.cli.commands import create_app, create_ctrl
               metavar='NAME')
 @click.option('--newcontroller', help='Name of the new controller.',
               metavar='NAME')
-def main(currentdir, newapp, newcontroller):
+@click.option('--precompress', 'static_dir',
+              is_flag=False, flag_value='static',
+              help=('Create gzip compressed copies of the static files, '
+                    'defaults to the `static` folder.'),
+              metavar='DIR')
+@click.option('--collapse-stacks', 'profile_path',
+              help=('Print the request profiles in PATH, a .pstats file or '
+                    'a folder, as collapsed stacks for flame graph tools.'),
+              metavar='PATH')
+def main(currentdir, newapp, newcontroller, static_dir, profile_path):
     if newapp is not None and newcontroller is not None:
         print(('pyterrier: error: --newapp and --newcontroller are not meant'
                ' to be used together.'))
@@ -21,6 +31,10 @@ def main(currentdir, newapp, newcontroller):
         create_app(newapp, currentdir)
     elif newcontroller is not None:
         create_ctrl(newcontroller)
+    elif static_dir is not None:
+        precompress(static_dir)
+    elif profile_path is not None:
+        collapse_stacks(profile_path)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
 from typing import Any
+from typing import Iterator
 
 
 class BaseRenderer:
@@ -8,3 +9,11 @@ class BaseRenderer:
 
     def render(self, template_name: str, context: Any) -> str:
         pass
+
+    def stream(self, template_name: str, context: Any) -> Iterator[str]:
+        """
+        Render the template in chunks. Renderers that cannot render a
+        template incrementally return it whole, as a single chunk.
+        """
+
+        yield self.render(template_name, context)
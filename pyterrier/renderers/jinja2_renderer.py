@@ -1,28 +1,140 @@
-from jinja2 import Environment
-from jinja2 import FileSystemLoader
-from typing import List
-from typing import Optional
-from typing import Any
-
-from .base_renderer import BaseRenderer
-
-
-class Jinja2Renderer(BaseRenderer):
-    """ The framework's default renderer """
-
-    def __init__(self,
-                 template_dir: str,
-                 extensions: Optional[List[str]] = []) -> None:
-        """
-        Create a new template renderer. By default PyTerrier
-        is using Jinja2
-        """
-
-        self._loader = FileSystemLoader(template_dir)
-        self._env = Environment(loader=self._loader, extensions=extensions)
-
-    def render(self, template_name: str, context: Any) -> str:
-        """ Get and return the rendered template """
-
-        template = self._env.get_template(template_name)
-        return template.render(context)
+import os
+from concurrent.futures import ProcessPoolExecutor
+from jinja2 import Environment
+from jinja2 import FileSystemBytecodeCache
+from jinja2 import FileSystemLoader
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Any
+
+from .base_renderer import BaseRenderer
+
+
+class Jinja2Renderer(BaseRenderer):
+    """ The framework's default renderer """
+
+    def __init__(self,
+                 template_dir: str,
+                 extensions: Optional[List[str]] = [],
+                 production: Optional[bool] = False,
+                 bytecode_cache_dir: Optional[str] = None,
+                 workers: Optional[int] = None) -> None:
+        """
+        Create a new template renderer. By default PyTerrier
+        is using Jinja2
+
+        :Parameters:
+        - `template_dir`: the templates directory.
+        - `extensions`: the Jinja2 extensions to load.
+        - `production`: compile all the templates when the renderer is
+        created, keep the compiled bytecode in `bytecode_cache_dir` and
+        never check the templates for changes.
+        - `bytecode_cache_dir`: directory of the bytecode cache in
+        production mode, shared by restarts and worker processes. Defaults
+        to a directory in the system's temporary directory.
+        - `workers`: number of processes compiling the templates missing
+        from the bytecode cache, defaults to the number of CPUs.
+        """
+
+        self._template_dir = template_dir
+        self._extensions = extensions
+        self._loader = FileSystemLoader(template_dir)
+
+        if not production:
+            self._env = Environment(loader=self._loader,
+                                    extensions=extensions)
+            return
+
+        self._env = _production_environment(self._loader,
+                                            extensions,
+                                            bytecode_cache_dir)
+        self.precompile(workers)
+
+    @property
+    def environment(self) -> Environment:
+        return self._env
+
+    def precompile(self, workers: Optional[int] = None) -> int:
+        """
+        Load all the templates in the templates directory, so no request
+        has to compile them. Returns the number of templates loaded.
+
+        Templates missing from the bytecode cache are compiled in parallel
+        in worker processes, which write their bytecode to the cache, then
+        all the templates are loaded from the cache.
+        """
+
+        names = self._env.list_templates()
+        bytecode_cache = self._env.bytecode_cache
+
+        if bytecode_cache is not None:
+            missing = [name for name in names
+                       if not self._is_cached(bytecode_cache, name)]
+            workers = min(workers or os.cpu_count() or 1, len(missing))
+
+            if workers > 1:
+                self._compile_in_processes(missing, workers)
+
+        for name in names:
+            self._env.get_template(name)
+
+        return len(names)
+
+    def _is_cached(self, bytecode_cache: Any, name: str) -> bool:
+        source, filename, _ = self._loader.get_source(self._env, name)
+        bucket = bytecode_cache.get_bucket(self._env, name, filename, source)
+
+        return bucket.code is not None
+
+    def _compile_in_processes(self, names: List[str], workers: int) -> None:
+        chunks = [names[i::workers] for i in range(workers)]
+        cache_dir = self._env.bytecode_cache.directory
+
+        with ProcessPoolExecutor(workers) as executor:
+            list(executor.map(_compile_templates,
+                              [self._template_dir] * workers,
+                              [self._extensions] * workers,
+                              [cache_dir] * workers,
+                              chunks))
+
+    def render(self, template_name: str, context: Any) -> str:
+        """ Get and return the rendered template """
+
+        template = self._env.get_template(template_name)
+        return template.render(context)
+
+    def stream(self, template_name: str, context: Any) -> Iterator[str]:
+        """ Render the template in chunks with Jinja2's generate """
+
+        template = self._env.get_template(template_name)
+        return template.generate(context)
+
+
+def _production_environment(loader: FileSystemLoader,
+                            extensions: List[str],
+                            bytecode_cache_dir: Optional[str]) -> Environment:
+    if bytecode_cache_dir is not None:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+
+    # The template cache is unbounded so no compiled template is evicted.
+    return Environment(loader=loader,
+                       extensions=extensions,
+                       auto_reload=False,
+                       cache_size=-1,
+                       bytecode_cache=FileSystemBytecodeCache(
+                           bytecode_cache_dir))
+
+
+def _compile_templates(template_dir: Any,
+                       extensions: List[str],
+                       bytecode_cache_dir: str,
+                       names: List[str]) -> None:
+    """ Compile the templates writing their bytecode to the cache. """
+
+    env = _production_environment(FileSystemLoader(template_dir),
+                                  extensions,
+                                  bytecode_cache_dir)
+
+    for name in names:
+        env.get_template(name)
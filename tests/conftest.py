@@ -0,0 +1,74 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from pyterrier import PyTerrier
+from pyterrier.core.async_server import AsyncServer
+from pyterrier.core.pooled_server import PooledServer
+from pyterrier.core.threaded_server import ThreadedServer
+from pyterrier.http.http_handler import HttpRequestHandler
+
+
+@contextmanager
+def _serve(routes=(),
+           engine='threaded',
+           pyterrier=None,
+           workers=16,
+           queue_size=64,
+           **options):
+    if pyterrier is None:
+        pyterrier = PyTerrier()
+
+    for route in routes:
+        pyterrier._register_route(*route)
+
+    app = pyterrier._compile(**options)
+
+    def _handler(*args):
+        return HttpRequestHandler(app, *args)
+
+    if engine == 'asyncio':
+        server = AsyncServer(('127.0.0.1', 0), app, workers)
+    elif engine == 'pooled':
+        server = PooledServer(('127.0.0.1', 0), _handler, workers,
+                              queue_size)
+
+        if app.metrics is not None:
+            server.register_metrics(app.metrics)
+    else:
+        server = ThreadedServer(('127.0.0.1', 0), _handler)
+
+    thread = threading.Thread(target=server.serve_forever,
+                              kwargs={'poll_interval': 0.01},
+                              daemon=True)
+    thread.start()
+
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def serve():
+    """
+    Returns a context manager running a server in a background thread and
+    yielding it, the server is stopped when the block exits.
+
+    .. Usage::
+
+    with serve([get('/')(index)], 'asyncio', keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+
+    :Parameters:
+    - `routes`: the routes, as returned by the pyterrier.http decorators.
+    - `engine`: `threaded`, `pooled` or `asyncio`.
+    - `pyterrier`: the application the routes are added to, a new one by
+    default.
+    - `workers`, `queue_size`: the size of the pooled and asyncio servers.
+    - `options`: the options of the compiled application.
+    """
+
+    return _serve
@@ -0,0 +1,33 @@
+import pytest
+
+from pyterrier.core.application import Application
+
+
+def action_mock():
+    return 'test'
+
+
+def test_application_copies_route_table():
+    route_table = {'GET': [('/api/get', action_mock)]}
+    app = Application(route_table, {'staticfiles': 'static'}, None)
+
+    route_table['GET'].append(('/api/other', action_mock))
+
+    assert app.route_table['GET'] == (('/api/get', action_mock),)
+    assert app.resolver.resolve('/api/other', 'GET') is None
+
+
+def test_application_is_read_only():
+    app = Application({}, {'staticfiles': 'static'}, None)
+
+    with pytest.raises(TypeError):
+        app.config['staticfiles'] = 'other'
+
+    with pytest.raises(TypeError):
+        app.route_table['GET'] = []
+
+
+def test_application_mime_types():
+    app = Application({}, {'staticfiles': 'static'}, None)
+
+    assert app.mime_types['.css'] == 'text/css'
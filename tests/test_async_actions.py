@@ -0,0 +1,179 @@
+import asyncio
+import contextvars
+import http.client
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pyterrier.core.action_loop import ActionLoop
+from pyterrier.http import Ok, current_request, get, post
+
+
+CONCURRENT_REQUESTS = 10
+
+_var = contextvars.ContextVar('var')
+
+
+async def get_user(self, id):
+    await asyncio.sleep(0)
+    return Ok({'id': id, 'path': current_request().path})
+
+
+async def add_user(self, data=None):
+    return Ok(data)
+
+
+ROUTES = [get('/api/user/{id:int}')(get_user), post('/api/user')(add_user)]
+
+
+def rendezvous_action(loops):
+    """
+    Returns an action that waits until all the requests are in flight,
+    recording the event loops it runs in.
+    """
+
+    state = {'arrived': 0, 'event': None}
+
+    async def rendezvous(self):
+        if state['event'] is None:
+            state['event'] = asyncio.Event()
+
+        loops.add(asyncio.get_running_loop())
+        state['arrived'] += 1
+
+        if state['arrived'] == CONCURRENT_REQUESTS:
+            state['event'].set()
+
+        await asyncio.wait_for(state['event'].wait(), 5)
+        return Ok(threading.current_thread().name)
+
+    return rendezvous
+
+
+def request(address, method, path, body=None, headers={}):
+    conn = http.client.HTTPConnection(*address)
+
+    try:
+        conn.request(method, path, body, headers)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_action_loop_runs_coroutines():
+    loop = ActionLoop()
+
+    async def double(value):
+        return threading.current_thread().name, value * 2
+
+    async def fail():
+        raise ValueError('failed')
+
+    assert not loop.running
+    assert loop.run(double(2)) == ('pyterrier-actions', 4)
+    assert loop.running
+
+    with pytest.raises(ValueError):
+        loop.run(fail())
+
+    loop.stop()
+    assert not loop.running
+
+    # The loop starts again on next use.
+    assert loop.run(double(3)) == ('pyterrier-actions', 6)
+    loop.stop()
+
+
+def test_action_loop_stop_cancels_pending_tasks():
+    loop = ActionLoop()
+    started = threading.Event()
+    errors = []
+
+    async def wait_forever():
+        started.set()
+        await asyncio.Event().wait()
+
+    def run():
+        try:
+            loop.run(wait_forever())
+        except BaseException as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    started.wait(5)
+
+    loop.stop()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert [type(e).__name__ for e in errors] == ['CancelledError']
+
+
+def test_action_loop_copies_context():
+    loop = ActionLoop()
+
+    async def get_var():
+        return _var.get(None)
+
+    token = _var.set('request')
+
+    try:
+        assert loop.run(get_var()) == 'request'
+    finally:
+        _var.reset(token)
+        loop.stop()
+
+
+def test_async_actions_on_threaded_server(serve):
+    with serve(ROUTES) as server:
+        address = server.server_address
+
+        assert request(address, 'GET', '/api/user/1') == \
+            (200, {'id': '1', 'path': '/api/user/1'})
+
+        assert request(address, 'POST', '/api/user', 'name=daniel',
+                       {'Content-Type':
+                        'application/x-www-form-urlencoded'}) == \
+            (200, {'name': 'daniel'})
+
+
+def test_async_actions_share_one_event_loop(serve):
+    loops = set()
+    routes = ROUTES + [get('/rendezvous')(rendezvous_action(loops))]
+
+    with serve(routes) as server:
+        address = server.server_address
+
+        with ThreadPoolExecutor(CONCURRENT_REQUESTS) as executor:
+            responses = list(executor.map(
+                lambda _: request(address, 'GET', '/rendezvous'),
+                range(CONCURRENT_REQUESTS)))
+
+    # All the actions were waiting at the same time, in the same loop.
+    assert responses == [(200, 'pyterrier-actions')] * CONCURRENT_REQUESTS
+    assert len(loops) == 1
+
+
+def test_async_actions_take_no_thread_on_asyncio_engine(serve):
+    loops = set()
+    routes = ROUTES + [get('/rendezvous')(rendezvous_action(loops))]
+
+    # A single executor thread, the actions only fit if they are awaited
+    # in the server's event loop.
+    with serve(routes, 'asyncio', workers=1) as server:
+        address = server.server_address
+
+        with ThreadPoolExecutor(CONCURRENT_REQUESTS) as executor:
+            responses = list(executor.map(
+                lambda _: request(address, 'GET', '/rendezvous'),
+                range(CONCURRENT_REQUESTS)))
+
+    # All the actions ran in the server's thread, none in the shared loop.
+    assert len(set(responses)) == 1
+    assert responses[0][0] == 200
+    assert responses[0][1] != 'pyterrier-actions'
+    assert len(loops) == 1
@@ -0,0 +1,136 @@
+import asyncio
+import http.client
+import socket
+import time
+
+from pyterrier.http import Ok, get, post
+from pyterrier.http.async_http_handler import AsyncHttpRequestHandler
+
+
+def get_user(self, id):
+    return Ok({'id': id})
+
+
+async def get_async_user(self, id):
+    await asyncio.sleep(0.01)
+    return Ok({'id': id, 'async': True})
+
+
+def add_user(self, data=None):
+    return Ok(data)
+
+
+ROUTES = [
+    get('/api/user/{id:int}')(get_user),
+    get('/api/async/user/{id:int}')(get_async_user),
+    post('/api/user')(add_user),
+]
+
+
+def test_sync_action(serve):
+    with serve(ROUTES, 'asyncio') as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/api/user/1')
+        response = conn.getresponse()
+
+        assert response.status == 200
+        assert response.read() == b'{"id": "1"}'
+
+
+def test_async_action(serve):
+    with serve(ROUTES, 'asyncio') as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/api/async/user/2')
+
+        assert conn.getresponse().read() == b'{"id": "2", "async": true}'
+
+
+def test_post_form_data(serve):
+    with serve(ROUTES, 'asyncio') as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('POST', '/api/user', 'name=daniel',
+                     {'Content-Type': 'application/x-www-form-urlencoded'})
+
+        assert conn.getresponse().read() == b'{"name": "daniel"}'
+
+
+def test_not_found_and_method_not_allowed(serve):
+    with serve(ROUTES, 'asyncio') as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/api/unknown')
+        response = conn.getresponse()
+        response.read()
+
+        assert response.status == 404
+
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('DELETE', '/api/user')
+
+        assert conn.getresponse().status == 405
+
+
+def test_keep_alive(serve):
+    with serve(ROUTES, 'asyncio', keep_alive=True,
+               keep_alive_timeout=5) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+
+        for id in range(3):
+            conn.request('GET', f'/api/async/user/{id}')
+            response = conn.getresponse()
+
+            assert response.version == 11
+            assert response.read() == (f'{{"id": "{id}", "async": true}}'
+                                       .encode())
+
+        conn.close()
+
+
+def test_concurrent_connections(serve):
+    with serve(ROUTES, 'asyncio', keep_alive=True,
+               keep_alive_timeout=5) as server:
+        connections = [http.client.HTTPConnection(*server.server_address)
+                       for _ in range(50)]
+
+        for id, conn in enumerate(connections):
+            conn.request('GET', f'/api/async/user/{id}')
+
+        for id, conn in enumerate(connections):
+            assert conn.getresponse().read() == (
+                f'{{"id": "{id}", "async": true}}'.encode())
+            conn.close()
+
+
+def test_nagle_disabled(monkeypatch, serve):
+    nodelay = []
+    handle = AsyncHttpRequestHandler.handle
+
+    async def _handle(self):
+        sock = self._writer.get_extra_info('socket')
+        nodelay.append(sock.getsockopt(socket.IPPROTO_TCP,
+                                       socket.TCP_NODELAY))
+        await handle(self)
+
+    monkeypatch.setattr(AsyncHttpRequestHandler, 'handle', _handle)
+
+    with serve(ROUTES, 'asyncio') as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/api/user/1')
+        conn.getresponse().read()
+        conn.close()
+
+    assert nodelay == [1]
+
+
+def test_stalled_request_times_out(serve):
+    with serve(ROUTES, 'asyncio', keep_alive=True,
+               keep_alive_timeout=0.2) as server:
+        for partial in (b'GET /api/user/1 HTTP/1.1\r\nHost: test',
+                        b'POST /api/user HTTP/1.1\r\nContent-Length: 10'
+                        b'\r\n\r\nname'):
+            with socket.create_connection(server.server_address) as sock:
+                sock.settimeout(5)
+                sock.sendall(partial)
+                start = time.monotonic()
+
+                assert sock.recv(4096) == b''
+                assert time.monotonic() - start < 2
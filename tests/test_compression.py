@@ -0,0 +1,161 @@
+import gzip
+import http.client
+import os
+
+import pytest
+
+from pyterrier import PyTerrier
+from pyterrier.cli.commands import precompress
+from pyterrier.http import Ok, get
+from pyterrier.http.compression import accepts_gzip
+from pyterrier.http.compression import gzip_body
+from pyterrier.http.compression import is_compressible
+from pyterrier.http.static_files import StaticFiles
+
+
+CSS = b'body { color: red; }\n' * 100
+
+
+def get_items(self, count):
+    return Ok(list(range(int(count))))
+
+
+ROUTES = [get('/items/{count:int}')(get_items)]
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / 'site.css').write_bytes(CSS)
+    return tmp_path
+
+
+def test_accepts_gzip():
+    assert accepts_gzip('gzip, deflate, br')
+    assert accepts_gzip('br;q=1.0, gzip;q=0.8')
+    assert accepts_gzip('*')
+    assert not accepts_gzip(None)
+    assert not accepts_gzip('identity')
+    assert not accepts_gzip('gzip;q=0')
+    assert not accepts_gzip('*, gzip;q=0')
+
+
+def test_is_compressible():
+    assert is_compressible('text/html')
+    assert is_compressible('application/json; charset=utf-8')
+    assert not is_compressible('image/png')
+    assert not is_compressible(None)
+
+
+def test_gzip_body():
+    body = os.urandom(100 * 1024) + b'a' * 100 * 1024
+
+    assert gzip.decompress(b''.join(gzip_body(body, 1))) == body
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_compress_dynamic_response(engine, static_dir, serve):
+    pyterrier = PyTerrier(static_files=str(static_dir))
+
+    with serve(ROUTES, engine, pyterrier, compress_min_size=100) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/items/1000',
+                     headers={'Accept-Encoding': 'gzip'})
+        response = conn.getresponse()
+        body = response.read()
+
+        assert response.getheader('Content-Encoding') == 'gzip'
+        assert response.getheader('Vary') == 'Accept-Encoding'
+        assert int(response.getheader('Content-Length')) == len(body)
+        assert gzip.decompress(body) == str(list(range(1000))).encode()
+
+        # Below the threshold.
+        conn.request('GET', '/items/2', headers={'Accept-Encoding': 'gzip'})
+        response = conn.getresponse()
+
+        assert response.getheader('Content-Encoding') is None
+        assert response.read() == b'[0, 1]'
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_compression_disabled_by_default(engine, static_dir, serve):
+    pyterrier = PyTerrier(static_files=str(static_dir))
+
+    with serve(ROUTES, engine, pyterrier) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/items/1000',
+                     headers={'Accept-Encoding': 'gzip'})
+        response = conn.getresponse()
+
+        assert response.getheader('Content-Encoding') is None
+        assert response.read() == str(list(range(1000))).encode()
+
+
+def test_serve_precompressed_sibling(static_dir):
+    precompress(str(static_dir))
+    static_files = StaticFiles(str(static_dir), {'.css': 'text/css'})
+
+    response = static_files.prepare('/site.css', {'Accept-Encoding': 'gzip'})
+    headers = dict(response.headers)
+
+    assert response.path == str(static_dir / 'site.css.gz')
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['Vary'] == 'Accept-Encoding'
+    assert headers['Content-type'] == 'text/css'
+
+    for request_headers in ({}, {'Accept-Encoding': 'gzip',
+                                 'Range': 'bytes=0-9'}):
+        response = static_files.prepare('/site.css', request_headers)
+
+        assert response.path == str(static_dir / 'site.css')
+        assert ('Vary', 'Accept-Encoding') in response.headers
+        assert 'Content-Encoding' not in dict(response.headers)
+
+
+def test_precompressed_not_modified_varies(static_dir):
+    precompress(str(static_dir))
+    static_files = StaticFiles(str(static_dir), {'.css': 'text/css'})
+
+    for accept_encoding in ('gzip', 'identity'):
+        etag = dict(static_files.prepare(
+            '/site.css', {'Accept-Encoding': accept_encoding}).headers)['ETag']
+        response = static_files.prepare('/site.css', {
+            'Accept-Encoding': accept_encoding, 'If-None-Match': etag})
+
+        assert response.status == 304
+        assert response.headers.count(('Vary', 'Accept-Encoding')) == 1
+
+
+def test_ignore_stale_sibling(static_dir):
+    precompress(str(static_dir))
+    os.utime(static_dir / 'site.css.gz', (0, 0))
+    static_files = StaticFiles(str(static_dir), {'.css': 'text/css'})
+
+    response = static_files.prepare('/site.css', {'Accept-Encoding': 'gzip'})
+
+    assert response.path == str(static_dir / 'site.css')
+
+
+def test_precompress(static_dir):
+    (static_dir / 'image.png').write_bytes(b'x' * 1000)
+    (static_dir / 'tiny.css').write_bytes(b'a')
+
+    precompress(str(static_dir))
+
+    assert gzip.decompress((static_dir / 'site.css.gz').read_bytes()) == CSS
+    assert not (static_dir / 'image.png.gz').exists()
+    assert not (static_dir / 'tiny.css.gz').exists()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_serve_precompressed_file(engine, static_dir, serve):
+    precompress(str(static_dir))
+
+    pyterrier = PyTerrier(static_files=str(static_dir))
+
+    with serve(ROUTES, engine, pyterrier) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/site.css', headers={'Accept-Encoding': 'gzip'})
+        response = conn.getresponse()
+
+        assert response.getheader('Content-Encoding') == 'gzip'
+        assert gzip.decompress(response.read()) == CSS
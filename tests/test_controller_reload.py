@@ -0,0 +1,188 @@
+import http.client
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+from pyterrier import PyTerrier
+from pyterrier.core.controller_watcher import ControllerWatcher
+from pyterrier.http import Ok
+
+
+USER_CONTROLLER = '''
+from pyterrier.http import Ok, get
+
+
+@get('/get/{id:int}')
+def get_user(self, id):
+    return Ok({'version': VERSION, 'id': id})
+
+
+VERSION = 1
+'''
+
+ORDER_CONTROLLER = '''
+from pyterrier.http import Ok, get
+
+
+@get('/list')
+def list_orders(self):
+    return Ok(['order'])
+'''
+
+
+def index(self):
+    return Ok('index')
+
+
+@pytest.fixture
+def app_dir(tmp_path, monkeypatch):
+    controllers = tmp_path / 'controllers'
+    controllers.mkdir()
+    (controllers / '__init__.py').write_text('')
+    (controllers / 'userController.py').write_text(USER_CONTROLLER)
+    (controllers / 'orderController.py').write_text(ORDER_CONTROLLER)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    yield controllers
+
+    for name in list(sys.modules):
+        if name == 'controllers' or name.startswith('controllers.'):
+            del sys.modules[name]
+
+
+def write(path, content):
+    """ Write the file and make sure its modification time changes. """
+
+    mtime = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(content)
+    os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+
+
+@pytest.fixture
+def pyterrier(app_dir):
+    pyterrier = PyTerrier()
+    pyterrier.get('/')(index)
+    pyterrier.init_routes(prefix_routes=True)
+
+    return pyterrier
+
+
+def get(conn, path):
+    conn.request('GET', path)
+    response = conn.getresponse()
+    body = response.read()
+
+    return response.status, json.loads(body) if response.status == 200 \
+        else None
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_reload_changed_controller(app_dir, pyterrier, engine, serve):
+    with serve(engine=engine, pyterrier=pyterrier, keep_alive=True,
+               metrics_path='/metrics') as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        watcher = ControllerWatcher(pyterrier._route_discovery,
+                                    pyterrier._reload_controllers)
+        list_orders = pyterrier._controller_actions[
+            'controllers.orderController'][0]
+
+        assert get(conn, '/user/get/1') == (200, {'version': 1, 'id': '1'})
+        assert get(conn, '/order/list') == (200, ['order'])
+        assert watcher.check() == []
+
+        write(app_dir / 'userController.py',
+              USER_CONTROLLER.replace('VERSION = 1', 'VERSION = 2')
+              .replace("'/get/{id:int}'", "'/find/{id:int}'"))
+
+        assert watcher.check() == ['userController.py']
+
+        # The same keep-alive connection gets the new routes.
+        assert get(conn, '/user/find/1') == (200, {'version': 2, 'id': '1'})
+        assert get(conn, '/user/get/1') == (404, None)
+        assert get(conn, '/order/list') == (200, ['order'])
+        assert get(conn, '/') == (200, 'index')
+
+        # The other controllers are not imported again and keep their
+        # metrics.
+        assert pyterrier._controller_actions[
+            'controllers.orderController'][0] is list_orders
+        metrics = pyterrier._app.metrics.for_action('GET', list_orders)
+        assert metrics.snapshot()[0] == {200: 2}
+        conn.close()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_add_and_remove_controller(app_dir, pyterrier, engine, serve):
+    with serve(engine=engine, pyterrier=pyterrier, keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        watcher = ControllerWatcher(pyterrier._route_discovery,
+                                    pyterrier._reload_controllers)
+
+        write(app_dir / 'itemController.py',
+              ORDER_CONTROLLER.replace("['order']", "['item']"))
+        (app_dir / 'orderController.py').unlink()
+
+        assert watcher.check() == ['itemController.py',
+                                   'orderController.py']
+        assert get(conn, '/item/list') == (200, ['item'])
+        assert get(conn, '/order/list') == (404, None)
+        assert get(conn, '/user/get/1') == (200, {'version': 1, 'id': '1'})
+        conn.close()
+
+
+def test_controller_with_errors_keeps_routes(app_dir, pyterrier, capsys,
+                                             serve):
+    with serve(pyterrier=pyterrier, keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        watcher = ControllerWatcher(pyterrier._route_discovery,
+                                    pyterrier._reload_controllers)
+
+        write(app_dir / 'userController.py', USER_CONTROLLER + '\n)')
+        watcher.check()
+
+        assert 'SyntaxError' in capsys.readouterr().err
+        assert get(conn, '/user/get/1') == (200, {'version': 1, 'id': '1'})
+
+        write(app_dir / 'userController.py',
+              USER_CONTROLLER.replace('VERSION = 1', 'VERSION = 3'))
+        watcher.check()
+
+        assert get(conn, '/user/get/1') == (200, {'version': 3, 'id': '1'})
+        conn.close()
+
+
+def test_watcher_thread(app_dir):
+    changes = []
+    event = threading.Event()
+
+    def on_change(filenames):
+        changes.append(filenames)
+        event.set()
+
+    pyterrier = PyTerrier()
+    pyterrier.init_routes(prefix_routes=True)
+    watcher = ControllerWatcher(pyterrier._route_discovery, on_change, 0.01)
+    watcher.start()
+
+    try:
+        write(app_dir / 'orderController.py', ORDER_CONTROLLER + '\n')
+        assert event.wait(5)
+    finally:
+        watcher.stop()
+
+    assert changes == [['orderController.py']]
+
+
+def test_reload_not_supported_with_processes():
+    with pytest.raises(ValueError):
+        PyTerrier().run(reload_controllers=True, processes=2)
+
+
+def test_invalid_interval():
+    with pytest.raises(ValueError):
+        ControllerWatcher(None, print, 0)
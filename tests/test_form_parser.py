@@ -0,0 +1,217 @@
+import http.client
+import io
+import socket
+
+import pytest
+
+from pyterrier.http import Ok
+from pyterrier.http import UploadedFile
+from pyterrier.http import form_parser
+from pyterrier.http import post
+from pyterrier.http.form_parser import BodyTooLarge
+from pyterrier.http.form_parser import FormError
+from pyterrier.http.form_parser import parse_form
+
+
+BOUNDARY = 'xYzZY'
+
+
+def multipart(*parts):
+    body = b'preamble\r\n'
+
+    for headers, content in parts:
+        body += f'--{BOUNDARY}\r\n{headers}\r\n\r\n'.encode() + content
+        body += b'\r\n'
+
+    return body + f'--{BOUNDARY}--\r\n'.encode()
+
+
+def field(name, value):
+    return (f'Content-Disposition: form-data; name="{name}"', value)
+
+
+def upload(name, filename, content):
+    return (f'Content-Disposition: form-data; name="{name}"; '
+            f'filename="{filename}"\r\nContent-Type: text/plain', content)
+
+
+def headers(body, content_type=f'multipart/form-data; boundary={BOUNDARY}'):
+    return http.client.parse_headers(io.BytesIO(
+        f'Content-Type: {content_type}\r\n'
+        f'Content-Length: {len(body)}\r\n\r\n'.encode()))
+
+
+def parse(body, **limits):
+    return parse_form(io.BytesIO(body), headers(body), **limits)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 64 * 1024])
+def test_parse_urlencoded(monkeypatch, chunk_size):
+    monkeypatch.setattr(form_parser, '_CHUNK_SIZE', chunk_size)
+    body = 'name=J%C3%B6hn+Doe&city=Stockholm&name=Jane&empty='.encode()
+    content_type = 'application/x-www-form-urlencoded'
+
+    form = parse_form(io.BytesIO(body), headers(body, content_type))
+
+    assert form == {'name': 'Jöhn Doe', 'city': 'Stockholm', 'empty': ''}
+
+
+def test_urlencoded_field_limit_checked_while_reading():
+    body = b'name=' + b'x' * (10 * 1024 * 1024)
+    rfile = io.BytesIO(body)
+    content_type = 'application/x-www-form-urlencoded'
+
+    with pytest.raises(BodyTooLarge):
+        parse_form(rfile, headers(body, content_type), max_field_size=1000)
+
+    # The body is rejected before it is read in full.
+    assert rfile.tell() < 2 * form_parser._CHUNK_SIZE
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64 * 1024])
+def test_parse_multipart(monkeypatch, chunk_size):
+    monkeypatch.setattr(form_parser, '_CHUNK_SIZE', chunk_size)
+    content = b'line 1\r\n--xYz line 2\r\n' * 100
+
+    form = parse(multipart(field('name', 'Jöhn'.encode()),
+                           upload('file', 'notes.txt', content),
+                           field('name', b'Jane')))
+
+    assert form['name'] == 'Jöhn'
+    assert form['file'].filename == 'notes.txt'
+    assert form['file'].content_type == 'text/plain'
+    assert form['file'].size == len(content)
+    assert form['file'].read() == content
+    assert len(form) == 2
+
+
+def test_spool_large_files(tmp_path):
+    content = b'x' * 10000
+    form = parse(multipart(upload('small', 'a.txt', b'abc'),
+                           upload('large', 'b.txt', content)),
+                 spool_size=1000)
+
+    assert not form['small']._file._rolled
+    assert form['large']._file._rolled
+
+    form['large'].save(str(tmp_path / 'b.txt'))
+
+    assert (tmp_path / 'b.txt').read_bytes() == content
+
+
+def test_size_limits():
+    body = multipart(field('name', b'x' * 100),
+                     upload('file', 'a', b'x' * 100))
+
+    with pytest.raises(BodyTooLarge):
+        parse(body, max_body_size=len(body) - 1)
+
+    with pytest.raises(BodyTooLarge):
+        parse(body, max_field_size=99)
+
+    with pytest.raises(BodyTooLarge):
+        parse(body, max_file_size=99)
+
+    assert parse(body, max_body_size=len(body), max_field_size=100,
+                 max_file_size=100)['name'] == 'x' * 100
+
+
+def test_malformed_multipart():
+    body = multipart(field('name', b'John'))
+
+    with pytest.raises(FormError):
+        parse(body[:-20])
+
+    with pytest.raises(FormError):
+        parse_form(io.BytesIO(body), headers(body, 'multipart/form-data'))
+
+
+def save_upload(self, form):
+    upload = form['file']
+    assert isinstance(upload, UploadedFile)
+
+    return Ok({'name': form['name'], 'size': upload.size,
+               'sum': sum(upload.read())})
+
+
+ROUTES = [post('/upload')(save_upload)]
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_upload(engine, serve):
+    content = bytes(range(256)) * 2000
+    body = multipart(field('name', b'data.bin'),
+                     upload('file', 'data.bin', content))
+
+    with serve(ROUTES, engine, keep_alive=True,
+               upload_spool_size=1024) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+
+        for _ in range(2):
+            conn.request('POST', '/upload', body=body, headers={
+                'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'})
+            response = conn.getresponse()
+
+            assert response.status == 200
+            assert response.read() == (
+                b'{"name": "data.bin", "size": 512000, "sum": %d}'
+                % sum(content))
+
+        conn.close()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_upload_too_large(engine, serve):
+    body = multipart(field('name', b'data.bin'),
+                     upload('file', 'data.bin', b'x' * 1000))
+
+    with serve(ROUTES, engine, keep_alive=True, max_file_size=999) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('POST', '/upload', body=body, headers={
+            'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'})
+        response = conn.getresponse()
+
+        assert response.status == 413
+        assert response.getheader('Connection') == 'close'
+        response.read()
+
+        conn.close()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_chunked_body_length_required(engine, serve):
+    with serve(ROUTES, engine, keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('POST', '/upload', body=iter([b'name=x']),
+                     encode_chunked=True, headers={
+                         'Content-Type': 'application/x-www-form-urlencoded',
+                         'Transfer-Encoding': 'chunked'})
+        response = conn.getresponse()
+
+        assert response.status == 411
+        assert response.getheader('Connection') == 'close'
+        response.read()
+
+        conn.close()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'pooled', 'asyncio'])
+@pytest.mark.parametrize('length', ['abc', '-1'])
+def test_invalid_content_length(engine, length, serve):
+    with serve(ROUTES, engine, keep_alive=True) as server:
+        with socket.create_connection(server.server_address) as sock:
+            sock.settimeout(5)
+            sock.sendall(b'POST /upload HTTP/1.1\r\nHost: test\r\n'
+                         b'Content-Length: %s\r\n\r\nname=x'
+                         % length.encode())
+            data = b''
+
+            while True:
+                received = sock.recv(65536)
+
+                if not received:
+                    break
+
+                data += received
+
+    assert data.startswith(b'HTTP/1.1 400 ')
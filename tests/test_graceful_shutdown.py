@@ -0,0 +1,208 @@
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from pyterrier.core.connections import ConnectionTracker
+from pyterrier.http import Ok
+from pyterrier.http import get
+
+
+APP = '''
+import os
+import sys
+
+from pyterrier import PyTerrier
+from pyterrier.http import Ok
+
+app = PyTerrier(hostname='127.0.0.1', port=int(sys.argv[1]))
+
+
+@app.get('/pid')
+def get_pid(self):
+    return Ok(os.getpid())
+
+
+app.run(drain_timeout=5)
+'''
+
+
+def get_fast(self):
+    return Ok('fast')
+
+
+def get_slow(self, seconds):
+    time.sleep(int(seconds) / 10)
+    return Ok('slow')
+
+
+ROUTES = [get('/fast')(get_fast), get('/slow/{seconds:int}')(get_slow)]
+
+
+def wait_connections(server, busy, idle=0):
+    deadline = time.monotonic() + 5
+
+    while (server.connections.busy, server.connections.idle) != (busy, idle):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_tracker_drain():
+    tracker = ConnectionTracker()
+    closed = []
+
+    assert tracker.set_busy('a', lambda: closed.append('a'))
+    assert tracker.set_busy('b', lambda: closed.append('b'))
+    assert tracker.set_idle('a', lambda: closed.append('a'))
+    assert (tracker.busy, tracker.idle) == (1, 1)
+
+    threading.Timer(0.1, tracker.set_idle, ('b', None)).start()
+
+    assert tracker.drain(5) == 0
+    assert closed == ['a']
+    assert tracker.draining
+    assert not tracker.set_busy('c', lambda: closed.append('c'))
+    assert tracker.drain(0.05) == 1
+    assert closed == ['a', 'c']
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'pooled', 'asyncio'])
+def test_drain_finishes_requests_in_flight(engine, serve):
+    with serve(ROUTES, engine, workers=4, keep_alive=True,
+               keep_alive_timeout=30) as server:
+        address = server.server_address
+
+        idle = http.client.HTTPConnection(*address)
+        idle.request('GET', '/fast')
+        assert idle.getresponse().read() == b'"fast"'
+
+        busy = http.client.HTTPConnection(*address)
+        busy.request('GET', '/slow/3')
+        wait_connections(server, 1, 1)
+
+        start = time.monotonic()
+        shutdown = threading.Thread(target=server.shutdown, args=(5,))
+        shutdown.start()
+
+        response = busy.getresponse()
+        assert response.status == 200
+        assert response.read() == b'"slow"'
+        assert response.getheader('Connection') == 'close'
+
+        shutdown.join(5)
+        assert not shutdown.is_alive()
+        assert time.monotonic() - start < 2
+
+        # The idle keep-alive connection has been closed by the server.
+        with pytest.raises((http.client.HTTPException, OSError)):
+            idle.request('GET', '/fast')
+            idle.getresponse().read()
+
+        idle.close()
+        busy.close()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_drain_deadline(engine, serve):
+    with serve(ROUTES, engine, workers=4, keep_alive=True,
+               keep_alive_timeout=30) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/slow/30')
+        wait_connections(server, 1)
+
+        start = time.monotonic()
+        server.shutdown(0.2)
+
+        assert time.monotonic() - start < 1.5
+
+        with pytest.raises((http.client.HTTPException, OSError)):
+            conn.getresponse().read()
+
+        conn.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get_pid(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+
+    try:
+        conn.request('GET', '/pid')
+        return int(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGHUP'),
+                    reason='SIGHUP is not available')
+def test_replace_process_without_refusing_connections(tmp_path):
+    script = tmp_path / 'app.py'
+    script.write_text(APP)
+    port = free_port()
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))] +
+        [p for p in [env.get('PYTHONPATH')] if p])
+
+    process = subprocess.Popen([sys.executable, str(script), str(port)],
+                               cwd=str(tmp_path),
+                               env=env,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    new_pid = None
+
+    try:
+        deadline = time.monotonic() + 10
+
+        while True:
+            try:
+                old_pid = get_pid(port)
+                break
+            except ConnectionRefusedError:
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+
+        assert old_pid == process.pid
+
+        process.send_signal(signal.SIGHUP)
+        deadline = time.monotonic() + 15
+
+        # Every request succeeds while the new process starts and the old
+        # one drains.
+        while process.poll() is None:
+            assert time.monotonic() < deadline
+            pid = get_pid(port)
+
+            if pid != old_pid:
+                new_pid = pid
+
+        assert process.returncode == 0
+
+        new_pid = get_pid(port)
+        assert new_pid != old_pid
+    finally:
+        process.kill()
+        process.wait()
+
+        if new_pid is not None:
+            os.kill(new_pid, signal.SIGTERM)
+            deadline = time.monotonic() + 10
+
+            while time.monotonic() < deadline:
+                try:
+                    get_pid(port)
+                except OSError:
+                    break
+
+                time.sleep(0.05)
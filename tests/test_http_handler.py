@@ -0,0 +1,113 @@
+import http.client
+import socket
+
+from pyterrier.http import NoContent, Ok, delete, get, post
+
+
+def get_user(self, id):
+    return Ok({'id': id})
+
+
+def delete_user(self):
+    return NoContent()
+
+
+def add_user(self, data=None):
+    return Ok(data)
+
+
+ROUTES = [
+    get('/api/user/{id:int}')(get_user),
+    delete('/api/user')(delete_user),
+    post('/api/user')(add_user),
+]
+
+
+def test_json_response_has_content_length(serve):
+    with serve(ROUTES) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/api/user/1')
+        response = conn.getresponse()
+
+        assert response.status == 200
+        assert response.getheader('Content-Length') == '11'
+        assert response.read() == b'{"id": "1"}'
+
+
+def test_post_form_data(serve):
+    with serve(ROUTES) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('POST', '/api/user', 'name=daniel',
+                     {'Content-Type': 'application/x-www-form-urlencoded'})
+
+        assert conn.getresponse().read() == b'{"name": "daniel"}'
+
+
+def test_not_found(serve):
+    with serve(ROUTES) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/api/unknown')
+        response = conn.getresponse()
+
+        assert response.status == 404
+        assert response.getheader('Content-Length') == '0'
+
+
+def test_keep_alive_reuses_connection(serve):
+    with serve(ROUTES, keep_alive=True, keep_alive_timeout=5) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+
+        for id in range(3):
+            conn.request('GET', f'/api/user/{id}')
+            response = conn.getresponse()
+
+            assert response.version == 11
+            assert response.read() == f'{{"id": "{id}"}}'.encode()
+
+        conn.request('DELETE', '/api/user')
+        response = conn.getresponse()
+
+        assert response.status == 204
+        assert response.read() == b''
+
+        conn.request('GET', '/api/user/4')
+        assert conn.getresponse().read() == b'{"id": "4"}'
+
+        conn.close()
+
+
+def test_keep_alive_pipelined_requests(serve):
+    with serve(ROUTES, keep_alive=True, keep_alive_timeout=5) as server:
+        with socket.create_connection(server.server_address) as sock:
+            sock.sendall(b'GET /api/user/1 HTTP/1.1\r\nHost: test\r\n\r\n'
+                         b'GET /api/user/2 HTTP/1.1\r\nHost: test\r\n\r\n')
+
+            sock.settimeout(5)
+            data = b''
+
+            while data.count(b'}') < 2:
+                data += sock.recv(4096)
+
+    assert data.count(b'HTTP/1.1 200') == 2
+    assert data.index(b'{"id": "1"}') < data.index(b'{"id": "2"}')
+
+
+def test_keep_alive_max_requests(serve):
+    options = {
+        'keep_alive': True,
+        'keep_alive_timeout': 5,
+        'max_keep_alive_requests': 2,
+    }
+
+    with serve(ROUTES, **options) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+
+        conn.request('GET', '/api/user/1')
+        response = conn.getresponse()
+        response.read()
+        assert response.getheader('Connection') is None
+
+        conn.request('GET', '/api/user/2')
+        response = conn.getresponse()
+        response.read()
+        assert response.getheader('Connection') == 'close'
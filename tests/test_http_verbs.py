@@ -19,7 +19,7 @@ def decorator_test_helper(
 
     decorator_func = decorator(route, additional_methods)
 
-    _route, _method, _action, _additional_methods = decorator_func(
+    _route, _method, _action, _additional_methods, _cache = decorator_func(
         function_mock
     )
 
@@ -30,6 +30,8 @@ def decorator_test_helper(
     assert callable(_action)
     assert _action() == 'test'
 
+    assert _cache is None
+
     assert isinstance(additional_methods, list)
 
     if additional_methods:
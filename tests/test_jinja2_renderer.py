@@ -0,0 +1,73 @@
+import os
+
+import jinja2
+import pytest
+
+from pyterrier import PyTerrier
+from pyterrier.renderers.jinja2_renderer import Jinja2Renderer
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    templates = tmp_path / 'templates'
+    (templates / 'partials').mkdir(parents=True)
+
+    for i in range(6):
+        (templates / f'page{i}.html').write_text(
+            f'{{% include "partials/header.html" %}}page {i} {{{{ name }}}}')
+
+    (templates / 'partials' / 'header.html').write_text('<h1>header</h1>')
+
+    return str(templates)
+
+
+def test_development_mode_compiles_on_demand(template_dir):
+    renderer = Jinja2Renderer(template_dir)
+
+    assert renderer.environment.auto_reload
+    assert renderer.environment.bytecode_cache is None
+    assert renderer.render('page1.html', {'name': 'x'}) == (
+        '<h1>header</h1>page 1 x')
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_production_mode_precompiles(template_dir, tmp_path, workers):
+    cache_dir = str(tmp_path / 'cache')
+    renderer = Jinja2Renderer(template_dir,
+                              production=True,
+                              bytecode_cache_dir=cache_dir,
+                              workers=workers)
+    env = renderer.environment
+
+    assert not env.auto_reload
+    assert len(env.cache) == 7
+    assert len(os.listdir(cache_dir)) == 7
+    assert renderer.render('page2.html', {'name': 'y'}) == (
+        '<h1>header</h1>page 2 y')
+
+
+def test_production_mode_loads_bytecode_cache(template_dir, tmp_path,
+                                              monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+    Jinja2Renderer(template_dir, production=True, bytecode_cache_dir=cache_dir)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('The templates must not be compiled again.')
+
+    monkeypatch.setattr(jinja2.Environment, '_parse', fail)
+
+    renderer = Jinja2Renderer(template_dir,
+                              production=True,
+                              bytecode_cache_dir=cache_dir)
+
+    assert len(renderer.environment.cache) == 7
+
+
+def test_renderer_options(template_dir, tmp_path):
+    app = PyTerrier(template_dir=template_dir,
+                    renderer_options={
+                        'production': True,
+                        'bytecode_cache_dir': str(tmp_path / 'cache'),
+                    })
+
+    assert not app._renderer.environment.auto_reload
@@ -0,0 +1,118 @@
+import dataclasses
+import datetime
+import decimal
+import json
+import uuid
+
+import pytest
+
+from pyterrier import PyTerrier
+from pyterrier.encoders.default_json_encoder import DefaultJsonEncoder
+from pyterrier.encoders.default_json_encoder import camelcase_key
+from pyterrier.encoders.json_backends import json_dumps_function
+
+
+class User:
+    def __init__(self):
+        self.first_name = 'Ada'
+        self.user_id = 1
+        self._private = True
+
+
+class SlotsUser:
+    __slots__ = ('first_name', '__token', 'unset')
+
+    def __init__(self):
+        self.first_name = 'Ada'
+        self.__token = 'x'
+
+
+class SlotsUserWithDict(SlotsUser):
+    def __init__(self):
+        super().__init__()
+        self.last_name = 'Lovelace'
+
+
+@dataclasses.dataclass
+class Item:
+    item_id: int
+    item_name: str
+
+
+def encode(obj):
+    return json.loads(json.dumps(obj, cls=DefaultJsonEncoder))
+
+
+def test_camelcase_key():
+    assert camelcase_key('first_name') == 'firstName'
+    assert camelcase_key('user-id') == 'userId'
+    assert camelcase_key('_private') == 'private'
+    assert camelcase_key('') == ''
+
+
+def test_encode_objects():
+    assert encode([User(), User()]) == [
+        {'firstName': 'Ada', 'userId': 1, 'private': True}
+    ] * 2
+    assert encode(SlotsUser()) == {'firstName': 'Ada', 'slotsuserToken': 'x'}
+    assert encode(SlotsUserWithDict()) == {
+        'firstName': 'Ada', 'slotsuserToken': 'x', 'lastName': 'Lovelace'}
+    assert encode(Item(1, 'book')) == {'itemId': 1, 'itemName': 'book'}
+
+
+@pytest.mark.parametrize('value', [datetime.datetime(2020, 1, 1),
+                                   decimal.Decimal('1.5'),
+                                   uuid.UUID(int=1),
+                                   object()])
+def test_values_without_attributes_not_serializable(value):
+    with pytest.raises(TypeError, match='not JSON serializable'):
+        encode(value)
+
+    with pytest.raises(TypeError, match='not JSON serializable'):
+        encode({'value': value})
+
+
+def test_encode_objects_with_new_attributes():
+    user = User()
+    user.nick_name = 'ada'
+
+    assert encode(user)['nickName'] == 'ada'
+
+
+@pytest.mark.parametrize('backend', ['json', 'orjson', 'auto'])
+def test_json_backends(backend):
+    if backend == 'orjson':
+        pytest.importorskip('orjson')
+
+    dumps = json_dumps_function(backend)
+    data = dumps({'users': [User()], 'items': [Item(1, 'book')]})
+
+    assert json.loads(data) == {
+        'users': [{'firstName': 'Ada', 'userId': 1, 'private': True}],
+        'items': [{'itemId': 1, 'itemName': 'book'}],
+    }
+
+
+def test_unknown_json_backend():
+    with pytest.raises(ValueError):
+        json_dumps_function('simplejson')
+
+    with pytest.raises(ValueError):
+        PyTerrier(json_backend='simplejson')
+
+
+def test_missing_json_backend(monkeypatch):
+    monkeypatch.setattr('pyterrier.encoders.json_backends._import',
+                        lambda name: None)
+
+    with pytest.raises(ImportError):
+        json_dumps_function('ujson')
+
+    assert json_dumps_function('auto')({'a': 1}) == '{"a": 1}'
+
+
+def test_application_json_backend():
+    app = PyTerrier(json_backend='json')._compile()
+
+    assert app.json_dumps([Item(1, 'a')]) == (
+        '[{"itemId": 1, "itemName": "a"}]')
@@ -0,0 +1,145 @@
+import http.client
+import threading
+
+import pytest
+
+from pyterrier.core.metrics import Metrics
+from pyterrier.http import NotFound
+from pyterrier.http import Ok
+from pyterrier.http import get
+from pyterrier.http import post
+
+
+def get_user(self, id):
+    if id == '0':
+        return NotFound()
+
+    return Ok({'id': id})
+
+
+def add_user(self, form):
+    return Ok(form)
+
+
+ROUTES = [
+    get('/api/user/{id:int}')(get_user),
+    post('/api/user')(add_user),
+]
+
+
+def request(conn, method, path, body=None):
+    headers = {}
+
+    if body is not None:
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+    conn.request(method, path, body, headers)
+    response = conn.getresponse()
+
+    return response, response.read().decode()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_metrics_endpoint(engine, serve):
+    with serve(ROUTES, engine, keep_alive=True,
+               metrics_path='/metrics') as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        for id in (1, 2, 0):
+            request(conn, 'GET', f'/api/user/{id}')
+
+        request(conn, 'POST', '/api/user', 'name=daniel')
+        request(conn, 'GET', '/api/unknown')
+
+        response, text = request(conn, 'GET', '/metrics')
+        conn.close()
+
+    labels = 'route="/api/user/{id:int}",method="GET"'
+
+    assert response.status == 200
+    assert response.getheader('Content-Type').startswith('text/plain')
+    assert f'pyterrier_requests_total{{{labels},status="200"}} 2' in text
+    assert f'pyterrier_requests_total{{{labels},status="404"}} 1' in text
+    assert ('pyterrier_requests_total{route="/api/user",method="POST",'
+            'status="200"} 1') in text
+    assert f'pyterrier_requests_in_flight{{{labels}}} 0' in text
+    assert (f'pyterrier_request_duration_seconds_bucket{{{labels},'
+            f'le="+Inf"}} 3') in text
+    assert f'pyterrier_request_duration_seconds_count{{{labels}}} 3' in text
+    assert 'unknown' not in text
+
+
+def test_pool_gauges(serve):
+    with serve(ROUTES, 'pooled', workers=2, queue_size=4, keep_alive=True,
+               metrics_path='/metrics') as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        response, text = request(conn, 'GET', '/metrics')
+        conn.close()
+
+    assert response.status == 200
+    assert '# TYPE pyterrier_pool_queue_depth gauge' in text
+    assert 'pyterrier_pool_queue_depth 0' in text
+    assert 'pyterrier_pool_active_workers 1' in text
+    assert '# TYPE pyterrier_pool_rejected_total counter' in text
+    assert 'pyterrier_pool_rejected_total 0' in text
+
+
+def test_registered_values_are_kept():
+    action = object()
+    metrics = Metrics({'GET': [('/items', action)]})
+    metrics.register('pyterrier_test', 'gauge', 'A test value.', lambda: 3)
+    metrics = Metrics({'GET': [('/other', action)]}, previous=metrics)
+
+    assert 'pyterrier_test 3' in metrics.render()
+
+    with pytest.raises(ValueError):
+        metrics.register('pyterrier_test', 'summary', 'A test value.',
+                         lambda: 3)
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_metrics_disabled_by_default(engine, serve):
+    with serve(ROUTES, engine, keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        response, _ = request(conn, 'GET', '/metrics')
+        conn.close()
+
+    assert response.status == 404
+
+
+def test_histogram_buckets():
+    action = object()
+    metrics = Metrics({'GET': [('/items', action)]}, buckets=[0.1, 0.01])
+    route_metrics = metrics.for_action('GET', action)
+
+    for elapsed in (0.001, 0.05, 5):
+        route_metrics.finish(route_metrics.start() - elapsed, 200)
+
+    statuses, buckets, total, in_flight = route_metrics.snapshot()
+
+    assert metrics.buckets == (0.01, 0.1)
+    assert statuses == {200: 3}
+    assert buckets == [1, 1, 1]
+    assert 5.05 < total < 5.1
+    assert in_flight == 0
+    assert ('pyterrier_request_duration_seconds_bucket{route="/items",'
+            'method="GET",le="0.1"} 2') in metrics.render()
+
+
+def test_counters_are_per_thread():
+    action = object()
+    metrics = Metrics({'GET': [('/items', action)]})
+    route_metrics = metrics.for_action('GET', action)
+
+    def record():
+        for _ in range(1000):
+            route_metrics.finish(route_metrics.start(), 200)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert route_metrics.snapshot()[0] == {200: 8000}
@@ -0,0 +1,93 @@
+import http.client
+import threading
+import time
+
+import pytest
+
+from pyterrier.core.pooled_server import PooledServer
+from pyterrier.http import Ok, get, post
+from pyterrier.http.http_handler import HttpRequestHandler
+
+
+release = threading.Event()
+
+
+def slow(self):
+    release.wait(5)
+    return Ok({'slow': True})
+
+
+def fast(self, data=None):
+    return Ok({'slow': False})
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_invalid_pool_size():
+    with pytest.raises(ValueError):
+        PooledServer(('127.0.0.1', 0), HttpRequestHandler, 0, 1)
+
+
+def test_rejects_connections_when_queue_is_full(serve):
+    routes = [get('/slow')(slow), post('/fast')(fast)]
+
+    with serve(routes, 'pooled', workers=1, queue_size=1) as server:
+        host, port = server.server_address
+
+        try:
+            first = http.client.HTTPConnection(host, port)
+            first.request('GET', '/slow')
+            wait_for(lambda: server.active_workers == 1)
+
+            second = http.client.HTTPConnection(host, port)
+            second.request('GET', '/slow')
+            wait_for(lambda: server.queue_depth == 1)
+
+            # The body the server does not read must not reset the
+            # connection before the client reads the response.
+            third = http.client.HTTPConnection(host, port)
+            third.request('POST', '/fast', body=b'x' * 256 * 1024, headers={
+                'Content-Type': 'application/octet-stream'})
+            response = third.getresponse()
+
+            assert response.status == 503
+            assert server.rejected == 1
+
+            release.set()
+
+            assert first.getresponse().status == 200
+            assert second.getresponse().status == 200
+        finally:
+            release.set()
+
+
+def test_idle_keep_alive_connection_reclaimed(serve):
+    with serve([post('/fast')(fast)], 'pooled', workers=1, queue_size=4,
+               keep_alive=True, keep_alive_timeout=30) as server:
+        host, port = server.server_address
+
+        idle = http.client.HTTPConnection(host, port)
+        idle.request('POST', '/fast')
+        assert idle.getresponse().read() == b'{"slow": false}'
+
+        # The only worker gives up the idle connection for the queued one,
+        # long before the keep-alive timeout.
+        start = time.monotonic()
+        waiting = http.client.HTTPConnection(host, port, timeout=5)
+        waiting.request('POST', '/fast')
+
+        assert waiting.getresponse().status == 200
+        assert time.monotonic() - start < 2
+
+        with pytest.raises((http.client.HTTPException, OSError)):
+            idle.request('POST', '/fast')
+            idle.getresponse().read()
+
+        idle.close()
+        waiting.close()
@@ -0,0 +1,80 @@
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'),
+                                reason='os.fork is not available')
+
+
+APP = textwrap.dedent('''
+    import os
+    import sys
+
+    from pyterrier import PyTerrier
+    from pyterrier.http import Ok
+
+    app = PyTerrier(port=int(sys.argv[1]))
+
+    @app.get('/pid')
+    def pid(self):
+        return Ok({'pid': os.getpid()})
+
+    app.run(processes=2)
+''')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+def get_pid(port):
+    deadline = time.monotonic() + 10
+
+    while True:
+        try:
+            conn = http.client.HTTPConnection('localhost', port, timeout=5)
+            conn.request('GET', '/pid')
+            return int(conn.getresponse().read()[8:-1])
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def test_workers_are_restarted_and_stopped(tmp_path):
+    port = free_port()
+    script = tmp_path / 'app.py'
+    script.write_text(APP)
+
+    env = dict(os.environ,
+               PYTHONPATH=os.path.dirname(os.path.dirname(__file__)))
+    supervisor = subprocess.Popen([sys.executable, str(script), str(port)],
+                                  env=env,
+                                  stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+
+    try:
+        worker = get_pid(port)
+        assert worker != supervisor.pid
+
+        os.kill(worker, signal.SIGKILL)
+        time.sleep(0.2)
+
+        pids = {get_pid(port) for _ in range(20)}
+        assert worker not in pids
+
+        supervisor.send_signal(signal.SIGTERM)
+        assert supervisor.wait(10) == 0
+    finally:
+        if supervisor.poll() is None:
+            supervisor.kill()
@@ -0,0 +1,104 @@
+import cProfile
+import http.client
+import io
+import os
+import pstats
+
+import pytest
+
+from pyterrier.cli.commands import collapse_stacks
+from pyterrier.core.profiler import Profiler
+from pyterrier.core.profiler import collapsed_stacks
+from pyterrier.http import Ok
+from pyterrier.http import get
+
+
+def fibonacci(n):
+    return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+
+
+def get_fibonacci(self, n):
+    return Ok(fibonacci(int(n)))
+
+
+ROUTES = [get('/fibonacci/{n:int}')(get_fibonacci)]
+
+
+def profiles(directory):
+    return [os.path.join(root, filename)
+            for root, _, filenames in os.walk(directory)
+            for filename in filenames]
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_profile_one_every_n_requests(engine, tmp_path, serve):
+    with serve(ROUTES, engine, keep_alive=True, profile_dir=str(tmp_path),
+               profile_every=3) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        for _ in range(7):
+            conn.request('GET', '/fibonacci/15')
+            assert conn.getresponse().read() == b'610'
+
+        conn.close()
+
+    files = profiles(tmp_path)
+
+    assert len(files) == 2
+    assert all(os.path.dirname(path).endswith('GET_fibonacci_n_int')
+               for path in files)
+
+    stats = pstats.Stats(*files)
+
+    assert any(name == 'fibonacci' for _, _, name in stats.stats)
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_profile_requests_with_secret(engine, tmp_path, serve):
+    with serve(ROUTES, engine, keep_alive=True, profile_dir=str(tmp_path),
+               profile_secret='s3cret') as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        for secret in ('s3cret', 'wrong', None):
+            headers = {'X-PyTerrier-Profile': secret} if secret else {}
+            conn.request('GET', '/fibonacci/10', headers=headers)
+            conn.getresponse().read()
+
+        conn.close()
+
+    assert len(profiles(tmp_path)) == 1
+
+
+def test_one_request_profiled_at_a_time(tmp_path):
+    profiler = Profiler(str(tmp_path), every=1)
+
+    session = profiler.start({}, 'GET', '/')
+
+    assert session is not None
+    assert profiler.start({}, 'GET', '/') is None
+
+    session.save()
+
+    assert profiler.start({}, 'GET', '/') is not None
+
+
+def test_profiler_needs_a_sampling_rule(tmp_path):
+    with pytest.raises(ValueError):
+        Profiler(str(tmp_path))
+
+
+def test_collapsed_stacks(tmp_path):
+    profile = cProfile.Profile()
+    profile.runcall(fibonacci, 20)
+    profile.dump_stats(str(tmp_path / 'fibonacci.pstats'))
+
+    lines = collapsed_stacks(pstats.Stats(str(tmp_path / 'fibonacci.pstats')))
+    stacks = dict(line.rsplit(' ', 1) for line in lines)
+
+    assert all(int(value) > 0 for value in stacks.values())
+    assert any(stack.endswith(f'fibonacci (test_profiler.py:'
+                              f'{fibonacci.__code__.co_firstlineno})')
+               for stack in stacks)
+
+    output = io.StringIO()
+    collapse_stacks(str(tmp_path), output)
+
+    assert output.getvalue().splitlines() == lines
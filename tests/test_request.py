@@ -0,0 +1,46 @@
+import http.client
+import io
+
+from pyterrier.core.request import Request
+
+
+class Handler:
+    def __init__(self, path, headers=b''):
+        self.path = path
+        self.requestline = f'GET {path} HTTP/1.1'
+        self.headers = http.client.parse_headers(
+            io.BytesIO(b'Host: localhost\r\n' + headers + b'\r\n'))
+
+
+def test_request():
+    request = Request(Handler('/users/1?sort=name&tag=a&tag=b',
+                              b'Cookie: session=abc\r\n'))
+
+    assert request.method == 'GET'
+    assert request.path == '/users/1'
+    assert request.params == {'sort': ['name'], 'tag': ['a', 'b']}
+    assert request.headers == {'Host': 'localhost',
+                               'Cookie': 'session=abc'}
+    assert request.cookies['session'].value == 'abc'
+
+
+def test_request_without_query_or_cookies():
+    request = Request(Handler('/users/1'))
+
+    assert request.path == '/users/1'
+    assert request.params == {}
+    assert request.cookies is None
+
+
+def test_request_target_is_parsed_like_urlparse():
+    assert Request(Handler('/a;b?c=1')).path == '/a'
+    assert Request(Handler('/a#top')).path == '/a'
+    assert Request(Handler('http://localhost/a?c=1')).path == '/a'
+
+
+def test_properties_are_computed_once():
+    request = Request(Handler('/users?id=1'))
+
+    assert request.params is request.params
+    assert request.headers is request.headers
+    assert not hasattr(request, '__dict__')
@@ -0,0 +1,112 @@
+import asyncio
+import http.client
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pyterrier.http import Ok
+from pyterrier.http import current_request
+from pyterrier.http import get
+from pyterrier.http import post
+from pyterrier.http import put
+
+
+REQUESTS = 400
+
+CLIENTS = 16
+
+
+def echo(self):
+    token = self.request.params['token'][0]
+    # Give the other requests time to run in between.
+    time.sleep(0.001)
+
+    return Ok({'token': token,
+               'request': self.request.params['token'][0],
+               'current': current_request().params['token'][0]})
+
+
+async def async_echo(self):
+    token = self.request.params['token'][0]
+    await asyncio.sleep(0.001)
+
+    return Ok({'token': token, 'request': self.request.params['token'][0],
+               'current': current_request().params['token'][0]})
+
+
+def post_echo(self, form):
+    time.sleep(0.001)
+
+    return Ok({'token': form['token'],
+               'request': self.request.params['token'][0],
+               'current': current_request().params['token'][0]})
+
+
+ROUTES = [
+    get('/echo')(echo),
+    get('/async')(async_echo),
+    post('/echo')(post_echo),
+    put('/echo')(post_echo),
+]
+
+
+def send_all(address, method, path, tokens):
+    """ Send the requests through a persistent connection. """
+
+    conn = http.client.HTTPConnection(*address)
+    results = []
+
+    for token in tokens:
+        body = None
+        headers = {}
+
+        if method != 'GET':
+            body = f'token={token}'
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        conn.request(method, f'{path}?token={token}', body, headers)
+        results.append((token, json.loads(conn.getresponse().read())))
+
+    conn.close()
+
+    return results
+
+
+def run_clients(address, method, path):
+    tokens = [str(token) for token in range(REQUESTS)]
+
+    with ThreadPoolExecutor(CLIENTS) as executor:
+        batches = executor.map(
+            lambda i: send_all(address, method, path, tokens[i::CLIENTS]),
+            range(CLIENTS))
+
+        return [result for batch in batches for result in batch]
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'pooled', 'asyncio'])
+@pytest.mark.parametrize('method,path', [('GET', '/echo'),
+                                         ('POST', '/echo'),
+                                         ('PUT', '/echo')])
+def test_concurrent_requests_see_their_own_request(engine, method, path,
+                                                   serve):
+    with serve(ROUTES, engine, keep_alive=True) as server:
+        results = run_clients(server.server_address, method, path)
+
+    assert len(results) == REQUESTS
+
+    for token, result in results:
+        assert result == {'token': token, 'request': token, 'current': token}
+
+
+def test_async_actions_see_their_own_request(serve):
+    with serve(ROUTES, 'asyncio', keep_alive=True) as server:
+        results = run_clients(server.server_address, 'GET', '/async')
+
+    for token, result in results:
+        assert result == {'token': token, 'request': token, 'current': token}
+
+
+def test_no_request_outside_of_actions():
+    assert current_request() is None
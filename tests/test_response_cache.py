@@ -0,0 +1,183 @@
+import http.client
+import time
+
+import pytest
+
+from pyterrier import PyTerrier
+from pyterrier.http import Cache
+from pyterrier.http import NotFound
+from pyterrier.http import Ok
+from pyterrier.http import get
+
+
+def test_key_vary():
+    cache = Cache(ttl=60, vary=['query', 'Accept-Language'])
+    headers = {'accept-language': 'en'}
+
+    assert cache.key('/users?page=2', headers) == (
+        '/users', 'page=2', ('en',))
+    assert Cache(ttl=60).key('/users?page=2', headers) == (
+        '/users', None, ())
+
+
+def test_get_put_and_hit_ratio():
+    cache = Cache(ttl=60)
+
+    assert cache.get('key') is None
+
+    cache.put('key', 'response', cache.generation)
+
+    assert cache.get('key') == 'response'
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert cache.hit_ratio == 0.5
+
+
+def test_expired_entries_are_removed():
+    cache = Cache(ttl=0.01)
+    cache.put('key', 'response', cache.generation)
+    time.sleep(0.02)
+
+    assert cache.get('key') is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+    cache = Cache(ttl=60, maxsize=2)
+
+    for key in ('a', 'b'):
+        cache.put(key, key, cache.generation)
+
+    cache.get('a')
+    cache.put('c', 'c', cache.generation)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'a'
+
+
+def test_invalidate():
+    cache = Cache(ttl=60)
+    generation = cache.generation
+
+    cache.put(('/a', None, ()), 'a', generation)
+    cache.put(('/b', None, ()), 'b', generation)
+    cache.invalidate('/a')
+
+    assert cache.get(('/a', None, ())) is None
+    assert cache.get(('/b', None, ())) == 'b'
+
+    # Responses computed before the invalidation are discarded.
+    cache.put(('/a', None, ()), 'stale', generation)
+    assert cache.get(('/a', None, ())) is None
+
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        Cache(ttl=0)
+
+    with pytest.raises(ValueError):
+        Cache(ttl=1, maxsize=0)
+
+
+def test_http_get_decorator():
+    cache = Cache(ttl=60)
+
+    def action(self):
+        pass
+
+    route, verb, func, _, response_cache = get('/users', cache=cache)(action)
+
+    assert (verb, func, response_cache) == ('GET', action, cache)
+    assert not hasattr(action, 'response_cache')
+
+
+def test_caches_kept_in_application():
+    users_cache = Cache(ttl=60)
+    admins_cache = Cache(ttl=1)
+
+    def action(self):
+        pass
+
+    pyterrier = PyTerrier()
+    users = pyterrier.get('/users', cache=users_cache)(action)
+    admins = pyterrier.get('/admins', cache=admins_cache)(action)
+    other = pyterrier.get('/other')(action)
+    app = pyterrier._compile()
+
+    # The same function is cached separately on every route.
+    assert app.response_cache(users) is users_cache
+    assert app.response_cache(admins) is admins_cache
+    assert app.response_cache(other) is None
+    assert not hasattr(action, 'response_cache')
+
+
+def cached_routes(cache, calls):
+    def get_users(self):
+        calls.append(self.request.path)
+        return Ok({'calls': len(calls)})
+
+    def get_missing(self):
+        calls.append(self.request.path)
+        return NotFound()
+
+    return [get('/users', cache=cache)(get_users),
+            get('/missing', cache=cache)(get_missing)]
+
+
+def request(conn, path, headers={}):
+    conn.request('GET', path, headers=headers)
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_serve_cached_response(engine, serve):
+    cache = Cache(ttl=60, vary=['query'])
+    calls = []
+
+    with serve(cached_routes(cache, calls), engine,
+               keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+
+        assert request(conn, '/users') == (200, b'{"calls": 1}')
+        assert request(conn, '/users') == (200, b'{"calls": 1}')
+        assert request(conn, '/users?page=2') == (200, b'{"calls": 2}')
+        assert len(calls) == 2
+
+        cache.invalidate('/users')
+
+        assert request(conn, '/users') == (200, b'{"calls": 3}')
+        assert cache.hits == 1
+        conn.close()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_errors_are_not_cached(engine, serve):
+    calls = []
+
+    with serve(cached_routes(Cache(ttl=60), calls), engine,
+               keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        request(conn, '/missing')
+        request(conn, '/missing')
+        conn.close()
+
+        assert len(calls) == 2
+
+
+def test_compressed_responses_are_cached_apart(serve):
+    calls = []
+
+    with serve(cached_routes(Cache(ttl=60), calls), keep_alive=True,
+               compress_min_size=1) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        plain = request(conn, '/users')
+        compressed = request(conn, '/users', {'Accept-Encoding': 'gzip'})
+
+        assert plain != compressed
+        assert request(conn, '/users') == plain
+        assert len(calls) == 2
+        conn.close()
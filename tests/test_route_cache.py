@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+
+from pyterrier import PyTerrier
+from pyterrier.core.route_cache import RouteCache
+from pyterrier.core.route_resolver import RouteResolver
+
+
+def action_mock():
+    return 'test'
+
+
+def test_cache_with_invalid_size():
+    with pytest.raises(ValueError):
+        RouteCache(0)
+
+
+def test_cache_hits_and_misses():
+    cache = RouteCache(10)
+
+    assert cache.get(('GET', '/')) is None
+    cache.put(('GET', '/'), 'value', cache.generation)
+    assert cache.get(('GET', '/')) == 'value'
+
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = RouteCache(2)
+
+    cache.put('a', 1, cache.generation)
+    cache.put('b', 2, cache.generation)
+    cache.get('a')
+    cache.put('c', 3, cache.generation)
+
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_cache_ignores_results_from_old_generation():
+    cache = RouteCache(10)
+    generation = cache.generation
+
+    cache.invalidate()
+    cache.put('a', 1, generation)
+
+    assert cache.get('a') is None
+
+
+def test_cache_counters_with_multiple_threads():
+    cache = RouteCache(10)
+    cache.put('a', 1, cache.generation)
+
+    def worker():
+        for _ in range(1000):
+            cache.get('a')
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert cache.hits == 8000
+
+
+def test_cache_counters_of_exited_threads_are_added_up():
+    cache = RouteCache(10)
+    cache.put('a', 1, cache.generation)
+
+    def worker():
+        cache.get('a')
+        cache.get('b')
+
+    for _ in range(100):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    assert cache.hits == 100
+    assert cache.misses == 100
+    assert len(cache._threads) == 0
+
+
+def test_resolver_uses_cache():
+    cache = RouteCache(10)
+    resolver = RouteResolver({'GET': [('/api/user/{id:int}', action_mock)]},
+                             cache)
+
+    assert resolver.resolve('/api/user/1', 'GET') == ('GET',
+                                                      action_mock,
+                                                      ('1',))
+    assert resolver.resolve('/api/user/1', 'GET') == ('GET',
+                                                      action_mock,
+                                                      ('1',))
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_register_route_invalidates_cache():
+    app = PyTerrier(route_cache_size=10)
+    cache = app.route_cache
+    cache.put(('GET', '/'), 'value', cache.generation)
+
+    app.get('/')(action_mock)
+
+    assert len(cache) == 0
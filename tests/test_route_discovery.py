@@ -0,0 +1,188 @@
+import asyncio
+import http.client
+import json
+import os
+import sys
+
+import pytest
+
+from pyterrier import PyTerrier
+from pyterrier.core.route_discovery import RouteDiscovery
+
+
+USER_CONTROLLER = '''
+from pyterrier.http import Cache, Ok, get, post
+
+
+@get('/get/{id:int}', cache=Cache(ttl=60))
+def get_user(self, id):
+    return Ok({'id': id})
+
+
+@post('/add', additional_methods=['PUT'])
+def add_user(self, form):
+    return Ok(form)
+
+
+@get('/async')
+async def get_async(self):
+    return Ok('async')
+'''
+
+ORDER_CONTROLLER = '''
+from pyterrier.http import Ok, get
+
+
+@get('/list')
+def list_orders(self):
+    return Ok([])
+'''
+
+
+@pytest.fixture
+def app_dir(tmp_path, monkeypatch):
+    controllers = tmp_path / 'controllers'
+    controllers.mkdir()
+    (controllers / '__init__.py').write_text('')
+    (controllers / 'userController.py').write_text(USER_CONTROLLER)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    yield tmp_path
+
+    unload_controllers()
+
+
+def unload_controllers():
+    for name in list(sys.modules):
+        if name == 'controllers' or name.startswith('controllers.'):
+            del sys.modules[name]
+
+
+def discover(prefix_routes=True, manifest='routes.json'):
+    discovery = RouteDiscovery()
+    discovery.register_actions(prefix_routes, manifest)
+
+    return {route: (verb, func, methods, cache)
+            for route, verb, func, methods, cache in discovery.actions}
+
+
+def test_register_actions_without_manifest(app_dir):
+    actions = discover(manifest=None)
+
+    assert sorted(actions) == ['/user/add', '/user/async',
+                               '/user/get/{id:int}']
+    assert not (app_dir / 'routes.json').exists()
+
+
+def test_manifest_written(app_dir):
+    actions = discover()
+    manifest = json.loads((app_dir / 'routes.json').read_text())
+    routes = {route['route']: route for route in manifest['routes']}
+
+    assert manifest['prefix_routes'] is True
+    assert list(manifest['sources']) == ['userController.py']
+    assert routes['/user/add'] == {'route': '/user/add',
+                                   'verbs': ['POST', 'PUT'],
+                                   'module': 'controllers.userController',
+                                   'attribute': 'add_user',
+                                   'coroutine': False,
+                                   'cached': False}
+    assert routes['/user/get/{id:int}']['cached'] is True
+    assert routes['/user/async']['coroutine'] is True
+    assert actions['/user/add'][2] == ['PUT']
+
+
+def test_routes_loaded_lazily_from_manifest(app_dir):
+    discover()
+    unload_controllers()
+
+    actions = discover()
+
+    assert 'controllers.userController' not in sys.modules
+    assert sorted(actions) == ['/user/add', '/user/async',
+                               '/user/get/{id:int}']
+
+    verb, add_user, methods, cache = actions['/user/add']
+    assert (verb, methods, cache) == ('POST', ['PUT'], None)
+    assert add_user(None, {'name': 'x'}).data == {'name': 'x'}
+    assert 'controllers.userController' in sys.modules
+
+    _, get_user, _, cache = actions['/user/get/{id:int}']
+    assert get_user.__name__ == 'get_user'
+    assert cache.ttl == 60
+
+    _, get_async, _, _ = actions['/user/async']
+    assert asyncio.iscoroutinefunction(get_async)
+    assert asyncio.run(get_async(None)).data == 'async'
+
+
+def test_manifest_rebuilt_when_controllers_change(app_dir):
+    discover()
+
+    controller = app_dir / 'controllers' / 'orderController.py'
+    controller.write_text(ORDER_CONTROLLER)
+    unload_controllers()
+
+    assert '/order/list' in discover()
+    assert 'controllers.orderController' in sys.modules
+
+    controller.write_text(ORDER_CONTROLLER.replace('/list', '/all'))
+    stat = controller.stat()
+    os.utime(controller, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    unload_controllers()
+
+    actions = discover()
+    assert '/order/all' in actions and '/order/list' not in actions
+
+    unload_controllers()
+    assert '/order/all' in discover()
+    assert 'controllers.orderController' not in sys.modules
+
+
+def test_manifest_rebuilt_when_prefix_changes(app_dir):
+    discover()
+    unload_controllers()
+
+    assert '/get/{id:int}' in discover(prefix_routes=False)
+    assert 'controllers.userController' in sys.modules
+
+
+def test_invalid_manifest_ignored(app_dir):
+    (app_dir / 'routes.json').write_text('{not json')
+
+    assert '/user/add' in discover()
+    assert json.loads((app_dir / 'routes.json').read_text())['routes']
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_serve_lazy_actions(app_dir, engine, serve):
+    PyTerrier().init_routes(prefix_routes=True, manifest='routes.json')
+    unload_controllers()
+
+    pyterrier = PyTerrier()
+    pyterrier.init_routes(prefix_routes=True, manifest='routes.json')
+
+    with serve(engine=engine, pyterrier=pyterrier,
+               keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+
+        assert 'controllers.userController' not in sys.modules
+
+        # The second request is answered from the response cache.
+        for _ in range(2):
+            conn.request('GET', '/user/get/7')
+            response = conn.getresponse()
+
+            assert response.status == 200
+            assert json.loads(response.read()) == {'id': '7'}
+
+        assert 'controllers.userController' in sys.modules
+
+        conn.request('GET', '/user/async')
+        response = conn.getresponse()
+
+        assert response.status == 200
+        assert json.loads(response.read()) == 'async'
+        conn.close()
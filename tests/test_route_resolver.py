@@ -0,0 +1,89 @@
+import pytest
+
+from pyterrier.core.route_resolver import RouteResolver
+from pyterrier.core.route_tree import RouteTree
+
+
+def action_mock():
+    return 'test'
+
+
+def other_action_mock():
+    return 'other'
+
+
+def test_lookup_static_route():
+    tree = RouteTree.from_routes([('/api/user/get', action_mock)])
+    assert tree.lookup('/api/user/get') == ('/api/user/get', action_mock, ())
+
+
+def test_lookup_with_trailing_slash():
+    tree = RouteTree.from_routes([('/api/user/get', action_mock)])
+    assert tree.lookup('/api/user/get/')[1] == action_mock
+
+
+def test_lookup_root_route():
+    tree = RouteTree.from_routes([('/', action_mock)])
+    assert tree.lookup('/')[1] == action_mock
+    assert tree.lookup('/api') is None
+
+
+def test_lookup_with_int_param():
+    tree = RouteTree.from_routes([('/api/user/{id:int}', action_mock)])
+    assert tree.lookup('/api/user/10') == ('/api/user/{id:int}',
+                                           action_mock,
+                                           ('10',))
+    assert tree.lookup('/api/user/daniel') is None
+
+
+def test_lookup_with_different_param_types():
+    route = '/api/user/{id:int}/room/{room_name:str}'
+    tree = RouteTree.from_routes([(route, action_mock)])
+    assert tree.lookup('/api/user/1/room/kitchen/')[2] == ('1', 'kitchen')
+
+
+def test_lookup_with_param_inside_segment():
+    tree = RouteTree.from_routes([('/api/file-{id:int}', action_mock)])
+    assert tree.lookup('/api/file-42')[2] == ('42',)
+
+
+def test_lookup_without_slash_prefix():
+    tree = RouteTree.from_routes([('api/user/get', action_mock)])
+    assert tree.lookup('/api/user/get')[1] == action_mock
+
+
+def test_lookup_not_found():
+    tree = RouteTree.from_routes([('/api/user/get', action_mock)])
+    assert tree.lookup('/api/user') is None
+    assert tree.lookup('/api/user/get/all') is None
+    assert tree.lookup('api/user/get') is None
+
+
+def test_first_registered_route_wins():
+    tree = RouteTree.from_routes([
+        ('/api/user/{name:str}', action_mock),
+        ('/api/user/me', other_action_mock),
+    ])
+    assert tree.lookup('/api/user/me')[1] == action_mock
+
+    tree = RouteTree.from_routes([
+        ('/api/user/me', other_action_mock),
+        ('/api/user/{name:str}', action_mock),
+    ])
+    assert tree.lookup('/api/user/me')[1] == other_action_mock
+    assert tree.lookup('/api/user/daniel')[1] == action_mock
+
+
+def test_resolve():
+    resolver = RouteResolver({'GET': [('/api/user/{id:int}', action_mock)]})
+    assert resolver.resolve('/api/user/1', 'GET') == ('GET',
+                                                      action_mock,
+                                                      ('1',))
+    assert resolver.resolve('/api/user', 'GET') is None
+
+
+def test_resolve_verb_without_routes():
+    resolver = RouteResolver({'GET': [('/api/user/{id:int}', action_mock)]})
+
+    with pytest.raises(KeyError):
+        resolver.resolve('/api/user/1', 'POST')
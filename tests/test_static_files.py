@@ -0,0 +1,254 @@
+import http.client
+import os
+
+import pytest
+
+from pyterrier import PyTerrier
+from pyterrier.http.static_file_cache import StaticFileCache
+from pyterrier.http.static_files import StaticFiles
+from pyterrier.http.static_files import parse_range
+
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / 'image.png').write_bytes(CONTENT)
+    (tmp_path / 'file.unknownext').write_bytes(b'')
+    return tmp_path
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range('bytes=0-9', 100) == [(0, 9)]
+    assert parse_range('bytes=90-', 100) == [(90, 99)]
+    assert parse_range('bytes=-10', 100) == [(90, 99)]
+    assert parse_range('bytes=0-0, 50-200', 100) == [(0, 0), (50, 99)]
+    assert parse_range('bytes=100-', 100) == []
+    assert parse_range('bytes=9-0', 100) is None
+    assert parse_range('items=0-9', 100) is None
+    assert parse_range('bytes=-10', 0) == []
+    assert parse_range('bytes=50-59, 0-9, 5-20, 21-30', 100) == [
+        (0, 30), (50, 59)]
+
+
+def test_prepare_whole_file(static_dir):
+    static_files = StaticFiles(str(static_dir), {'.png': 'image/png'})
+    response = static_files.prepare('/image.png', {})
+
+    assert response.status == 200
+    assert response.parts == [(0, len(CONTENT))]
+    assert ('Content-type', 'image/png') in response.headers
+
+
+def test_prepare_not_found_and_unsupported(static_dir):
+    static_files = StaticFiles(str(static_dir), {'.png': 'image/png'})
+
+    assert static_files.prepare('/missing.png', {}).status == 404
+    assert static_files.prepare('/../image.png', {}).status == 404
+    assert static_files.prepare('/file.unknownext', {}).status == 415
+
+
+def test_prepare_range_not_satisfiable(static_dir):
+    static_files = StaticFiles(str(static_dir), {'.png': 'image/png'})
+    response = static_files.prepare('/image.png', {'Range': 'bytes=5000-'})
+
+    assert response.status == 416
+    assert ('Content-Range', f'bytes */{len(CONTENT)}') in response.headers
+
+
+def test_prepare_range_of_empty_file(static_dir):
+    (static_dir / 'empty.png').write_bytes(b'')
+    static_files = StaticFiles(str(static_dir), {'.png': 'image/png'})
+
+    for value in ('bytes=-10', 'bytes=0-', 'bytes=0-0'):
+        response = static_files.prepare('/empty.png', {'Range': value})
+
+        assert response.status == 416
+        assert ('Content-Range', 'bytes */0') in response.headers
+
+
+def test_prepare_overlapping_ranges(static_dir):
+    static_files = StaticFiles(str(static_dir), {'.png': 'image/png'})
+
+    # The same range repeated is sent once.
+    response = static_files.prepare(
+        '/image.png', {'Range': 'bytes=' + ', '.join(['0-'] * 16)})
+
+    assert response.status == 206
+    assert response.content_length == len(CONTENT)
+
+    # Ranges covering almost all the file are cheaper as the whole file.
+    response = static_files.prepare('/image.png',
+                                    {'Range': 'bytes=0-500, 502-1023'})
+
+    assert response.status == 200
+    assert response.content_length == len(CONTENT)
+
+
+def test_prepare_not_modified(static_dir):
+    static_files = StaticFiles(str(static_dir), {'.png': 'image/png'})
+    etag = dict(static_files.prepare('/image.png', {}).headers)['ETag']
+    last_modified = static_files.find('/image.png').last_modified
+
+    for headers in ({'If-None-Match': etag},
+                    {'If-None-Match': f'"other", W/{etag}'},
+                    {'If-None-Match': '*'},
+                    {'If-Modified-Since': last_modified}):
+        response = static_files.prepare('/image.png', headers)
+
+        assert response.status == 304
+        assert response.parts == []
+        assert ('ETag', etag) in response.headers
+
+    # If-None-Match takes precedence over If-Modified-Since.
+    assert static_files.prepare('/image.png', {
+        'If-None-Match': '"other"',
+        'If-Modified-Since': last_modified,
+    }).status == 200
+    assert static_files.prepare('/image.png', {
+        'If-Modified-Since': 'not a date'
+    }).status == 200
+
+
+def test_prepare_if_range(static_dir):
+    static_files = StaticFiles(str(static_dir), {'.png': 'image/png'})
+    etag = static_files.find('/image.png').etag
+
+    assert static_files.prepare('/image.png', {
+        'Range': 'bytes=0-9', 'If-Range': etag}).status == 206
+    assert static_files.prepare('/image.png', {
+        'Range': 'bytes=0-9', 'If-Range': '"stale"'}).status == 200
+
+
+def test_cached_file_is_served_from_memory(static_dir, monkeypatch):
+    cache = StaticFileCache(4096)
+    static_files = StaticFiles(str(static_dir), {'.png': 'image/png'}, cache)
+
+    static_files.prepare('/image.png', {})
+    assert len(cache) == 1
+    assert cache.size == len(CONTENT)
+
+    def fail(*args):
+        raise AssertionError('The cached file must not be read again.')
+
+    monkeypatch.setattr(os, 'stat', fail)
+    monkeypatch.setattr('builtins.open', fail)
+
+    response = static_files.prepare('/image.png', {'Range': 'bytes=10-19'})
+
+    assert response.status == 206
+    assert response.path is None
+    assert bytes(response.parts[0]) == CONTENT[10:20]
+    assert response.content_length == 10
+
+
+def test_cached_file_is_reloaded_when_modified(static_dir):
+    cache = StaticFileCache(4096, check_interval=0)
+    static_files = StaticFiles(str(static_dir), {'.png': 'image/png'}, cache)
+    first = static_files.find('/image.png')
+
+    assert static_files.find('/image.png') is first
+
+    (static_dir / 'image.png').write_bytes(b'new content')
+    os.utime(static_dir / 'image.png', (0, 0))
+    second = static_files.find('/image.png')
+
+    assert second.data == b'new content'
+    assert second.etag != first.etag
+    assert cache.size == len(b'new content')
+
+    os.remove(static_dir / 'image.png')
+
+    assert static_files.find('/image.png') is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used(static_dir):
+    (static_dir / 'other.png').write_bytes(CONTENT)
+    cache = StaticFileCache(len(CONTENT) * 3 // 2)
+    static_files = StaticFiles(str(static_dir), {'.png': 'image/png'}, cache)
+
+    static_files.find('/image.png')
+    static_files.find('/other.png')
+
+    assert len(cache) == 1
+    assert cache.get(str(static_dir / 'other.png')) is not None
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_serve_binary_file(engine, static_dir, serve):
+    pyterrier = PyTerrier(static_files=str(static_dir))
+
+    with serve(engine=engine, pyterrier=pyterrier) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/image.png')
+        response = conn.getresponse()
+
+        assert response.status == 200
+        assert response.getheader('Content-Length') == str(len(CONTENT))
+        assert response.read() == CONTENT
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_serve_single_range(engine, static_dir, serve):
+    pyterrier = PyTerrier(static_files=str(static_dir))
+
+    with serve(engine=engine, pyterrier=pyterrier) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/image.png', headers={'Range': 'bytes=10-19'})
+        response = conn.getresponse()
+
+        assert response.status == 206
+        assert response.getheader('Content-Range') == (
+            f'bytes 10-19/{len(CONTENT)}')
+        assert response.read() == CONTENT[10:20]
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_serve_multiple_ranges(engine, static_dir, serve):
+    pyterrier = PyTerrier(static_files=str(static_dir))
+
+    with serve(engine=engine, pyterrier=pyterrier) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/image.png',
+                     headers={'Range': 'bytes=0-1, 255-256'})
+        response = conn.getresponse()
+        body = response.read()
+
+        assert response.status == 206
+        assert response.getheader('Content-Type').startswith(
+            'multipart/byteranges; boundary=')
+        assert len(body) == int(response.getheader('Content-Length'))
+        assert b'Content-Range: bytes 0-1/1024\r\n\r\n\x00\x01' in body
+        assert b'Content-Range: bytes 255-256/1024\r\n\r\n\xff\x00' in body
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+@pytest.mark.parametrize('static_cache_size', [None, 4096])
+def test_serve_conditional_get(engine, static_cache_size, static_dir, serve):
+    pyterrier = PyTerrier(static_files=str(static_dir),
+                          static_cache_size=static_cache_size)
+
+    with serve(engine=engine, pyterrier=pyterrier) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/image.png')
+        response = conn.getresponse()
+        etag = response.getheader('ETag')
+
+        assert response.read() == CONTENT
+        assert response.getheader('Last-Modified')
+
+        conn.request('GET', '/image.png', headers={'If-None-Match': etag})
+        response = conn.getresponse()
+
+        assert response.status == 304
+        assert response.getheader('Content-Length') is None
+        assert response.read() == b''
+
+        conn.request('GET', '/image.png', headers={'Range': 'bytes=1-2'})
+        response = conn.getresponse()
+
+        assert response.status == 206
+        assert response.read() == CONTENT[1:3]
@@ -0,0 +1,158 @@
+import gzip
+import http.client
+import json
+
+import pytest
+
+from pyterrier.http import StreamingHttpResult, get, post
+
+
+class Row:
+    def __init__(self, row_id):
+        self.row_id = row_id
+        self.user_name = f'user {row_id}'
+
+
+def rows(count):
+    for row_id in range(count):
+        yield Row(row_id)
+
+
+def expected(count):
+    return [{'rowId': i, 'userName': f'user {i}'} for i in range(count)]
+
+
+def get_rows(self, count):
+    return StreamingHttpResult(rows(int(count)), buffer_size=1024)
+
+
+def get_ndjson(self, count):
+    return StreamingHttpResult(rows(int(count)), ndjson=True)
+
+
+def get_empty(self):
+    return StreamingHttpResult(iter([]))
+
+
+def get_failing(self):
+    def failing():
+        raise RuntimeError('no rows')
+        yield
+
+    return StreamingHttpResult(failing())
+
+
+def post_rows(self, form):
+    return StreamingHttpResult(rows(int(form['count'])), 201)
+
+
+ROUTES = [
+    get('/rows/{count:int}')(get_rows),
+    get('/ndjson/{count:int}')(get_ndjson),
+    get('/empty')(get_empty),
+    get('/failing')(get_failing),
+    post('/rows')(post_rows),
+]
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_stream_json_array(engine, serve):
+    with serve(ROUTES, engine, keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+
+        for path, count in (('/rows/1000', 1000), ('/empty', 0)):
+            conn.request('GET', path)
+            response = conn.getresponse()
+
+            assert response.status == 200
+            assert response.getheader('Content-type') == 'application/json'
+            assert response.getheader('Transfer-Encoding') == 'chunked'
+            assert json.loads(response.read()) == expected(count)
+
+        conn.close()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_stream_ndjson(engine, serve):
+    with serve(ROUTES, engine, keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/ndjson/100')
+        response = conn.getresponse()
+        lines = response.read().decode().splitlines()
+
+        assert response.getheader('Content-type') == 'application/x-ndjson'
+        assert [json.loads(line) for line in lines] == expected(100)
+
+        conn.close()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_stream_json_http_10(engine, serve):
+    with serve(ROUTES, engine) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/rows/100')
+        response = conn.getresponse()
+
+        assert response.getheader('Transfer-Encoding') is None
+        assert json.loads(response.read()) == expected(100)
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_stream_json_gzip(engine, serve):
+    with serve(ROUTES, engine, keep_alive=True,
+               compress_min_size=1024) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/rows/1000', headers={'Accept-Encoding': 'gzip'})
+        response = conn.getresponse()
+
+        assert response.getheader('Content-Encoding') == 'gzip'
+        assert json.loads(gzip.decompress(response.read())) == expected(1000)
+
+        conn.close()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_stream_json_post(engine, serve):
+    with serve(ROUTES, engine, keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('POST', '/rows', body='count=10', headers={
+            'Content-Type': 'application/x-www-form-urlencoded'})
+        response = conn.getresponse()
+
+        assert response.status == 201
+        assert json.loads(response.read()) == expected(10)
+
+        conn.close()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_stream_json_error_before_first_row(engine, serve):
+    with serve(ROUTES, engine, keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/failing')
+        response = conn.getresponse()
+
+        assert response.status == 500
+        assert b'no rows' in response.read()
+
+        conn.close()
+
+
+def test_rows_are_consumed_lazily():
+    consumed = []
+
+    def generate():
+        for row_id in range(10):
+            consumed.append(row_id)
+            yield row_id
+
+    result = StreamingHttpResult(generate())
+
+    assert consumed == []
+    assert next(iter(result.data)) == 0
+    assert consumed == [0]
+
+
+def test_buffer_size_must_be_positive():
+    with pytest.raises(ValueError):
+        StreamingHttpResult([], buffer_size=0)
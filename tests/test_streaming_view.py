@@ -0,0 +1,131 @@
+import gzip
+import http.client
+import socket
+
+import pytest
+
+from pyterrier import PyTerrier
+from pyterrier.http import StreamingViewResult, get
+from pyterrier.renderers.base_renderer import BaseRenderer
+
+
+ROWS = 500
+PAGE = ''.join(f'<li>item {i}</li>\n' for i in range(ROWS))
+
+
+def get_list(self):
+    return StreamingViewResult('list.html', {'rows': ROWS}, buffer_size=1024)
+
+
+def get_missing(self):
+    return StreamingViewResult('missing.html')
+
+
+ROUTES = [get('/list')(get_list), get('/missing')(get_missing)]
+
+
+@pytest.fixture
+def pyterrier(tmp_path):
+    (tmp_path / 'list.html').write_text(
+        '{% for i in range(rows) %}<li>item {{ i }}</li>\n{% endfor %}')
+
+    return PyTerrier(template_dir=str(tmp_path))
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_stream_chunked(engine, pyterrier, serve):
+    with serve(ROUTES, engine, pyterrier, keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+
+        for _ in range(2):
+            conn.request('GET', '/list')
+            response = conn.getresponse()
+
+            assert response.status == 200
+            assert response.getheader('Transfer-Encoding') == 'chunked'
+            assert response.read().decode() == PAGE
+
+        conn.close()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_stream_buffer_size(engine, pyterrier, serve):
+    with serve(ROUTES, engine, pyterrier, keep_alive=True) as server:
+        with socket.create_connection(server.server_address) as sock:
+            sock.sendall(b'GET /list HTTP/1.1\r\nConnection: close\r\n\r\n')
+            data = b''
+
+            while True:
+                received = sock.recv(65536)
+
+                if not received:
+                    break
+
+                data += received
+
+        body = data.partition(b'\r\n\r\n')[2]
+        sizes = []
+
+        while True:
+            size, _, body = body.partition(b'\r\n')
+            sizes.append(int(size, 16))
+            body = body[sizes[-1] + 2:]
+
+            if sizes[-1] == 0:
+                break
+
+        assert len(sizes) > 2
+        assert all(size >= 1024 for size in sizes[:-2])
+        assert sum(sizes) == len(PAGE)
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_stream_http_10(engine, pyterrier, serve):
+    with serve(ROUTES, engine, pyterrier) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/list')
+        response = conn.getresponse()
+
+        assert response.getheader('Transfer-Encoding') is None
+        assert response.getheader('Content-Length') is None
+        assert response.read().decode() == PAGE
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_stream_gzip(engine, pyterrier, serve):
+    with serve(ROUTES, engine, pyterrier, keep_alive=True,
+               compress_min_size=1024) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/list', headers={'Accept-Encoding': 'gzip'})
+        response = conn.getresponse()
+
+        assert response.getheader('Content-Encoding') == 'gzip'
+        assert gzip.decompress(response.read()).decode() == PAGE
+
+        conn.close()
+
+
+@pytest.mark.parametrize('engine', ['threaded', 'asyncio'])
+def test_stream_error_before_first_chunk(engine, pyterrier, serve):
+    with serve(ROUTES, engine, pyterrier, keep_alive=True) as server:
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request('GET', '/missing')
+        response = conn.getresponse()
+
+        assert response.status == 500
+        assert b'missing.html' in response.read()
+
+        conn.close()
+
+
+def test_base_renderer_streams_whole_template():
+    class Renderer(BaseRenderer):
+        def render(self, template_name, context):
+            return f'{template_name} {context}'
+
+    assert list(Renderer().stream('index.html', 1)) == ['index.html 1']
+
+
+def test_buffer_size_must_be_positive():
+    with pytest.raises(ValueError):
+        StreamingViewResult('index.html', buffer_size=0)